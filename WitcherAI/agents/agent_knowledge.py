@@ -0,0 +1,145 @@
+# Agent Knowledge Structures
+# Hashed, bounded containers for what agents remember between cycles, so
+# membership checks stay O(1) however long an agent has been running
+
+import json
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Iterator, List, Optional
+
+def json_ready(value: Any) -> Any:
+    """Copy of value with bytes decoded, so a JSON round trip keeps its identity"""
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='ignore')
+    if isinstance(value, dict):
+        return {key: json_ready(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_ready(item) for item in value]
+    return value
+
+def canonical_field(value: Any) -> Hashable:
+    """Hashable form of a pattern field that is the same before and after a snapshot"""
+    value = json_ready(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return value
+
+def pattern_identity(pattern: Any) -> Hashable:
+    """Stable identity of a discovered pattern
+
+    Dict patterns are identified by what was found and where, ignoring
+    volatile fields such as confidence or the tool that reported them.
+    """
+    if isinstance(pattern, dict):
+        name = pattern.get('pattern', pattern.get('type', pattern.get('name')))
+        return (canonical_field(name), canonical_field(pattern.get('context', pattern.get('value'))))
+    return canonical_field(pattern)
+
+class PatternRegistry:
+    """Insertion-ordered set of patterns keyed by pattern_identity
+
+    When max_patterns is set the oldest patterns are forgotten first.
+    """
+
+    def __init__(self, max_patterns: Optional[int] = None):
+        self.max_patterns = max_patterns
+        self._patterns: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def add(self, pattern: Any) -> bool:
+        """Remember a pattern; returns True if it was not known yet"""
+        key = pattern_identity(pattern)
+        if key in self._patterns:
+            return False
+
+        self._patterns[key] = pattern
+        if self.max_patterns is not None and len(self._patterns) > self.max_patterns:
+            self._patterns.popitem(last=False)
+        return True
+
+    def __contains__(self, pattern: Any) -> bool:
+        return pattern_identity(pattern) in self._patterns
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._patterns.values())
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def to_state(self) -> Dict:
+        """JSON-friendly form for agent snapshots"""
+        return {'max_patterns': self.max_patterns, 'patterns': [json_ready(pattern) for pattern in self._patterns.values()]}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "PatternRegistry":
+        registry = cls(max_patterns=state.get('max_patterns'))
+        for pattern in state.get('patterns', []):
+            registry.add(pattern)
+        return registry
+
+class OutcomeLedger:
+    """Bounded per-key history of outcomes (keyed by save path, strategy name, ...)
+
+    Keeps at most max_records_per_key outcomes per key and max_keys keys,
+    evicting the least recently recorded key. total_recorded keeps counting
+    past evictions so rates stay meaningful for long-running agents.
+    """
+
+    def __init__(self, max_keys: int = 10000, max_records_per_key: int = 20):
+        self.max_keys = max_keys
+        self.max_records_per_key = max_records_per_key
+        self.total_recorded = 0
+        self._outcomes: "OrderedDict[Hashable, deque]" = OrderedDict()
+
+    def record(self, key: Hashable, outcome: Dict):
+        """Append an outcome for key"""
+        history = self._outcomes.get(key)
+        if history is None:
+            history = self._outcomes[key] = deque(maxlen=self.max_records_per_key)
+        else:
+            self._outcomes.move_to_end(key)
+
+        history.append(outcome)
+        self.total_recorded += 1
+
+        if len(self._outcomes) > self.max_keys:
+            self._outcomes.popitem(last=False)
+
+    def has(self, key: Hashable) -> bool:
+        return key in self._outcomes
+
+    __contains__ = has
+
+    def outcomes(self, key: Hashable) -> List[Dict]:
+        """Retained outcomes for key, oldest first"""
+        return list(self._outcomes.get(key, ()))
+
+    def latest(self, key: Hashable) -> Optional[Dict]:
+        history = self._outcomes.get(key)
+        return history[-1] if history else None
+
+    def keys(self):
+        return self._outcomes.keys()
+
+    def records(self) -> Iterator[Dict]:
+        """Every retained outcome across all keys"""
+        for history in self._outcomes.values():
+            yield from history
+
+    def __len__(self) -> int:
+        return len(self._outcomes)
+
+    def to_state(self) -> Dict:
+        """JSON-friendly form for agent snapshots"""
+        return {
+            'max_keys': self.max_keys,
+            'max_records_per_key': self.max_records_per_key,
+            'total_recorded': self.total_recorded,
+            'outcomes': [[key, list(history)] for key, history in self._outcomes.items()]
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "OutcomeLedger":
+        ledger = cls(state['max_keys'], state['max_records_per_key'])
+        for key, history in state.get('outcomes', []):
+            ledger._outcomes[key] = deque(history, maxlen=ledger.max_records_per_key)
+        ledger.total_recorded = state.get('total_recorded', 0)
+        return ledger
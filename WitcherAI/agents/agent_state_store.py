@@ -0,0 +1,93 @@
+# Agent State Store - Durable Agent Memory
+# Append-only outcome log plus periodic compact snapshots, so agents restart
+# warm: loading reads one snapshot and only the events logged after it
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+class AgentStateStore:
+    """Snapshot + write-ahead log persistence for one agent's knowledge
+
+    Every event carries a sequence number. A snapshot records the last
+    sequence it includes and then truncates the log, so replay on load is
+    limited to the tail. If the process dies between writing the snapshot and
+    truncating the log, the already-snapshotted events are skipped by
+    sequence number rather than applied twice.
+    """
+
+    def __init__(self, state_dir: str, agent_name: str, snapshot_every: int = 500):
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.state_dir / f"{agent_name}.snapshot.json"
+        self.log_path = self.state_dir / f"{agent_name}.log.jsonl"
+        self.snapshot_every = snapshot_every
+        self.sequence = 0
+        self.events_since_snapshot = 0
+        self._log = None
+
+    def load(self) -> Tuple[Optional[Dict], List[Dict]]:
+        """Return (snapshot state or None, events logged after that snapshot)"""
+        state = None
+        snapshot_sequence = 0
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            state = snapshot['state']
+            snapshot_sequence = snapshot['sequence']
+
+        events = []
+        if self.log_path.exists():
+            good_offset = 0
+            with open(self.log_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # Torn final line from a crash mid-write
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    good_offset += len(line)
+                    if entry['seq'] > snapshot_sequence:
+                        events.append(entry['event'])
+                    snapshot_sequence = max(snapshot_sequence, entry['seq'])
+
+            # Cut the torn line off; appends would otherwise land behind it and be lost on every later load
+            if good_offset < self.log_path.stat().st_size:
+                with open(self.log_path, 'r+b') as f:
+                    f.truncate(good_offset)
+
+        self.sequence = snapshot_sequence
+        self.events_since_snapshot = len(events)
+        return state, events
+
+    def append(self, event: Dict) -> bool:
+        """Durably log an event; returns True when a snapshot is due"""
+        if self._log is None:
+            self._log = open(self.log_path, 'a', encoding='utf-8')
+
+        self.sequence += 1
+        self._log.write(json.dumps({'seq': self.sequence, 'event': event}, default=str) + '\n')
+        self._log.flush()
+        self.events_since_snapshot += 1
+        return self.events_since_snapshot >= self.snapshot_every
+
+    def snapshot(self, state: Dict):
+        """Write a compact snapshot of the full state and start a fresh log"""
+        temp_path = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'sequence': self.sequence, 'state': state}, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self.log_path, 'w', encoding='utf-8')
+        self.events_since_snapshot = 0
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
@@ -2,14 +2,28 @@
 # Autonomously discovers and analyzes save files from Witcher 1, 2, and 3
 
 import os
+import re
 import sqlite3
 import subprocess
 import json
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import time
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from typing import List, Dict, Optional
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agents.agent_knowledge import OutcomeLedger
+from agents.agent_state_store import AgentStateStore
+from agents.save_watcher import file_signature
+from cross_game_matcher import CrossGameMatcher
+from instrumentation import count, span
+from ml.pattern_feature_store import PatternFeatureStore
+from results_schema import PatternHit, ResultSet
+
 @dataclass
 class GameConfig:
     name: str
@@ -26,18 +40,50 @@ class SaveDiscovery:
     newest_save: Optional[str]
     oldest_save: Optional[str]
 
+def without_raw_output(analysis: Dict) -> Dict:
+    """Analysis minus the full tool output, for the knowledge journal"""
+    compact = {k: v for k, v in analysis.items() if k != "analysis_output"}
+    if "saves" in compact:
+        compact["saves"] = [without_raw_output(save) for save in compact["saves"]]
+    return compact
+
+def pattern_offset(pattern: Dict) -> int:
+    """First known offset of a pattern, -1 when the analysis reported none"""
+    if pattern.get("offset") is not None:
+        return int(pattern["offset"])
+    positions = pattern.get("positions")
+    if positions is not None and len(positions):
+        return int(positions[0])
+    return int(pattern.get("last_position", -1))
+
 class CrossGameDiscoveryAgent:
     """Autonomous agent that discovers and analyzes saves across all Witcher games"""
     
-    def __init__(self, db_path: str = "database/witcher_save_manager.db"):
+    def __init__(self, db_path: str = "database/witcher_save_manager.db", state_dir: Optional[str] = None,
+                 max_workers: int = 3, saves_per_game: int = 1, results_path: Optional[str] = None,
+                 ingest_features: bool = True):
         self.db_path = db_path
+        # Every analysed save also feeds the confidence engine's corpus features
+        self.feature_store = PatternFeatureStore(db_path) if ingest_features and Path(db_path).exists() else None
+        self.results_path = results_path  # Typed pattern hits for downstream stages (.wres, .ndjson or .parquet)
+        self.max_workers = max_workers  # Concurrent save analyses
+        self.saves_per_game = saves_per_game  # Newest N saves analysed per game
+        self._knowledge_lock = threading.Lock()
         self.knowledge = {
             "games_discovered": {},
             "cross_game_patterns": [],
-            "analysis_results": [],
-            "transfer_learnings": []
+            "analysis_results": deque(maxlen=20),  # Most recent sessions only
+            "discovery_sessions": 0,  # Every session, including those evicted above
+            "transfer_learnings": [],
+            # Last analysis per save path, reused while the file's (mtime, size) is unchanged
+            "analyzed_saves": OutcomeLedger(max_keys=10000, max_records_per_key=1)
         }
         
+        # Durable knowledge: restarts resume from the last snapshot plus the log tail
+        self.state_store = AgentStateStore(state_dir, "cross_game_discovery_agent") if state_dir else None
+        if self.state_store:
+            self.restore_state()
+        
         # Game configurations from App.config
         self.game_configs = [
             GameConfig("Witcher 1", "Witcher1", 
@@ -51,6 +97,53 @@ class CrossGameDiscoveryAgent:
                       "*.sav")
         ]
     
+    def apply_event(self, event: Dict):
+        """Apply one knowledge event (live or replayed from the state log)"""
+        if event["kind"] == "game_discovered":
+            self.knowledge["games_discovered"][event["key"]] = event["discovery"]
+        elif event["kind"] == "save_analyzed":
+            self.knowledge["analyzed_saves"].record(event["key"], {
+                "signature": event["signature"],
+                "result": event["result"]
+            })
+        elif event["kind"] == "session":
+            self.knowledge["analysis_results"].append(event["results"])
+            self.knowledge["discovery_sessions"] += 1
+    
+    def remember(self, event: Dict):
+        """Apply a knowledge event and journal it so restarts can replay it"""
+        with self._knowledge_lock:
+            self.apply_event(event)
+            if self.state_store and self.state_store.append(event):
+                self.state_store.snapshot(self.export_state())
+    
+    def export_state(self) -> Dict:
+        """JSON-friendly snapshot of the agent's knowledge"""
+        return {
+            "games_discovered": self.knowledge["games_discovered"],
+            "cross_game_patterns": self.knowledge["cross_game_patterns"],
+            "analysis_results": list(self.knowledge["analysis_results"]),
+            "discovery_sessions": self.knowledge["discovery_sessions"],
+            "transfer_learnings": self.knowledge["transfer_learnings"],
+            "analyzed_saves": self.knowledge["analyzed_saves"].to_state()
+        }
+    
+    def restore_state(self):
+        """Load the last knowledge snapshot and replay the events logged after it"""
+        state, events = self.state_store.load()
+        if state:
+            self.knowledge.update({
+                "games_discovered": state["games_discovered"],
+                "cross_game_patterns": state["cross_game_patterns"],
+                "analysis_results": deque(state["analysis_results"], maxlen=20),
+                "discovery_sessions": state.get("discovery_sessions", len(state["analysis_results"])),
+                "transfer_learnings": state["transfer_learnings"],
+                "analyzed_saves": OutcomeLedger.from_state(state["analyzed_saves"])
+            })
+        for event in events:
+            self.apply_event(event)
+        print(f"💾 [AGENT] Restored knowledge: {len(self.knowledge['analyzed_saves'])} analysed saves, {len(events)} events replayed")
+    
     def perceive_game_environment(self) -> Dict[str, SaveDiscovery]:
         """Agent autonomously discovers save files across all games"""
         print("🔍 [AGENT] Perceiving multi-game environment...")
@@ -97,6 +190,7 @@ class CrossGameDiscoveryAgent:
                 )
                 
                 discoveries[config.key] = discovery
+                self.remember({"kind": "game_discovered", "key": config.key, "discovery": asdict(discovery)})
                 
                 print(f"   ✅ {config.name}: {discovery.file_count} saves found ({discovery.total_size_mb:.1f}MB)")
                 if discovery.newest_save:
@@ -155,29 +249,123 @@ class CrossGameDiscoveryAgent:
         if strategy["action"] == "single_game_analysis":
             # Analyze single game
             game_key = strategy["target_game"]
-            target_save = strategy["target_save"]
-            
-            print(f"   Analyzing {game_key}: {Path(target_save).name}")
-            
-            analysis_result = self.analyze_single_save(target_save, game_key)
-            results["analyses"][game_key] = analysis_result
+            saves = self.newest_saves(discoveries[game_key], strategy.get("target_save"))
+            analyses, _ = self.analyze_games({game_key: saves})
+            results["analyses"] = analyses
             
         elif strategy["action"] == "cross_game_analysis":
-            # Analyze each available game
-            for game_key in strategy["target_games"]:
-                discovery = discoveries[game_key]
-                if discovery.newest_save:
-                    print(f"   Analyzing {discovery.game}: {Path(discovery.newest_save).name}")
-                    
-                    analysis_result = self.analyze_single_save(discovery.newest_save, game_key)
-                    results["analyses"][game_key] = analysis_result
-            
-            # Perform cross-game pattern matching
-            cross_insights = self.find_cross_game_patterns(results["analyses"])
-            results["cross_game_insights"] = cross_insights
+            # Analyze every available game concurrently, matching patterns as results arrive
+            game_saves = {game_key: self.newest_saves(discoveries[game_key]) for game_key in strategy["target_games"]}
+            analyses, matcher = self.analyze_games(game_saves)
+            results["analyses"] = analyses
+            results["cross_game_insights"] = matcher.cross_game_patterns()
+            results["cross_game_near_matches"] = list(matcher.near_matches())
         
         return results
     
+    def newest_saves(self, discovery: SaveDiscovery, target_save: Optional[str] = None) -> List[str]:
+        """The saves_per_game newest saves of a game, newest first (target_save, if given, leads)"""
+        saves = discovery.save_files[::-1]
+        if target_save:
+            saves = [target_save] + [save for save in saves if save != target_save]
+        return saves[:self.saves_per_game]
+    
+    def analyze_games(self, game_saves: Dict[str, List[str]]):
+        """Analyze saves of several games on a shared worker pool
+        
+        Returns (per-game analyses, CrossGameMatcher). Each finished save is
+        joined into the matcher straight away instead of after the slowest
+        game completes.
+        """
+        matcher = CrossGameMatcher()
+        save_analyses = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="CrossGameWorker") as pool:
+            futures = {}
+            for game_key, saves in game_saves.items():
+                for save_path in saves:
+                    print(f"   Analyzing {game_key}: {Path(save_path).name}")
+                    futures[pool.submit(self.analyze_save_cached, save_path, game_key)] = (game_key, save_path)
+            
+            if len(game_saves) > 1:
+                print("   🔗 Searching for cross-game patterns...")
+            for future in as_completed(futures):
+                game_key, save_path = futures[future]
+                analysis = save_analyses[(game_key, save_path)] = future.result()
+                if analysis["status"] == "success":
+                    for pattern_key in matcher.add(game_key, analysis["patterns_found"]):
+                        print(f"      Found '{pattern_key}' in: {', '.join(matcher.games(pattern_key))}")
+        
+        analyses = {
+            game_key: self.combine_game_analyses(game_key, [save_analyses[(game_key, save)] for save in saves])
+            for game_key, saves in game_saves.items() if saves
+        }
+        return analyses, matcher
+    
+    def combine_game_analyses(self, game_key: str, analyses: List[Dict]) -> Dict:
+        """Fold several analyses of one game into a single per-game result
+        
+        Patterns are merged by (type, value): a pattern seen in several saves
+        appears once, with the number of sightings in "occurrences" and its
+        highest confidence.
+        """
+        if len(analyses) == 1:
+            return analyses[0]
+        
+        successful = [a for a in analyses if a["status"] == "success"]
+        merged = {}
+        for analysis in successful:
+            for pattern in analysis["patterns_found"]:
+                key = (pattern["type"], pattern["value"])
+                if key in merged:
+                    merged[key]["occurrences"] += 1
+                    merged[key]["confidence"] = max(merged[key]["confidence"], pattern["confidence"])
+                else:
+                    merged[key] = {**pattern, "occurrences": 1}
+        patterns = list(merged.values())
+        return {
+            "status": "success" if successful else analyses[0]["status"],
+            "save_path": analyses[0]["save_path"],
+            "save_paths": [a["save_path"] for a in analyses],
+            "game": game_key,
+            "saves": analyses,
+            "patterns_found": patterns,
+            "pattern_count": len(patterns)
+        }
+    
+    def analyze_save_cached(self, save_path: str, game_key: str) -> Dict:
+        """Analyze a save unless an earlier run already analysed this exact file"""
+        signature = file_signature(Path(save_path))
+        signature = list(signature) if signature else None
+        
+        cached = self.knowledge["analyzed_saves"].latest(save_path)
+        if signature and cached and cached["signature"] == signature:
+            print(f"      ♻️ Unchanged since last analysis - reusing result")
+            count('analysis_cache_hits')
+            return cached["result"]
+        
+        analysis_result = self.analyze_single_save(save_path, game_key)
+        if analysis_result["status"] == "success":
+            self.ingest_save_features(save_path, game_key)
+        if signature and analysis_result["status"] == "success":
+            self.remember({
+                "kind": "save_analyzed",
+                "key": save_path,
+                "signature": signature,
+                "result": without_raw_output(analysis_result)
+            })
+        return analysis_result
+    
+    def ingest_save_features(self, save_path: str, game_key: str):
+        """Record the save's pattern statistics in the feature store the confidence engine reads"""
+        if self.feature_store is None:
+            return
+        try:
+            with span('ingest'):
+                self.feature_store.ingest_save(save_path, game_key)
+        except Exception as e:
+            print(f"      ⚠️ Feature ingestion failed: {str(e)}")
+    
     def analyze_single_save(self, save_path: str, game_key: str) -> Dict:
         """Analyze a single save file using our existing tools"""
         try:
@@ -198,10 +386,13 @@ class CrossGameDiscoveryAgent:
                     "-output-format", "patterns"
                 ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd=".")
+            with span('extract'):
+                result = subprocess.run(cmd, capture_output=True, text=True, cwd=".")
             
             if result.returncode == 0:
-                patterns = self.extract_patterns_from_output(result.stdout, game_key)
+                with span('parse'):
+                    patterns = self.extract_patterns_from_output(result.stdout, game_key)
+                count('patterns_matched', len(patterns))
                 
                 return {
                     "status": "success",
@@ -209,7 +400,7 @@ class CrossGameDiscoveryAgent:
                     "game": game_key,
                     "patterns_found": patterns,
                     "pattern_count": len(patterns),
-                    "analysis_output": result.stdout[:1000]  # First 1KB for reference
+                    "analysis_output": result.stdout
                 }
             else:
                 return {
@@ -235,8 +426,17 @@ class CrossGameDiscoveryAgent:
         """Extract meaningful patterns from analysis output"""
         patterns = []
         lines = output.split('\n')
+        previous = None
         
         for line in lines:
+            # The analyzer prints each pattern's first offset on the line after it
+            offset_match = re.match(r'\s*First at: 0x([0-9A-Fa-f]+)', line)
+            if offset_match:
+                if previous is not None:
+                    previous["offset"] = int(offset_match.group(1), 16)
+                continue
+            previous = None
+            
             # Look for different pattern indicators
             if any(indicator in line.lower() for indicator in 
                    ["pattern", "quest", "decision", "variable", "state"]):
@@ -248,12 +448,13 @@ class CrossGameDiscoveryAgent:
                         pattern_type = parts[0].strip()
                         pattern_value = parts[1].strip()
                         
-                        patterns.append({
+                        previous = {
                             "type": pattern_type,
                             "value": pattern_value,
                             "game": game_key,
                             "confidence": 0.7  # Default confidence
-                        })
+                        }
+                        patterns.append(previous)
         
         return patterns
     
@@ -261,38 +462,15 @@ class CrossGameDiscoveryAgent:
         """Agent identifies patterns that appear across multiple games"""
         print("   🔗 Searching for cross-game patterns...")
         
-        cross_patterns = []
-        
-        # Get all patterns from all games
-        all_patterns = {}
+        # Hash-join normalized pattern keys across games
+        matcher = CrossGameMatcher()
         for game, analysis in analyses.items():
             if analysis["status"] == "success":
-                all_patterns[game] = analysis["patterns_found"]
-        
-        if len(all_patterns) < 2:
-            return cross_patterns
-        
-        # Look for similar pattern types across games
-        pattern_types = {}
-        for game, patterns in all_patterns.items():
-            for pattern in patterns:
-                pattern_type = pattern["type"].lower()
-                if pattern_type not in pattern_types:
-                    pattern_types[pattern_type] = []
-                pattern_types[pattern_type].append((game, pattern))
-        
-        # Find types that appear in multiple games
-        for pattern_type, instances in pattern_types.items():
-            if len(instances) >= 2:
-                games_with_pattern = [inst[0] for inst in instances]
-                cross_patterns.append({
-                    "pattern_type": pattern_type,
-                    "appears_in_games": games_with_pattern,
-                    "instances": instances,
-                    "transfer_potential": "high" if len(games_with_pattern) >= 3 else "medium"
-                })
-                
-                print(f"      Found '{pattern_type}' in: {', '.join(games_with_pattern)}")
+                matcher.add(game, analysis["patterns_found"])
+        
+        cross_patterns = matcher.cross_game_patterns()
+        for cross_pattern in cross_patterns:
+            print(f"      Found '{cross_pattern['pattern_type']}' in: {', '.join(cross_pattern['appears_in_games'])}")
         
         return cross_patterns
     
@@ -308,7 +486,10 @@ class CrossGameDiscoveryAgent:
         }
         
         # Store knowledge for future use
-        self.knowledge["analysis_results"].append(results)
+        self.remember({"kind": "session", "results": {
+            **results,
+            "analyses": {game: without_raw_output(a) for game, a in results.get("analyses", {}).items()}
+        }})
         
         # Generate insights
         if learning_summary["cross_game_patterns"] > 0:
@@ -323,7 +504,8 @@ class CrossGameDiscoveryAgent:
         
         # Store patterns in database for future reference
         try:
-            self.store_patterns_in_database(results)
+            with span('store'):
+                self.store_patterns_in_database(results)
             learning_summary["insights"].append("Patterns stored in knowledge database")
         except Exception as e:
             print(f"   ⚠️ Database storage failed: {str(e)}")
@@ -341,10 +523,15 @@ class CrossGameDiscoveryAgent:
         conn = sqlite3.connect(self.db_path)
         try:
             cursor = conn.cursor()
+            stored = 0
             
             for game, analysis in results["analyses"].items():
                 if analysis["status"] == "success":
+                    stored_keys = set()  # One row per pattern and game, however often the output repeats it
                     for pattern in analysis["patterns_found"]:
+                        if (pattern["type"], pattern["value"]) in stored_keys:
+                            continue
+                        stored_keys.add((pattern["type"], pattern["value"]))
                         cursor.execute("""
                             INSERT INTO PatternGameMapping 
                             (pattern_text, pattern_type, game_concept, confidence_level, data_type, verification_status)
@@ -357,13 +544,29 @@ class CrossGameDiscoveryAgent:
                             "auto_discovered",
                             "agent_found"
                         ))
+                        stored += 1
             
             conn.commit()
+            count('rows_stored', stored)
             print("   ✅ Patterns stored in knowledge database")
             
         finally:
             conn.close()
     
+    def build_result_set(self, results: Dict) -> ResultSet:
+        """Typed pattern hits for every successfully analysed save"""
+        result_set = ResultSet()
+        for game, analysis in results.get("analyses", {}).items():
+            for save in analysis.get("saves", [analysis]):
+                if save["status"] != "success":
+                    continue
+                result_set.extend(
+                    PatternHit(save["save_path"], game, pattern["value"], pattern["type"],
+                               pattern_offset(pattern), pattern["confidence"])
+                    for pattern in save["patterns_found"]
+                )
+        return result_set
+    
     def run_autonomous_discovery(self) -> Dict:
         """Run complete autonomous cross-game discovery and analysis"""
         print("🚀 [CROSS-GAME AGENT] Starting autonomous discovery across all Witcher games...")
@@ -381,6 +584,14 @@ class CrossGameDiscoveryAgent:
         # Agent learning phase
         learning = self.learn_and_adapt(results)
         
+        if self.state_store:
+            self.state_store.snapshot(self.export_state())
+        
+        if self.results_path:
+            result_set = self.build_result_set(results)
+            result_set.save(self.results_path)
+            print(f"   📦 {len(result_set.hits)} pattern hits written to {self.results_path}")
+        
         # Generate final report
         print("\n" + "=" * 70)
         print("🎯 [CROSS-GAME AGENT] Autonomous discovery complete!")
@@ -407,9 +618,14 @@ if __name__ == "__main__":
     print("🌟 Testing Cross-Game Discovery Agent with Real Save Files")
     print("This agent will autonomously discover and analyze your Witcher saves!\n")
     
-    agent = CrossGameDiscoveryAgent()
-    final_results = agent.run_autonomous_discovery()
+    from profiling import profiling
+    
+    agent = CrossGameDiscoveryAgent(state_dir="database/agent_state",
+                                    results_path="database/cross_game_results.wres")
+    # --profile writes cProfile stats, collapsed stacks and an allocation report to profiles/
+    with profiling("cross_game_discovery", '--profile' in sys.argv):
+        final_results = agent.run_autonomous_discovery()
     
     print(f"\n📈 Final Agent Knowledge State:")
-    print(f"   Total discovery sessions: {len(agent.knowledge['analysis_results'])}")
+    print(f"   Total discovery sessions: {agent.knowledge['discovery_sessions']}")
     print(f"   Games in knowledge base: {len(agent.knowledge['games_discovered'])}")
@@ -0,0 +1,136 @@
+# Extraction Strategy - Adaptive Extraction Window Selection
+# UCB1 bandit over extraction sizes, bucketed by save size, that learns which
+# window yields the most patterns per millisecond of analysis
+
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_EXTRACTION_SIZES = (4096, 8192, 16384, 32768)
+
+# Upper bounds (bytes) of the save-size buckets; larger saves fall in the last bucket
+SAVE_SIZE_BUCKETS = (256 * 1024, 1024 * 1024, 4 * 1024 * 1024)
+
+class ArmStats:
+    """Running totals for one (save-size bucket, extraction size) arm"""
+
+    __slots__ = ('pulls', 'patterns', 'bytes_scanned', 'elapsed_ms')
+
+    def __init__(self, pulls: int = 0, patterns: int = 0, bytes_scanned: int = 0, elapsed_ms: float = 0.0):
+        self.pulls = pulls
+        self.patterns = patterns
+        self.bytes_scanned = bytes_scanned
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def patterns_per_ms(self) -> float:
+        return self.patterns / self.elapsed_ms if self.elapsed_ms > 0 else 0.0
+
+    @property
+    def patterns_per_kb(self) -> float:
+        return self.patterns * 1024 / self.bytes_scanned if self.bytes_scanned else 0.0
+
+    def to_state(self) -> List:
+        return [self.pulls, self.patterns, self.bytes_scanned, self.elapsed_ms]
+
+class ExtractionStrategy:
+    """Chooses extraction sizes by measured yield per unit of analysis time
+
+    Each save-size bucket runs its own UCB1 bandit whose arms are the
+    extraction sizes. An arm's value is its patterns-per-millisecond rate
+    normalised by the best rate seen in that bucket, so the exploration bonus
+    stays on a comparable scale whatever the absolute speed of the machine.
+    Untried arms are always played first. Safe to share between the task
+    queue's worker threads.
+    """
+
+    def __init__(self, extraction_sizes: Sequence[int] = DEFAULT_EXTRACTION_SIZES,
+                 exploration: float = 1.0):
+        self.extraction_sizes = tuple(extraction_sizes)
+        self.exploration = exploration
+        self._arms: Dict[Tuple[int, int], ArmStats] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def bucket_for(save_size: int) -> int:
+        """Index of the save-size bucket a save belongs to"""
+        for index, upper_bound in enumerate(SAVE_SIZE_BUCKETS):
+            if save_size < upper_bound:
+                return index
+        return len(SAVE_SIZE_BUCKETS)
+
+    def arm(self, save_size: int, extraction_size: int) -> ArmStats:
+        key = (self.bucket_for(save_size), extraction_size)
+        with self._lock:
+            stats = self._arms.get(key)
+            if stats is None:
+                stats = self._arms[key] = ArmStats()
+            return stats
+
+    def record(self, save_size: int, extraction_size: int, patterns_found: int, elapsed_ms: float):
+        """Account one analysis run; failed runs count with patterns_found=0"""
+        with self._lock:
+            stats = self.arm(save_size, extraction_size)
+            stats.pulls += 1
+            stats.patterns += patterns_found
+            stats.bytes_scanned += min(extraction_size, save_size) if save_size else extraction_size
+            stats.elapsed_ms += max(elapsed_ms, 0.0)
+
+    def ranked(self, save_size: int) -> List[int]:
+        """Extraction sizes ordered by UCB score for this save size, best first"""
+        with self._lock:
+            # Copy the totals so a concurrent record() can't skew the comparison
+            arms = [(size, ArmStats(*self.arm(save_size, size).to_state())) for size in self.extraction_sizes]
+        total_pulls = sum(stats.pulls for _, stats in arms)
+        best_rate = max((stats.patterns_per_ms for _, stats in arms), default=0.0)
+
+        def score(item):
+            size, stats = item
+            if stats.pulls == 0:
+                return (1, math.inf, -size)  # Explore untried windows, smallest first
+            value = stats.patterns_per_ms / best_rate if best_rate > 0 else 0.0
+            bonus = self.exploration * math.sqrt(2 * math.log(total_pulls) / stats.pulls)
+            return (0, value + bonus, -size)
+
+        return [size for size, _ in sorted(arms, key=score, reverse=True)]
+
+    def choose(self, save_size: int) -> int:
+        """Extraction size to try next for a save of this size"""
+        return self.ranked(save_size)[0]
+
+    def best(self, save_size: int) -> Optional[int]:
+        """Best measured size (pure exploitation), or None before any yield"""
+        with self._lock:
+            arms = [(self.arm(save_size, size).patterns_per_ms, size) for size in self.extraction_sizes]
+        rate, size = max(arms)
+        return size if rate > 0 else None
+
+    def stats(self, save_size: int) -> Dict[int, Dict]:
+        """Per extraction size measurements for the bucket of save_size"""
+        summary = {}
+        with self._lock:
+            for size in self.extraction_sizes:
+                stats = self.arm(save_size, size)
+                summary[size] = {
+                    'pulls': stats.pulls,
+                    'patterns_per_kb': stats.patterns_per_kb,
+                    'patterns_per_ms': stats.patterns_per_ms
+                }
+        return summary
+
+    def to_state(self) -> Dict:
+        """JSON-friendly form for agent snapshots"""
+        with self._lock:
+            arms = [[bucket, size] + stats.to_state() for (bucket, size), stats in self._arms.items() if stats.pulls]
+        return {
+            'extraction_sizes': list(self.extraction_sizes),
+            'exploration': self.exploration,
+            'arms': arms
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "ExtractionStrategy":
+        strategy = cls(state['extraction_sizes'], state['exploration'])
+        for bucket, size, *totals in state.get('arms', []):
+            strategy._arms[(bucket, size)] = ArmStats(*totals)
+        return strategy
@@ -0,0 +1,220 @@
+# Save Watcher - Event-Driven Save Discovery
+# Watches save folders and hands agents only new or changed saves, once the game
+# has finished writing them. Uses inotify on Linux and falls back to polling
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# inotify flags (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+class InotifyBackend:
+    """Minimal ctypes inotify binding - blocks in select(), so idle costs no CPU"""
+
+    def __init__(self, directories: List[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.watches = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, str(directory).encode(), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self.watches[wd] = directory
+
+    def wait(self, timeout: float) -> List[Path]:
+        """Paths touched within timeout seconds (empty list on timeout)"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            wd, _, _, name_length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b'\0').decode(errors='ignore')
+            offset += name_length
+            if name and wd in self.watches:
+                paths.append(self.watches[wd] / name)
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingBackend:
+    """Portable fallback: compares (mtime, size) snapshots every poll_interval"""
+
+    def __init__(self, directories: List[Path], patterns: Tuple[str, ...], poll_interval: float):
+        self.directories = directories
+        self.patterns = patterns
+        self.poll_interval = poll_interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for directory in self.directories:
+            for pattern in self.patterns:
+                for path in directory.glob(pattern):
+                    signature = file_signature(path)
+                    if signature is not None:
+                        snapshot[path] = signature
+        return snapshot
+
+    def wait(self, timeout: float) -> List[Path]:
+        time.sleep(min(timeout, self.poll_interval))
+        current = self._scan()
+        changed = [path for path, signature in current.items() if self.snapshot.get(path) != signature]
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a regular file, or None if it is gone"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size) if path.is_file() else None
+
+class SaveWatcher:
+    """Debounced, event-driven queue of saves that are ready for analysis
+
+    A save is queued once its (mtime, size) has been stable for settle_seconds
+    after the last filesystem event, so half-written saves are never analysed,
+    and only when that signature differs from the last one queued.
+    """
+
+    def __init__(self, directories: Iterable[str], patterns: Iterable[str] = ("*.sav",),
+                 settle_seconds: float = 0.4, poll_interval: float = 1.0,
+                 use_inotify: Optional[bool] = None, include_existing: bool = False):
+        self.directories = [Path(d) for d in directories if Path(d).is_dir()]
+        self.patterns = tuple(patterns)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = sys.platform.startswith('linux') if use_inotify is None else use_inotify
+        self.include_existing = include_existing
+
+        self.ready = queue.Queue()
+        self.backend_name = None
+        self._queued_signatures: Dict[Path, Tuple[int, int]] = {}
+        self._pending: Dict[Path, Tuple[float, Optional[Tuple[int, int]]]] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._backend = None
+
+    def matches(self, path: Path) -> bool:
+        return any(fnmatch.fnmatch(path.name, pattern) for pattern in self.patterns)
+
+    def start(self):
+        """Start watching in a background thread"""
+        if self._thread is not None:
+            return self
+
+        self._backend = self._create_backend()
+        for directory in self.directories:
+            for pattern in self.patterns:
+                for path in directory.glob(pattern):
+                    if self.include_existing:
+                        self._pending[path] = (0.0, None)
+                    else:
+                        signature = file_signature(path)
+                        if signature is not None:
+                            self._queued_signatures[path] = signature
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name="SaveWatcher", daemon=True)
+        self._thread.start()
+        print(f"👀 [WATCHER] Watching {len(self.directories)} folder(s) via {self.backend_name}")
+        return self
+
+    def _create_backend(self):
+        if self.use_inotify:
+            try:
+                backend = InotifyBackend(self.directories)
+                self.backend_name = "inotify"
+                return backend
+            except (OSError, AttributeError) as e:
+                print(f"⚠️ [WATCHER] inotify unavailable ({e}) - falling back to polling")
+
+        self.backend_name = "polling"
+        return PollingBackend(self.directories, self.patterns, self.poll_interval)
+
+    def _watch_loop(self):
+        while not self._stop.is_set():
+            # Only wake early enough to settle pending saves; otherwise block on events
+            timeout = self.settle_seconds if self._pending else self.poll_interval
+            touched = self._backend.wait(timeout)
+            now = time.monotonic()
+            for path in touched:
+                if self.matches(path):
+                    self._pending[path] = (now, file_signature(path))
+            self._settle_pending()
+
+    def _settle_pending(self):
+        """Queue pending saves whose signature stayed put for settle_seconds"""
+        now = time.monotonic()
+        for path, (last_event, last_signature) in list(self._pending.items()):
+            if now - last_event < self.settle_seconds:
+                continue
+
+            signature = file_signature(path)
+            if signature is None:
+                del self._pending[path]  # Deleted or renamed away
+            elif signature != last_signature:
+                self._pending[path] = (now, signature)  # Still being written - wait again
+            else:
+                del self._pending[path]
+                if self._queued_signatures.get(path) != signature:
+                    self._queued_signatures[path] = signature
+                    self.ready.put(str(path))
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next ready save path, or None if none arrives within timeout"""
+        try:
+            return self.ready.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
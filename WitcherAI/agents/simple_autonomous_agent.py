@@ -4,20 +4,74 @@
 import subprocess
 import json
 import sqlite3
+import sys
 from pathlib import Path
 import time
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agents.agent_knowledge import OutcomeLedger, PatternRegistry
+from agents.agent_state_store import AgentStateStore
+from agents.save_watcher import SaveWatcher
+from instrumentation import span
+from ml.pattern_feature_store import PatternFeatureStore
+
 class SimpleWitcherAgent:
     """Minimal autonomous agent to prove the agentic concept"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, state_dir: str = None, ingest_features: bool = True):
         self.db_path = db_path
-        self.knowledge = {"patterns_seen": [], "successful_strategies": [], "failures": []}
+        # Every analysed save also feeds the confidence engine's corpus features
+        self.feature_store = PatternFeatureStore(db_path) if ingest_features and Path(db_path).exists() else None
+        self.knowledge = {
+            "patterns_seen": PatternRegistry(max_patterns=50000),
+            "successful_strategies": OutcomeLedger(max_keys=100, max_records_per_key=50),  # by strategy name
+            "failures": OutcomeLedger(max_keys=10000)  # by save path
+        }
         self.current_goal = "discover_new_patterns"
+        self.save_dir = Path("savesAnalysis/_backup")
+        
+        # Durable knowledge: restarts resume from the last snapshot plus the log tail
+        self.state_store = AgentStateStore(state_dir, "simple_witcher_agent") if state_dir else None
+        if self.state_store:
+            self.restore_state()
+    
+    def apply_event(self, event):
+        """Apply one knowledge event (live or replayed from the state log)"""
+        if event["kind"] == "pattern_seen":
+            self.knowledge["patterns_seen"].add(event["pattern"])
+        elif event["kind"] == "strategy_success":
+            self.knowledge["successful_strategies"].record(event["key"], event["outcome"])
+        elif event["kind"] == "failure":
+            self.knowledge["failures"].record(event["key"], event["outcome"])
+    
+    def remember(self, event):
+        """Apply an event and append it to the durable log, snapshotting when due"""
+        self.apply_event(event)
+        if self.state_store and self.state_store.append(event):
+            self.state_store.snapshot(self.export_state())
+    
+    def export_state(self):
+        return {name: structure.to_state() for name, structure in self.knowledge.items()}
+    
+    def restore_state(self):
+        """Load the last snapshot and replay the events logged after it"""
+        state, events = self.state_store.load()
+        if state:
+            self.knowledge = {
+                "patterns_seen": PatternRegistry.from_state(state["patterns_seen"]),
+                "successful_strategies": OutcomeLedger.from_state(state["successful_strategies"]),
+                "failures": OutcomeLedger.from_state(state["failures"])
+            }
+        for event in events:
+            self.apply_event(event)
+        
+        if state or events:
+            print(f"[AGENT] Restored knowledge: {len(self.knowledge['patterns_seen'])} patterns, "
+                  f"{len(events)} events replayed")
         
     def perceive_environment(self):
         """Agent perceives what save files are available"""
-        save_dir = Path("savesAnalysis/_backup")
+        save_dir = self.save_dir
         
         if not save_dir.exists():
             print("[AGENT] No save directory found - creating test environment")
@@ -28,7 +82,7 @@ class SimpleWitcherAgent:
         # Agent reasons about optimal save selection
         if saves:
             # Prefer saves we haven't analyzed yet
-            unanalyzed = [s for s in saves if str(s) not in [f["save_path"] for f in self.knowledge["failures"]]]
+            unanalyzed = [s for s in saves if not self.knowledge["failures"].has(str(s))]
             target_save = unanalyzed[0] if unanalyzed else saves[0]
             
             print(f"[AGENT] Perceiving environment: {len(saves)} saves available")
@@ -50,7 +104,7 @@ class SimpleWitcherAgent:
         # Agent learns from previous attempts
         if len(self.knowledge["successful_strategies"]) > 0:
             # Use most successful strategy
-            best_strategy = max(self.knowledge["successful_strategies"], 
+            best_strategy = max(self.knowledge["successful_strategies"].records(), 
                               key=lambda x: x["success_score"])
             print(f"[AGENT] Using learned successful strategy: {best_strategy['strategy_name']}")
             return {
@@ -89,7 +143,8 @@ class SimpleWitcherAgent:
                 "-bytes-to-extract", str(bytes_to_extract)
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd=".")
+            with span('extract'):
+                result = subprocess.run(cmd, capture_output=True, text=True, cwd=".")
             
             if result.returncode == 0:
                 # Parse the results to extract discoveries
@@ -105,6 +160,7 @@ class SimpleWitcherAgent:
                 }
                 
                 print(f"[AGENT] SUCCESS! Found {len(decisions_found)} decision patterns")
+                self.ingest_save_features(target_save)
                 return success_result
             else:
                 error_result = {
@@ -120,6 +176,16 @@ class SimpleWitcherAgent:
             print(f"[AGENT] EXCEPTION: {str(e)}")
             return {"status": "exception", "error": str(e)}
     
+    def ingest_save_features(self, save_path):
+        """Record the save's pattern statistics in the feature store the confidence engine reads"""
+        if self.feature_store is None:
+            return
+        try:
+            with span('ingest'):
+                self.feature_store.ingest_save(save_path, "witcher2")  # The decision hunter is Witcher 2 only
+        except Exception as e:
+            print(f"[AGENT] Feature ingestion failed: {str(e)}")
+    
     def parse_decision_output(self, output):
         """Extract decision discoveries from tool output"""
         decisions = []
@@ -153,12 +219,12 @@ class SimpleWitcherAgent:
                 "timestamp": time.time()
             }
             
-            self.knowledge["successful_strategies"].append(strategy_record)
+            self.remember({"kind": "strategy_success", "key": strategy_record["strategy_name"], "outcome": strategy_record})
             
             # Store discovered patterns
             for decision_pattern in results["decisions_found"]:
                 if decision_pattern not in self.knowledge["patterns_seen"]:
-                    self.knowledge["patterns_seen"].append(decision_pattern)
+                    self.remember({"kind": "pattern_seen", "pattern": decision_pattern})
             
             print(f"[AGENT] LEARNED: Strategy '{decision.get('strategy_name')}' successful with score {strategy_record['success_score']}")
             
@@ -171,7 +237,7 @@ class SimpleWitcherAgent:
                 "timestamp": time.time()
             }
             
-            self.knowledge["failures"].append(failure_record)
+            self.remember({"kind": "failure", "key": failure_record["save_path"], "outcome": failure_record})
             print(f"[AGENT] LEARNED: Strategy '{decision.get('strategy_name')}' failed - will avoid")
     
     def run_autonomous_cycle(self, max_iterations=3):
@@ -189,7 +255,9 @@ class SimpleWitcherAgent:
             
             # Agent reflects on progress
             total_patterns = len(self.knowledge["patterns_seen"])
-            success_rate = len(self.knowledge["successful_strategies"]) / (len(self.knowledge["successful_strategies"]) + len(self.knowledge["failures"])) if (len(self.knowledge["successful_strategies"]) + len(self.knowledge["failures"])) > 0 else 0
+            successes = self.knowledge["successful_strategies"].total_recorded
+            failures = self.knowledge["failures"].total_recorded
+            success_rate = successes / (successes + failures) if (successes + failures) > 0 else 0
             
             print(f"[AGENT] Progress: {total_patterns} patterns discovered, {success_rate:.2%} success rate")
             
@@ -201,16 +269,58 @@ class SimpleWitcherAgent:
         
         print(f"\n🎯 [AGENT] Autonomous cycle complete!")
         print(f"   Total patterns discovered: {len(self.knowledge['patterns_seen'])}")
-        print(f"   Successful strategies: {len(self.knowledge['successful_strategies'])}")
-        print(f"   Failed attempts: {len(self.knowledge['failures'])}")
+        print(f"   Successful strategies: {self.knowledge['successful_strategies'].total_recorded}")
+        print(f"   Failed attempts: {self.knowledge['failures'].total_recorded}")
+        
+        if self.state_store:
+            self.state_store.snapshot(self.export_state())
+        
+        return self.knowledge
+
+    def run_watch_mode(self, max_saves=None, timeout=None):
+        """Agent analyses each new or changed save as soon as the game finishes writing it
+        
+        Event-driven alternative to run_autonomous_cycle: no re-globbing and no
+        sleeping between iterations - the agent blocks until the watcher hands
+        it a settled save.
+        """
+        print("👀 [AGENT] Starting event-driven watch mode...")
+        
+        if not self.save_dir.exists():
+            print("[AGENT] No save directory found - nothing to watch")
+            return self.knowledge
+        
+        analysed = 0
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        with SaveWatcher([self.save_dir], patterns=["*.sav"]) as watcher:
+            while max_saves is None or analysed < max_saves:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                
+                target_save = watcher.get(timeout=remaining)
+                if target_save is None:
+                    break
+                
+                print(f"\n[AGENT] New save detected: {Path(target_save).name}")
+                perception = {"available_saves": [Path(target_save)], "target_save": target_save, "status": "ready"}
+                decision = self.decide_strategy(perception)
+                results = self.execute_analysis(decision)
+                self.learn_from_results(decision, results)
+                analysed += 1
+        
+        print(f"\n🎯 [AGENT] Watch mode finished after {analysed} saves")
         
+        if self.state_store:
+            self.state_store.snapshot(self.export_state())
         return self.knowledge
 
 # Test the autonomous agent
 if __name__ == "__main__":
     print("🚀 Testing Simple Autonomous Witcher Analysis Agent")
     
-    agent = SimpleWitcherAgent("database/witcher_save_manager.db")
+    agent = SimpleWitcherAgent("database/witcher_save_manager.db", state_dir="database/agent_state")
     results = agent.run_autonomous_cycle(max_iterations=2)
     
     print("\n📊 Agent Learning Summary:")
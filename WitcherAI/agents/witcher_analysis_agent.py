@@ -1,12 +1,26 @@
 # Witcher Save Analysis Agent
 # Autonomous AI agent for intelligent save file analysis across all Witcher games
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
 from enum import Enum
+from pathlib import Path
+import heapq
 import sqlite3
 import json
 import logging
+import sys
+import threading
+import time
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agents.agent_knowledge import OutcomeLedger, PatternRegistry
+from agents.agent_state_store import AgentStateStore
+from agents.extraction_strategy import ExtractionStrategy
+from agents.save_watcher import SaveWatcher
+from instrumentation import span
+from ml.pattern_feature_store import PatternFeatureStore
 
 class AgentState(Enum):
     INITIALIZING = "initializing"
@@ -25,13 +39,100 @@ class AnalysisGoal(Enum):
 
 @dataclass
 class AgentMemory:
-    """Agent's working memory for analysis context"""
+    """Agent's working memory for analysis context
+    
+    Patterns and outcomes live in hashed, bounded structures keyed by pattern
+    identity and save path, so lookups stay O(1) as history grows.
+    """
     current_game: str
-    discovered_patterns: List[Dict]
-    confidence_scores: Dict[str, float]
-    failed_attempts: List[Dict]
-    successful_strategies: List[Dict]
-    cross_game_knowledge: Dict[str, List]
+    discovered_patterns: PatternRegistry = field(default_factory=lambda: PatternRegistry(max_patterns=50000))
+    confidence_scores: Dict[str, float] = field(default_factory=dict)
+    failed_attempts: OutcomeLedger = field(default_factory=OutcomeLedger)  # by save path
+    successful_strategies: OutcomeLedger = field(default_factory=OutcomeLedger)  # by save path
+    cross_game_knowledge: Dict[str, List] = field(default_factory=dict)
+    extraction_strategy: ExtractionStrategy = field(default_factory=ExtractionStrategy)
+    journal: Optional[Callable[[Dict], None]] = field(default=None, repr=False, compare=False)
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
+    
+    def apply_event(self, event: Dict) -> bool:
+        """Apply one memory event (live or replayed); False if it changed nothing"""
+        if event['kind'] == 'pattern':
+            return self.discovered_patterns.add(event['pattern'])
+        if event['kind'] == 'failure':
+            self.failed_attempts.record(event['key'], event['outcome'])
+        elif event['kind'] == 'success':
+            self.successful_strategies.record(event['key'], event['outcome'])
+        elif event['kind'] == 'confidence':
+            self.confidence_scores[event['key']] = event['score']
+        elif event['kind'] == 'extraction':
+            self.extraction_strategy.record(event['save_size'], event['extraction_size'],
+                                            event['patterns_found'], event['elapsed_ms'])
+        return True
+    
+    def _remember(self, event: Dict) -> bool:
+        # Worker threads record concurrently; apply + journal must stay in order
+        with self.lock:
+            changed = self.apply_event(event)
+            if changed and self.journal:
+                self.journal(event)
+            return changed
+    
+    def record_pattern(self, pattern: Dict) -> bool:
+        """Remember a discovered pattern; True if it is new"""
+        return self._remember({'kind': 'pattern', 'pattern': pattern})
+    
+    def knows_pattern(self, pattern: Dict) -> bool:
+        return pattern in self.discovered_patterns
+    
+    def record_confidence(self, pattern_name: str, score: float):
+        self._remember({'kind': 'confidence', 'key': pattern_name, 'score': score})
+    
+    def record_extraction(self, save_size: int, extraction_size: int, patterns_found: int, elapsed_ms: float):
+        """Feed one extraction run's yield and cost to the extraction strategy"""
+        self._remember({
+            'kind': 'extraction',
+            'save_size': save_size,
+            'extraction_size': extraction_size,
+            'patterns_found': patterns_found,
+            'elapsed_ms': elapsed_ms
+        })
+    
+    def record_failure(self, save_path: str, outcome: Dict):
+        self._remember({'kind': 'failure', 'key': save_path, 'outcome': outcome})
+    
+    def has_failed(self, save_path: str) -> bool:
+        return self.failed_attempts.has(save_path)
+    
+    def record_success(self, save_path: str, outcome: Dict):
+        self._remember({'kind': 'success', 'key': save_path, 'outcome': outcome})
+    
+    def has_succeeded(self, save_path: str) -> bool:
+        return self.successful_strategies.has(save_path)
+    
+    def to_state(self) -> Dict:
+        """JSON-friendly snapshot of the whole memory"""
+        return {
+            'current_game': self.current_game,
+            'discovered_patterns': self.discovered_patterns.to_state(),
+            'confidence_scores': self.confidence_scores,
+            'failed_attempts': self.failed_attempts.to_state(),
+            'successful_strategies': self.successful_strategies.to_state(),
+            'cross_game_knowledge': self.cross_game_knowledge,
+            'extraction_strategy': self.extraction_strategy.to_state()
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> "AgentMemory":
+        return cls(
+            current_game=state['current_game'],
+            discovered_patterns=PatternRegistry.from_state(state['discovered_patterns']),
+            confidence_scores=state['confidence_scores'],
+            failed_attempts=OutcomeLedger.from_state(state['failed_attempts']),
+            successful_strategies=OutcomeLedger.from_state(state['successful_strategies']),
+            cross_game_knowledge=state['cross_game_knowledge'],
+            extraction_strategy=ExtractionStrategy.from_state(state['extraction_strategy'])
+            if 'extraction_strategy' in state else ExtractionStrategy()
+        )
 
 @dataclass
 class AnalysisTask:
@@ -42,24 +143,122 @@ class AnalysisTask:
     priority: int
     context: Dict
     
+    @property
+    def key(self) -> Tuple[str, str]:
+        """Identity used for de-duplication: one task per goal and save"""
+        return (self.goal.value, self.save_file_path)
+    
+    def to_state(self) -> Dict:
+        return {**asdict(self), 'goal': self.goal.value}
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> "AnalysisTask":
+        return cls(**{**state, 'goal': AnalysisGoal(state['goal'])})
+
+class TaskQueue:
+    """Thread-safe priority queue of analysis tasks, de-duplicated by (goal, save)
+    
+    Re-planning a task that is already queued keeps a single entry at the
+    higher priority; re-planning one that is running is ignored until the
+    worker marks it done. Superseded heap entries are skipped lazily on pop.
+    """
+    
+    def __init__(self):
+        self._heap: List[Tuple[int, int, Tuple[str, str]]] = []
+        self._queued: Dict[Tuple[str, str], Tuple[int, AnalysisTask]] = {}
+        self._running = set()
+        self._sequence = 0
+        self._lock = threading.Lock()
+    
+    def push(self, task: AnalysisTask) -> bool:
+        """Queue a task; False if an equal or better copy is queued or running"""
+        with self._lock:
+            key = task.key
+            if key in self._running:
+                return False
+            queued = self._queued.get(key)
+            if queued and queued[1].priority >= task.priority:
+                return False
+            
+            self._sequence += 1
+            self._queued[key] = (self._sequence, task)
+            heapq.heappush(self._heap, (-task.priority, self._sequence, key))
+            return True
+    
+    def pop(self) -> Optional[AnalysisTask]:
+        """Highest priority task (FIFO among equals), now marked running"""
+        with self._lock:
+            while self._heap:
+                _, sequence, key = heapq.heappop(self._heap)
+                queued = self._queued.get(key)
+                if queued and queued[0] == sequence:
+                    del self._queued[key]
+                    self._running.add(key)
+                    return queued[1]
+            return None
+    
+    def done(self, task: AnalysisTask):
+        with self._lock:
+            self._running.discard(task.key)
+    
+    def __len__(self) -> int:
+        return len(self._queued)
+    
+    def to_state(self) -> List[Dict]:
+        """Queued (not running) tasks, highest priority first"""
+        with self._lock:
+            return [task.to_state() for _, task in sorted(self._queued.values(),
+                                                          key=lambda item: (-item[1].priority, item[0]))]
+    
+    @classmethod
+    def from_state(cls, state: List[Dict]) -> "TaskQueue":
+        queue = cls()
+        for task_state in state:
+            queue.push(AnalysisTask.from_state(task_state))
+        return queue
+
 class WitcherAnalysisAgent:
     """Autonomous AI agent for Witcher save file analysis"""
     
-    def __init__(self, db_path: str, game_context: str):
+    def __init__(self, db_path: str, game_context: str, state_dir: Optional[str] = None,
+                 max_workers: int = 4, ingest_features: bool = True):
         self.db_path = db_path
         self.game_context = game_context
         self.state = AgentState.INITIALIZING
-        self.memory = AgentMemory(
-            current_game=game_context,
-            discovered_patterns=[],
-            confidence_scores={},
-            failed_attempts=[],
-            successful_strategies=[],
-            cross_game_knowledge={}
-        )
-        self.task_queue = []
+        self.memory = AgentMemory(current_game=game_context)
+        self.task_queue = TaskQueue()
+        self.max_workers = max_workers
         self.logger = logging.getLogger(f"WitcherAgent_{game_context}")
         
+        # Every analysed save also feeds the confidence engine's corpus features
+        self.feature_store = PatternFeatureStore(db_path) if ingest_features and Path(db_path).exists() else None
+        
+        # Durable memory: restarts resume from the last snapshot plus the log tail
+        self.state_store = AgentStateStore(state_dir, f"witcher_analysis_agent_{game_context}") if state_dir else None
+        if self.state_store:
+            self.restore_memory()
+            self.memory.journal = self.journal_memory_event
+    
+    def restore_memory(self):
+        """Load the last memory snapshot and replay the events logged after it"""
+        state, events = self.state_store.load()
+        if state:
+            self.memory = AgentMemory.from_state(state)
+            self.task_queue = TaskQueue.from_state(state.get('task_queue', []))
+        for event in events:
+            self.memory.apply_event(event)
+        self.logger.info(f"Restored memory: {len(self.memory.discovered_patterns)} patterns, {len(events)} events replayed")
+    
+    def journal_memory_event(self, event: Dict):
+        """Durably log a memory event, compacting into a snapshot when due"""
+        if self.state_store.append(event):
+            self.state_store.snapshot(self.export_state())
+    
+    def export_state(self) -> Dict:
+        """Snapshot state: memory plus the tasks still waiting in the queue"""
+        with self.memory.lock:
+            return {**self.memory.to_state(), 'task_queue': self.task_queue.to_state()}
+        
     def perceive_environment(self) -> Dict:
         """Analyze current context and available resources"""
         perception = {
@@ -125,7 +324,7 @@ class WitcherAnalysisAgent:
             candidates = saves  # Fallback to any save
         
         # Choose save we haven't analyzed recently
-        unanalyzed = [s for s in candidates if s['path'] not in [a['save_path'] for a in self.memory.failed_attempts]]
+        unanalyzed = [s for s in candidates if not self.memory.has_failed(s['path'])]
         
         return unanalyzed[0]['path'] if unanalyzed else candidates[0]['path']
     
@@ -134,47 +333,75 @@ class WitcherAnalysisAgent:
         self.state = AgentState.EXECUTING
         self.logger.info(f"Executing {task.goal.value} on {task.save_file_path}")
         
-        if task.goal == AnalysisGoal.DISCOVER_PATTERNS:
-            return self.autonomous_pattern_discovery(task)
-        elif task.goal == AnalysisGoal.HUNT_DECISIONS:
-            return self.autonomous_decision_hunting(task)
-        elif task.goal == AnalysisGoal.CROSS_GAME_TRANSFER:
-            return self.autonomous_transfer_learning(task)
+        with span(task.goal.value):
+            if task.goal == AnalysisGoal.DISCOVER_PATTERNS:
+                results = self.autonomous_pattern_discovery(task)
+            elif task.goal == AnalysisGoal.HUNT_DECISIONS:
+                results = self.autonomous_decision_hunting(task)
+            elif task.goal == AnalysisGoal.CROSS_GAME_TRANSFER:
+                results = self.autonomous_transfer_learning(task)
+            else:
+                return {"status": "unknown_goal", "task": task}
         
-        return {"status": "unknown_goal", "task": task}
+        self.ingest_save_features(task.save_file_path)
+        return results
+    
+    def ingest_save_features(self, save_path: str):
+        """Record the save's pattern statistics in the feature store the confidence engine reads"""
+        if self.feature_store is None or not save_path:
+            return
+        try:
+            with span('ingest'):
+                self.feature_store.ingest_save(save_path, self.game_context)
+        except Exception as e:
+            self.logger.warning(f"Feature ingestion failed for {save_path}: {e}")
     
     def autonomous_pattern_discovery(self, task: AnalysisTask) -> Dict:
         """Agent independently discovers patterns with adaptive extraction"""
         results = {"patterns_found": [], "confidence_scores": {}, "insights": []}
         
-        # Agent decides extraction strategy based on previous success
-        extraction_sizes = [4096, 8192, 16384, 32768]
-        successful_size = self.get_most_successful_extraction_size()
-        
-        if successful_size:
-            extraction_sizes = [successful_size] + [s for s in extraction_sizes if s != successful_size]
+        # Agent picks extraction windows by measured yield per millisecond (UCB bandit)
+        save_size = self.get_save_size(task.save_file_path)
+        extraction_sizes = self.memory.extraction_strategy.ranked(save_size)
         
         for size in extraction_sizes[:2]:  # Try top 2 strategies
+            started = time.perf_counter()
+            patterns = None
             try:
                 # Execute enhanced DZIP analysis
                 patterns = self.call_enhanced_dzip_analysis(task.save_file_path, size)
-                
-                if patterns and len(patterns) > len(results["patterns_found"]):
-                    results["patterns_found"] = patterns
-                    results["extraction_size_used"] = size
-                    break  # Success - agent stops trying other sizes
                     
             except Exception as e:
-                self.memory.failed_attempts.append({
+                self.memory.record_failure(task.save_file_path, {
                     "task": task,
                     "error": str(e),
                     "extraction_size": size
                 })
+            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.memory.record_extraction(save_size, size, len(patterns or []), elapsed_ms)
+            
+            if patterns and len(patterns) > len(results["patterns_found"]):
+                results["patterns_found"] = patterns
+                results["extraction_size_used"] = size
+                break  # Success - agent stops trying other sizes
         
         # Agent learns from results
         self.update_strategy_memory(task, results)
         return results
     
+    @staticmethod
+    def get_save_size(save_path: str) -> int:
+        try:
+            return Path(save_path).stat().st_size
+        except OSError:
+            return 0
+    
+    def get_most_successful_extraction_size(self, save_path: Optional[str] = None) -> Optional[int]:
+        """Extraction size with the best measured patterns-per-ms for this save's size bucket"""
+        save_size = self.get_save_size(save_path) if save_path else 0
+        return self.memory.extraction_strategy.best(save_size)
+    
     def autonomous_decision_hunting(self, task: AnalysisTask) -> Dict:
         """Agent autonomously hunts for decision variables with learned strategies"""
         # Agent applies learned patterns from previous successful hunts
@@ -188,7 +415,7 @@ class WitcherAnalysisAgent:
         
         # Agent evaluates success and adapts
         if results['decisions_found'] > 0:
-            self.memory.successful_strategies.append({
+            self.memory.record_success(task.save_file_path, {
                 "context": task.context,
                 "strategy": hunting_strategy,
                 "success_count": results['decisions_found']
@@ -223,29 +450,33 @@ class WitcherAnalysisAgent:
             iteration += 1
             self.state = AgentState.PLANNING
             
-            # Agent perceives and reasons autonomously
+            # Agent perceives and reasons autonomously; the whole plan is queued
             perception = self.perceive_environment()
-            tasks = self.reason_about_goals(perception)
+            for task in self.reason_about_goals(perception):
+                self.task_queue.push(task)
             
-            if not tasks:
+            if not len(self.task_queue):
                 self.logger.info("Agent determined no more tasks needed")
                 break
             
-            # Execute highest priority task
-            primary_task = tasks[0]
-            results = self.execute_analysis_task(primary_task)
+            # Drain the queued plan with the worker pool
+            task_results = self.drain_task_queue()
             
             # Agent learns and adapts
-            learning = self.reflect_and_learn([results])
-            total_discoveries += len(results.get('patterns_found', []))
+            learning = self.reflect_and_learn(task_results)
+            iteration_discoveries = sum(len(r.get('patterns_found', [])) for r in task_results)
+            total_discoveries += iteration_discoveries
             
-            self.logger.info(f"Iteration {iteration}: {len(results.get('patterns_found', []))} new patterns discovered")
+            self.logger.info(f"Iteration {iteration}: {len(task_results)} tasks, {iteration_discoveries} new patterns discovered")
             
             # Agent decides if enough progress has been made
             if learning['pattern_success_rate'] < 0.1 and iteration > 3:
                 self.logger.info("Agent determined diminishing returns - stopping early")
                 break
         
+        if self.state_store:
+            self.state_store.snapshot(self.export_state())
+        
         return {
             "iterations_completed": iteration,
             "total_patterns_discovered": total_discoveries,
@@ -253,21 +484,95 @@ class WitcherAnalysisAgent:
             "agent_recommendations": self.generate_recommendations()
         }
 
+    def drain_task_queue(self) -> List[Dict]:
+        """Run every queued task on a bounded worker pool and collect the results
+        
+        Workers write to memory through AgentMemory's lock; tasks planned while
+        the pool is busy are de-duplicated against the ones still running.
+        """
+        task_results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="WitcherAgentWorker") as pool:
+            running = {}
+            while len(self.task_queue) or running:
+                # Keep at most max_workers tasks in flight so priorities still matter
+                while len(running) < self.max_workers:
+                    task = self.task_queue.pop()
+                    if task is None:
+                        break
+                    running[pool.submit(self.execute_analysis_task, task)] = task
+                
+                future = next(as_completed(running))
+                task = running.pop(future)
+                self.task_queue.done(task)
+                try:
+                    task_results.append(future.result())
+                except Exception as e:
+                    self.logger.warning(f"Task {task.goal.value} on {task.save_file_path} failed: {e}")
+                    self.memory.record_failure(task.save_file_path, {"goal": task.goal.value, "error": str(e)})
+        
+        return task_results
+    
+    def run_event_driven_analysis(self, save_directories: List[str], max_saves: Optional[int] = None,
+                                  timeout: Optional[float] = None) -> Dict:
+        """Analyse saves as the game writes them instead of re-perceiving every cycle
+        
+        Each settled new or changed save becomes a DISCOVER_PATTERNS task; the
+        agent blocks on the watcher between saves, so it costs nothing while idle.
+        """
+        self.logger.info("Starting event-driven analysis")
+        analysed = 0
+        total_discoveries = 0
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        with SaveWatcher(save_directories) as watcher:
+            while max_saves is None or analysed < max_saves:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                
+                save_path = watcher.get(timeout=remaining)
+                if save_path is None:
+                    break
+                
+                task = AnalysisTask(
+                    goal=AnalysisGoal.DISCOVER_PATTERNS,
+                    save_file_path=save_path,
+                    expected_patterns=[],
+                    priority=10,
+                    context={'strategy': 'broad_scan', 'trigger': 'save_written'}
+                )
+                results = self.execute_analysis_task(task)
+                self.reflect_and_learn([results])
+                
+                analysed += 1
+                total_discoveries += len(results.get('patterns_found', []))
+                self.logger.info(f"Analysed {save_path}: {len(results.get('patterns_found', []))} patterns")
+        
+        return {
+            "saves_analysed": analysed,
+            "total_patterns_discovered": total_discoveries,
+            "final_knowledge_state": self.memory
+        }
+
 # Integration with existing WitcherCI framework
-def create_witcher_analysis_agent(game: str) -> WitcherAnalysisAgent:
+def create_witcher_analysis_agent(game: str, state_dir: Optional[str] = "database/agent_state") -> WitcherAnalysisAgent:
     """Factory function to create game-specific analysis agents"""
     return WitcherAnalysisAgent(
         db_path="database/witcher_save_manager.db",
-        game_context=game
+        game_context=game,
+        state_dir=state_dir
     )
 
 # Example autonomous operation
 if __name__ == "__main__":
+    from profiling import profiling
+    
     # Create autonomous agent for Witcher 2
     agent = create_witcher_analysis_agent("witcher2")
     
-    # Agent runs completely autonomously
-    results = agent.run_autonomous_analysis_cycle(max_iterations=5)
+    # Agent runs completely autonomously (--profile writes profiling reports to profiles/)
+    with profiling("analysis_cycle", '--profile' in sys.argv):
+        results = agent.run_autonomous_analysis_cycle(max_iterations=5)
     
     print(f"Agent discovered {results['total_patterns_discovered']} patterns autonomously")
     print(f"Recommendations: {results['agent_recommendations']}")
@@ -0,0 +1,279 @@
+# Benchmark History
+# Records repeated benchmark trials with environment metadata in SQLite and
+# flags per-stage regressions against a baseline run (median and IQR based)
+
+import argparse
+import json
+import statistics
+import subprocess
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from benchmarks.benchmark_suite import STAGES, BenchmarkSuite
+from benchmarks.synthetic_corpus import CorpusSpec, generate_corpus
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+def run_trials(corpus_dir: str, trials: int = 5, warmup: int = 1, stages: Optional[List[str]] = None) -> List[Dict]:
+    """Run the suite warmup + trials times, each on a fresh scratch DB; warmup runs are discarded"""
+    reports = []
+    for trial in range(warmup + trials):
+        with tempfile.TemporaryDirectory(prefix="witcherai_bench_") as work_dir:
+            report = BenchmarkSuite(corpus_dir, work_dir).run(stages)
+        if trial >= warmup:
+            reports.append(report)
+    return reports
+
+def summarize(values: List[float]) -> Dict:
+    """Median and interquartile range - robust to the odd slow trial"""
+    if len(values) < 2:
+        return {'median': values[0], 'q1': values[0], 'q3': values[0], 'iqr': 0.0, 'n': len(values)}
+    q1, median, q3 = statistics.quantiles(values, n=4, method='inclusive')
+    return {'median': median, 'q1': q1, 'q3': q3, 'iqr': q3 - q1, 'n': len(values)}
+
+class BenchmarkHistory:
+    """SQLite history of benchmark runs
+
+    BenchmarkRun holds one row per run (environment, corpus spec, git
+    commit, label); BenchmarkTrial one row per (run, stage, trial).
+    """
+
+    def __init__(self, db_path: str = "database/benchmark_history.db"):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS BenchmarkRun (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at REAL NOT NULL,
+                    label TEXT,
+                    git_commit TEXT,
+                    corpus_seed INTEGER,
+                    environment TEXT NOT NULL, -- JSON
+                    corpus TEXT NOT NULL -- JSON corpus spec
+                );
+                CREATE TABLE IF NOT EXISTS BenchmarkTrial (
+                    run_id INTEGER NOT NULL REFERENCES BenchmarkRun(run_id),
+                    stage TEXT NOT NULL,
+                    trial INTEGER NOT NULL,
+                    seconds REAL NOT NULL,
+                    items INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    peak_rss_mb REAL NOT NULL,
+                    PRIMARY KEY (run_id, stage, trial)
+                );
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def record(self, reports: List[Dict], label: Optional[str] = None) -> int:
+        """Store the trials of one run; returns its run_id"""
+        corpus = reports[0]['corpus']
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute("""
+                INSERT INTO BenchmarkRun (created_at, label, git_commit, corpus_seed, environment, corpus)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (time.time(), label, git_commit(), corpus['seed'], json.dumps(reports[0]['environment']),
+                  json.dumps(corpus)))
+            run_id = cursor.lastrowid
+            conn.executemany("""
+                INSERT INTO BenchmarkTrial (run_id, stage, trial, seconds, items, bytes, peak_rss_mb)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (run_id, stage, trial, result['seconds'], result['items'], result['bytes'], result['peak_rss_mb'])
+                for trial, report in enumerate(reports) for stage, result in report['stages'].items()
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        return run_id
+
+    def runs(self, limit: int = 20) -> List[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute("""
+                SELECT run_id, created_at, label, git_commit, corpus_seed, environment
+                FROM BenchmarkRun ORDER BY run_id DESC LIMIT ?
+            """, (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [
+            {'run_id': run_id, 'created_at': created_at, 'label': label, 'git_commit': commit,
+             'corpus_seed': seed, 'environment': json.loads(env)}
+            for run_id, created_at, label, commit, seed, env in rows
+        ]
+
+    def resolve(self, reference: str, before: Optional[int] = None) -> Optional[int]:
+        """run_id for 'latest', a run id, or a label (its newest run); 'latest' and labels only look before `before`"""
+        before = before if before is not None else sys.maxsize
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if reference == 'latest':
+                row = conn.execute("SELECT MAX(run_id) FROM BenchmarkRun WHERE run_id < ?", (before,)).fetchone()
+            elif reference.isdigit():
+                row = conn.execute("SELECT run_id FROM BenchmarkRun WHERE run_id = ?", (int(reference),)).fetchone()
+            else:
+                row = conn.execute("SELECT MAX(run_id) FROM BenchmarkRun WHERE label = ? AND run_id < ?",
+                                   (reference, before)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def stage_stats(self, run_id: int) -> Dict[str, Dict]:
+        """Per stage: summary of trial seconds and the peak RSS"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute("SELECT stage, seconds, peak_rss_mb FROM BenchmarkTrial WHERE run_id = ?",
+                                (run_id,)).fetchall()
+        finally:
+            conn.close()
+        seconds: Dict[str, List[float]] = {}
+        rss: Dict[str, float] = {}
+        for stage, stage_seconds, peak_rss_mb in rows:
+            seconds.setdefault(stage, []).append(stage_seconds)
+            rss[stage] = max(rss.get(stage, 0.0), peak_rss_mb)
+        return {stage: {**summarize(values), 'peak_rss_mb': rss[stage]} for stage, values in seconds.items()}
+
+    def environment_of(self, run_id: int) -> Dict:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute("SELECT environment, corpus FROM BenchmarkRun WHERE run_id = ?", (run_id,)).fetchone()
+        finally:
+            conn.close()
+        return {'environment': json.loads(row[0]), 'corpus': json.loads(row[1])}
+
+    def compare(self, baseline_id: int, candidate_id: int, threshold: float = 0.10,
+                min_delta: float = 0.005) -> Dict:
+        """Per-stage comparison of median seconds
+
+        A stage regresses when its median is more than `threshold` slower
+        than the baseline's AND the slowdown exceeds both the larger of the
+        two IQRs and min_delta seconds, so noisy or millisecond-sized stages
+        need a real shift to trip the check.
+        """
+        baseline = self.stage_stats(baseline_id)
+        candidate = self.stage_stats(candidate_id)
+        baseline_meta = self.environment_of(baseline_id)
+        candidate_meta = self.environment_of(candidate_id)
+
+        stages = {}
+        for stage in [s for s in STAGES if s in baseline and s in candidate]:
+            before, after = baseline[stage], candidate[stage]
+            change = after['median'] / before['median'] - 1 if before['median'] else 0.0
+            slowdown = after['median'] - before['median']
+            stages[stage] = {
+                'baseline_median': before['median'],
+                'candidate_median': after['median'],
+                'baseline_iqr': before['iqr'],
+                'candidate_iqr': after['iqr'],
+                'change': change,
+                'regression': change > threshold and slowdown > max(before['iqr'], after['iqr'], min_delta)
+            }
+
+        warnings = [
+            f"{key} differs: {baseline_meta['environment'].get(key)} → {candidate_meta['environment'].get(key)}"
+            for key in ('python', 'cpu_count', 'processor')
+            if baseline_meta['environment'].get(key) != candidate_meta['environment'].get(key)
+        ]
+        if baseline_meta['corpus'] != candidate_meta['corpus']:
+            warnings.append("corpus spec differs - timings are not comparable")
+
+        return {
+            'baseline': baseline_id,
+            'candidate': candidate_id,
+            'threshold': threshold,
+            'stages': stages,
+            'warnings': warnings,
+            'regressions': [stage for stage, result in stages.items() if result['regression']]
+        }
+
+def print_comparison(comparison: Dict):
+    print(f"📊 Run {comparison['candidate']} vs baseline {comparison['baseline']} "
+          f"(threshold {comparison['threshold']:.0%})")
+    print(f"{'stage':<14} {'baseline s':>11} {'± IQR':>8} {'candidate s':>12} {'± IQR':>8} {'change':>8}")
+    for stage, result in comparison['stages'].items():
+        icon = "🔴" if result['regression'] else "🟢"
+        print(f"{stage:<14} {result['baseline_median']:>11.4f} {result['baseline_iqr']:>8.4f} "
+              f"{result['candidate_median']:>12.4f} {result['candidate_iqr']:>8.4f} {result['change']:>+8.1%} {icon}")
+    for warning in comparison['warnings']:
+        print(f"⚠️ {warning}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark history and regression checks")
+    parser.add_argument('--history', default="database/benchmark_history.db", help="History database")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    run = subcommands.add_parser('run', help="Run trials, record them and compare against a baseline")
+    run.add_argument('--corpus', default=str(Path(__file__).resolve().parent / "corpus"),
+                     help="Corpus folder (generated if missing)")
+    run.add_argument('--seed', type=int, default=0, help="Seed when generating the corpus")
+    run.add_argument('--count', type=int, default=20, help="Saves when generating the corpus")
+    run.add_argument('--db', default="database/witcher_save_manager.db", help="Source of DecisionReference markers")
+    run.add_argument('--trials', type=int, default=5)
+    run.add_argument('--warmup', type=int, default=1)
+    run.add_argument('--stages', nargs='+', choices=STAGES)
+    run.add_argument('--label', help="Name for this run (usable as a baseline later)")
+    run.add_argument('--baseline', default='latest', help="'latest', a run id or a label")
+    run.add_argument('--threshold', type=float, default=0.10, help="Allowed median slowdown (0.10 = 10%%)")
+    run.add_argument('--min-delta', type=float, default=0.005, help="Ignore slowdowns below this many seconds")
+
+    compare = subcommands.add_parser('compare', help="Compare two recorded runs")
+    compare.add_argument('baseline')
+    compare.add_argument('candidate')
+    compare.add_argument('--threshold', type=float, default=0.10)
+    compare.add_argument('--min-delta', type=float, default=0.005)
+
+    subcommands.add_parser('list', help="List recorded runs")
+    args = parser.parse_args()
+
+    history = BenchmarkHistory(args.history)
+
+    if args.command == 'list':
+        for run_info in history.runs():
+            env = run_info['environment']
+            print(f"  #{run_info['run_id']} {time.strftime('%Y-%m-%d %H:%M', time.localtime(run_info['created_at']))} "
+                  f"{run_info['label'] or '-'} {run_info['git_commit'] or '-'} seed={run_info['corpus_seed']} "
+                  f"python {env['python']}, {env['cpu_count']} CPUs")
+        sys.exit(0)
+
+    if args.command == 'compare':
+        baseline_id, candidate_id = history.resolve(args.baseline), history.resolve(args.candidate)
+        if baseline_id is None or candidate_id is None:
+            print("❌ Unknown run")
+            sys.exit(2)
+    else:
+        if not (Path(args.corpus) / "corpus_manifest.json").exists():
+            print(f"🧪 Generating corpus in {args.corpus} (seed {args.seed})...")
+            generate_corpus(args.corpus, CorpusSpec(count=args.count, seed=args.seed), args.db)
+        stages = [name for name in STAGES if name in args.stages] if args.stages else None
+        if stages:
+            stages = STAGES[:STAGES.index(stages[-1]) + 1]  # Prerequisite stages must run too
+
+        print(f"⏱️ Running {args.warmup} warmup + {args.trials} trials...")
+        candidate_id = history.record(run_trials(args.corpus, args.trials, args.warmup, stages), args.label)
+        baseline_id = history.resolve(args.baseline, before=candidate_id)
+        print(f"💾 Recorded run #{candidate_id}")
+        if baseline_id is None or baseline_id == candidate_id:
+            print("ℹ️ No baseline to compare against yet")
+            sys.exit(0)
+
+    comparison = history.compare(baseline_id, candidate_id, args.threshold, args.min_delta)
+    print_comparison(comparison)
+    if comparison['regressions']:
+        print(f"❌ Regression in: {', '.join(comparison['regressions'])}")
+        sys.exit(1)
+    print("✅ No regressions")
@@ -0,0 +1,215 @@
+# End-to-End Benchmark Suite
+# Throughput (MB/s, saves/s, items/s) and peak RSS of the hex analyzer, DB
+# ingestion, confidence scoring and taxonomy classification on a synthetic corpus
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from benchmarks.synthetic_corpus import CorpusSpec, generate_corpus, load_corpus
+from ml.ml_confidence_engine import PatternConfidenceEngine
+from ml.pattern_feature_store import PatternFeatureStore
+from universal_decision_taxonomy import UniversalDecisionTaxonomy
+from witcher_hex_analyzer import WitcherHexAnalyzer
+
+# Stages run in this order; each one consumes what the previous ones produced
+STAGES = ['hex_analyzer', 'db_ingest', 'confidence', 'taxonomy']
+
+# Columns the confidence engine reads from PatternGameMapping
+SCRATCH_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS PatternGameMapping (
+        mapping_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pattern_text TEXT NOT NULL,
+        pattern_type TEXT NOT NULL,
+        game_concept TEXT NOT NULL,
+        confidence_level REAL DEFAULT 0.5,
+        data_type TEXT,
+        context_clues TEXT,
+        verification_status TEXT DEFAULT 'pending',
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+def peak_rss_bytes() -> int:
+    """Process high-water mark of resident memory"""
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+
+def environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+class BenchmarkSuite:
+    """Runs the pipeline stages over a corpus and measures each one
+
+    Stages share state: the analyzer's results feed ingestion, the ingested
+    features feed the confidence engine, and every found pattern is then
+    classified. DB work happens in a scratch database under work_dir, never
+    in the knowledge database.
+    """
+
+    def __init__(self, corpus_dir: str, work_dir: str):
+        self.corpus = load_corpus(corpus_dir)
+        self.saves = self.corpus['saves']
+        self.work_dir = Path(work_dir)
+        self.db_path = str(self.work_dir / "benchmark.db")
+        self.analyses = []  # (save, AnalysisResult) from hex_analyzer
+        self.engine = None  # Trained by setup_confidence
+
+    def _create_scratch_db(self):
+        """Scratch DB with labelled rows: planted markers confirmed, filler tokens rejected"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executescript(SCRATCH_SCHEMA)
+            rows = [(marker, 'marker', 'synthetic', 0.9, 'text', 'quest decision', 'confirmed')
+                    for marker in self.corpus['markers']]
+            rows += [(f"noise_{index:04x}", 'noise', 'synthetic', 0.3, 'text', 'padding', 'rejected')
+                     for index in range(len(rows))]
+            conn.executemany("""
+                INSERT INTO PatternGameMapping
+                (pattern_text, pattern_type, game_concept, confidence_level, data_type, context_clues, verification_status)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _found_patterns(self) -> List[Dict]:
+        return [
+            {'pattern': pattern['pattern'].decode('utf-8', errors='ignore'), 'context': pattern['category'],
+             'frequency': pattern['count'], 'game': save['game']}
+            for save, result in self.analyses for pattern in result.patterns_found
+        ]
+
+    def stage_hex_analyzer(self) -> int:
+        analyzer = WitcherHexAnalyzer()
+        self.analyses = []
+        with contextlib.redirect_stdout(io.StringIO()):  # The banners are not what we measure
+            for save in self.saves:
+                self.analyses.append((save, analyzer.analyze_file(save['path'])))
+        return sum(len(result.patterns_found) for _, result in self.analyses)
+
+    def stage_db_ingest(self) -> int:
+        store = PatternFeatureStore(self.db_path)
+        return sum(store.ingest_analysis(result, save['game']) for save, result in self.analyses)
+
+    def setup_confidence(self):
+        """Train the model on the scratch DB - setup, not part of the measurement"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.engine = PatternConfidenceEngine(self.db_path, model_path=str(self.work_dir / "benchmark_model.joblib"))
+            self.engine.ensure_model()
+
+    def stage_confidence(self) -> int:
+        patterns = self._found_patterns()
+        self.engine.clear_score_cache()
+        self.engine.predict_confidence_batch(
+            [p['pattern'] for p in patterns], [p['context'] for p in patterns], [p['frequency'] for p in patterns])
+        return len(patterns)
+
+    def stage_taxonomy(self) -> int:
+        taxonomy = UniversalDecisionTaxonomy()
+        classified = 0
+        for save, result in self.analyses:
+            patterns = [p['pattern'].decode('utf-8', errors='ignore') for p in result.patterns_found]
+            taxonomy.analyze_save_decisions(patterns, save['game'])
+            classified += len(patterns)
+        return classified
+
+    def run_stage(self, name: str) -> Dict:
+        setup = getattr(self, f"setup_{name}", None)
+        if setup:
+            setup()
+        stage: Callable[[], int] = getattr(self, f"stage_{name}")
+        started = time.perf_counter()
+        items = stage()
+        seconds = time.perf_counter() - started
+
+        total_bytes = sum(save['file_size'] for save in self.saves)
+        return {
+            'seconds': seconds,
+            'saves': len(self.saves),
+            'bytes': total_bytes,
+            'items': items,
+            'mb_per_s': total_bytes / (1024 * 1024) / seconds if seconds else 0.0,
+            'saves_per_s': len(self.saves) / seconds if seconds else 0.0,
+            'items_per_s': items / seconds if seconds else 0.0,
+            'peak_rss_mb': peak_rss_bytes() / (1024 * 1024)  # High-water mark so far, not per stage
+        }
+
+    def run(self, stages: Optional[List[str]] = None) -> Dict:
+        self._create_scratch_db()
+        return {
+            'corpus': self.corpus['spec'],
+            'environment': environment(),
+            'stages': {name: self.run_stage(name) for name in (stages or STAGES)}
+        }
+
+def run_benchmarks(corpus_dir: str, stages: Optional[List[str]] = None) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="witcherai_bench_") as work_dir:
+        return BenchmarkSuite(corpus_dir, work_dir).run(stages)
+
+def print_report(report: Dict):
+    spec = report['corpus']
+    print(f"⏱️ WitcherAI Benchmark (corpus seed {spec['seed']}, {spec['count']} saves)")
+    print(f"{'stage':<14} {'seconds':>8} {'MB/s':>9} {'saves/s':>9} {'items/s':>11} {'peak RSS MB':>12}")
+    for name, stage in report['stages'].items():
+        print(f"{name:<14} {stage['seconds']:>8.3f} {stage['mb_per_s']:>9.1f} {stage['saves_per_s']:>9.1f} "
+              f"{stage['items_per_s']:>11,.0f} {stage['peak_rss_mb']:>12.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline on a synthetic corpus")
+    parser.add_argument('--corpus', default=str(Path(__file__).resolve().parent / "corpus"),
+                        help="Corpus folder (generated if missing)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed when generating the corpus")
+    parser.add_argument('--count', type=int, default=20, help="Saves when generating the corpus")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, help="Subset of stages (prerequisites still run)")
+    parser.add_argument('--db', default="database/witcher_save_manager.db", help="Source of DecisionReference markers")
+    parser.add_argument('--json', help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    if not (Path(args.corpus) / "corpus_manifest.json").exists():
+        print(f"🧪 Generating corpus in {args.corpus} (seed {args.seed})...")
+        generate_corpus(args.corpus, CorpusSpec(count=args.count, seed=args.seed), args.db)
+
+    selected = [name for name in STAGES if name in args.stages] if args.stages else STAGES
+    report = run_benchmarks(args.corpus, STAGES[:STAGES.index(selected[-1]) + 1])
+    report['stages'] = {name: report['stages'][name] for name in selected}
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report written to {args.json}")
@@ -0,0 +1,139 @@
+# Synthetic Save Corpus Generator
+# Deterministic, seeded DZIP saves at realistic sizes with planted analyzer and
+# DecisionReference markers, so benchmarks run on the same bytes every time
+
+import argparse
+import json
+import sqlite3
+import struct
+import sys
+import zlib
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from witcher_hex_analyzer import DZIP_HEADER_SIZE, WitcherHexAnalyzer
+
+GAME_EXTENSIONS = {'Witcher 1': '.TheWitcherSave', 'Witcher 2': '.sav'}
+
+@dataclass
+class CorpusSpec:
+    """What to generate; the same spec always yields byte-identical saves"""
+    count: int = 20
+    seed: int = 0
+    min_size: int = 100 * 1024
+    max_size: int = 10 * 1024 * 1024
+    markers_per_mb: float = 50.0  # Pattern density
+    zero_fraction: float = 0.3  # Share of the payload in zero runs, like padding in real saves
+    compressed: bool = False  # Raw-deflate the payload instead of the usual 1:1 wrapper
+    games: List[str] = field(default_factory=lambda: ['Witcher 2'])
+
+def dzip_header(uncompressed_size: int, compressed: bool = False) -> bytes:
+    """24-byte DZIP header: magic, version, compression type, data type, uncompressed size, reserved"""
+    header = struct.pack('<4sIIIII', b'DZIP', 2, 1 if compressed else 0, 1, uncompressed_size, 0)
+    assert len(header) == DZIP_HEADER_SIZE
+    return header
+
+def load_decision_markers(db_path: Optional[str]) -> List[str]:
+    """'variable\\x00value' markers for every DecisionReference value (read-only)"""
+    if not db_path or not Path(db_path).exists():
+        return []
+    conn = sqlite3.connect(f"file:{Path(db_path).resolve().as_posix()}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT variable_name, possible_values FROM DecisionReference ORDER BY decision_id").fetchall()
+    finally:
+        conn.close()
+    return [f"{variable}\x00{value}" for variable, values in rows for value in json.loads(values or '[]')]
+
+def corpus_markers(db_path: Optional[str] = None) -> List[str]:
+    """Known analyzer patterns followed by DecisionReference markers"""
+    markers = [p.pattern.decode('utf-8') for p in WitcherHexAnalyzer().known_patterns]
+    return markers + load_decision_markers(db_path)
+
+def synthetic_payload(rng: np.random.Generator, size: int, markers: List[str],
+                      markers_per_mb: float, zero_fraction: float) -> Tuple[bytes, Dict[str, int]]:
+    """Random bytes with zero runs and non-overlapping planted markers
+
+    The payload is cut into one slot per marker and each marker lands at a
+    random offset inside its own slot, so planted markers never overwrite
+    each other. Returns the payload and the planted count per marker.
+    """
+    payload = rng.integers(0, 256, size, dtype=np.uint8)
+
+    run_length = 4096
+    runs = int(size * zero_fraction) // run_length
+    for start in rng.integers(0, max(size - run_length, 1), runs):
+        payload[start:start + run_length] = 0
+
+    encoded = [marker.encode('utf-8') for marker in markers]
+    longest = max(len(marker) for marker in encoded)
+    plant_count = min(int(size / (1024 * 1024) * markers_per_mb), size // (longest * 2))
+    planted: Dict[str, int] = {}
+    if plant_count:
+        slot = size // plant_count
+        choices = rng.integers(0, len(encoded), plant_count)
+        offsets = rng.integers(0, slot - longest, plant_count)
+        for index, (choice, offset) in enumerate(zip(choices, offsets)):
+            marker = encoded[choice]
+            start = index * slot + int(offset)
+            payload[start:start + len(marker)] = np.frombuffer(marker, np.uint8)
+            planted[markers[choice]] = planted.get(markers[choice], 0) + 1
+    return payload.tobytes(), planted
+
+def generate_corpus(output_dir: str, spec: CorpusSpec, db_path: Optional[str] = None) -> Dict:
+    """Write spec.count saves plus corpus_manifest.json (spec, markers and ground truth per save)"""
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    markers = corpus_markers(db_path)
+
+    # Sizes are log-uniform: many small saves, a few large ones
+    size_rng = np.random.default_rng(spec.seed)
+    sizes = np.exp(size_rng.uniform(np.log(spec.min_size), np.log(spec.max_size), spec.count)).astype(int)
+
+    saves = []
+    for index, size in enumerate(sizes):
+        rng = np.random.default_rng([spec.seed, index])  # Per-save stream: any save can be regenerated alone
+        game = spec.games[index % len(spec.games)]
+        payload, planted = synthetic_payload(rng, int(size), markers, spec.markers_per_mb, spec.zero_fraction)
+        body = zlib.compress(payload, 6)[2:-4] if spec.compressed else payload  # Raw deflate stream
+
+        save_path = output / f"synthetic_{spec.seed}_{index:04d}{GAME_EXTENSIONS.get(game, '.sav')}"
+        save_path.write_bytes(dzip_header(len(payload), spec.compressed) + body)
+        saves.append({'path': save_path.name, 'game': game, 'payload_size': len(payload),
+                      'file_size': DZIP_HEADER_SIZE + len(body), 'planted': planted})
+
+    manifest = {'spec': asdict(spec), 'markers': markers, 'saves': saves}
+    with open(output / "corpus_manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def load_corpus(corpus_dir: str) -> Dict:
+    """Corpus manifest with save paths resolved against the corpus folder"""
+    with open(Path(corpus_dir) / "corpus_manifest.json", 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    for save in manifest['saves']:
+        save['path'] = str(Path(corpus_dir) / save['path'])
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic save corpus")
+    parser.add_argument('output_dir', help="Folder for the saves and corpus_manifest.json")
+    parser.add_argument('--count', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-size', type=int, default=100 * 1024, help="Smallest payload in bytes")
+    parser.add_argument('--max-size', type=int, default=10 * 1024 * 1024, help="Largest payload in bytes")
+    parser.add_argument('--density', type=float, default=50.0, help="Planted markers per MB")
+    parser.add_argument('--compressed', action='store_true', help="Deflate payloads instead of storing them")
+    parser.add_argument('--games', nargs='+', default=['Witcher 2'], choices=sorted(GAME_EXTENSIONS))
+    parser.add_argument('--db', default="database/witcher_save_manager.db", help="Source of DecisionReference markers")
+    args = parser.parse_args()
+
+    spec = CorpusSpec(count=args.count, seed=args.seed, min_size=args.min_size, max_size=args.max_size,
+                      markers_per_mb=args.density, compressed=args.compressed, games=args.games)
+    manifest = generate_corpus(args.output_dir, spec, args.db)
+    total = sum(save['payload_size'] for save in manifest['saves'])
+    print(f"✅ {len(manifest['saves'])} synthetic saves ({total / (1024 * 1024):.1f} MB) in {args.output_dir}")
+    print(f"🎯 {len(manifest['markers'])} distinct markers, seed {args.seed}")
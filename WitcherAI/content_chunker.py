@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+✂️ Content-Defined Chunker
+==========================
+Gear rolling-hash chunking (FastCDC style): boundaries depend on content, not
+position, so inserting or shifting data only disturbs the chunks around it
+"""
+
+import random
+from typing import List, Tuple
+
+import numpy as np
+
+# 32-bit gear table; fixed seed so chunk boundaries are stable across runs and machines
+_gear_rng = random.Random(0x57495443)
+GEAR = np.array([_gear_rng.getrandbits(32) for _ in range(256)], dtype=np.uint32)
+
+# A 32-bit gear hash only depends on the last 32 bytes
+WINDOW = 32
+
+def rolling_hashes(data: bytes) -> np.ndarray:
+    """Gear hash at every byte: h[i] = sum(GEAR[data[i-k]] << k for k < 32) mod 2**32
+
+    Computed as 32 shifted vector adds instead of a per-byte Python loop.
+    """
+    values = GEAR[np.frombuffer(data, dtype=np.uint8)]
+    hashes = values.copy()
+    for shift in range(1, WINDOW):
+        hashes[shift:] += values[:-shift] << np.uint32(shift)
+    return hashes
+
+def chunk_boundaries(data: bytes, min_size: int = 2048, avg_size: int = 8192,
+                     max_size: int = 65536) -> List[Tuple[int, int]]:
+    """Split data into content-defined chunks, returned as (offset, length)
+
+    A cut point is a byte whose hash has the top log2(avg_size) bits clear,
+    at least min_size after the previous cut; chunks never exceed max_size.
+    """
+    if not data:
+        return []
+
+    mask_bits = max(avg_size.bit_length() - 1, 1)
+    mask = np.uint32(((1 << mask_bits) - 1) << (32 - mask_bits))
+    candidates = np.flatnonzero((rolling_hashes(data) & mask) == 0) + 1  # Cut after the matching byte
+
+    chunks = []
+    start = 0
+    while start < len(data):
+        # Next candidate at or past the minimum chunk size
+        position = int(np.searchsorted(candidates, start + min_size, side='left'))
+        end = int(candidates[position]) if position < len(candidates) else len(data)
+        end = min(end, start + max_size, len(data))
+        chunks.append((start, end - start))
+        start = end
+    return chunks
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+🔗 Cross-Game Pattern Matcher
+=============================
+Streams pattern matches across Witcher 1/2/3 analyses: exact matches by a
+normalized pattern key (hash join) and near matches by MinHash/LSH similarity
+"""
+
+import random
+import re
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Trailing key tokens that describe a variable's state rather than what it is
+STATUS_SUFFIXES = {
+    'confirmed', 'set', 'flag', 'state', 'status', 'value', 'val', 'var',
+    'done', 'completed', 'complete', 'active', 'chosen', 'true', 'false'
+}
+
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_MAX = (1 << 32) - 1
+
+def normalize_pattern_key(text: str) -> str:
+    """Canonical join key: lowercase, unified separators, no status/numeric suffixes
+
+    e.g. 'RochePath_Confirmed', 'roche-path-2' and 'roche_path_confirmed' all
+    normalize to 'roche_path'.
+    """
+    text = re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', str(text))  # camelCase -> snake
+    tokens = [token for token in re.split(r'[^a-z0-9]+', text.lower()) if token]
+    while len(tokens) > 1 and (tokens[-1].isdigit() or tokens[-1] in STATUS_SUFFIXES):
+        tokens.pop()
+    if tokens:
+        tokens[-1] = tokens[-1].rstrip('0123456789') or tokens[-1]
+    return '_'.join(tokens)
+
+def shingles(key: str, size: int = 3) -> Set[str]:
+    padded = f" {key} "
+    return {padded[i:i + size] for i in range(max(len(padded) - size + 1, 1))}
+
+class MinHasher:
+    """MinHash signatures over character shingles, vectorized with numpy"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        # a, b span the whole field: small multipliers barely wrap mod the prime, so
+        # every permutation would keep the shingle hashes' order and pick the same minimum
+        self.a = rng.randint(1, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, key: str) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles(key)), dtype=np.uint64)
+        # uint64 products wrap mod 2**64 before the prime modulus (as in datasketch)
+        return (((np.outer(hashes, self.a) + self.b) % MINHASH_PRIME) & MINHASH_MAX).min(axis=0)
+
+class KeyBucket:
+    """Per normalized key: counts per game plus a small reservoir of sample instances"""
+
+    __slots__ = ('game_counts', 'instance_count', 'samples')
+
+    def __init__(self):
+        self.game_counts: Dict[str, int] = {}
+        self.instance_count = 0
+        self.samples: List[Tuple[str, Dict]] = []
+
+class CrossGameMatcher:
+    """Streaming hash-join of patterns across games
+
+    Patterns are bucketed by normalize_pattern_key, keeping only counts and
+    sample_size sampled instances per key, so memory grows with the number of
+    distinct keys rather than instances. Each new key is also indexed in a
+    MinHash LSH table (bands x rows signature slices), so near-identical keys
+    seen in different games are found without comparing every pair.
+    """
+
+    def __init__(self, key_field: str = "type", sample_size: int = 3,
+                 num_perm: int = 64, bands: int = 16, similarity_threshold: float = 0.5,
+                 seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.key_field = key_field
+        self.sample_size = sample_size
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.similarity_threshold = similarity_threshold
+        self.minhasher = MinHasher(num_perm, seed)
+        self._rng = random.Random(seed)
+
+        self.buckets: Dict[str, KeyBucket] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._lsh: List[Dict[bytes, List[str]]] = [{} for _ in range(bands)]
+        self._candidate_pairs: Set[Tuple[str, str]] = set()
+
+    def pattern_key(self, pattern: Dict) -> str:
+        return normalize_pattern_key(pattern.get(self.key_field) or pattern.get('pattern') or '')
+
+    def add(self, game: str, patterns: Iterable[Dict]) -> List[str]:
+        """Join one analysis' patterns in; returns keys that just became cross-game"""
+        newly_shared = []
+        for pattern in patterns:
+            key = self.pattern_key(pattern)
+            if not key:
+                continue
+
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = KeyBucket()
+                self._index_key(key)
+
+            bucket.instance_count += 1
+            if game not in bucket.game_counts:
+                bucket.game_counts[game] = 0
+                if len(bucket.game_counts) == 2:
+                    newly_shared.append(key)
+            bucket.game_counts[game] += 1
+
+            # Reservoir sampling keeps a uniform sample of instances in O(sample_size)
+            if len(bucket.samples) < self.sample_size:
+                bucket.samples.append((game, pattern))
+            else:
+                slot = self._rng.randrange(bucket.instance_count)
+                if slot < self.sample_size:
+                    bucket.samples[slot] = (game, pattern)
+        return newly_shared
+
+    def _index_key(self, key: str):
+        signature = self.minhasher.signature(key)
+        self._signatures[key] = signature
+        for band, table in enumerate(self._lsh):
+            band_key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            members = table.setdefault(band_key, [])
+            for other in members:
+                self._candidate_pairs.add((other, key))
+            members.append(key)
+
+    def similarity(self, key_a: str, key_b: str) -> float:
+        """Estimated Jaccard similarity of two keys' shingle sets"""
+        return float(np.mean(self._signatures[key_a] == self._signatures[key_b]))
+
+    def games(self, key: str) -> List[str]:
+        return list(self.buckets[key].game_counts)
+
+    def matches(self, min_games: int = 2) -> Iterator[Dict]:
+        """Stream exact cross-game matches (same normalized key in min_games+ games)"""
+        for key, bucket in self.buckets.items():
+            if len(bucket.game_counts) >= min_games:
+                yield {
+                    "pattern_type": key,
+                    "appears_in_games": list(bucket.game_counts),
+                    "counts_by_game": dict(bucket.game_counts),
+                    "instance_count": bucket.instance_count,
+                    "sample_instances": list(bucket.samples),
+                    "transfer_potential": "high" if len(bucket.game_counts) >= 3 else "medium"
+                }
+
+    def near_matches(self, threshold: Optional[float] = None) -> Iterator[Dict]:
+        """Stream LSH candidate pairs of different keys that span games and pass threshold"""
+        threshold = self.similarity_threshold if threshold is None else threshold
+        for key_a, key_b in self._candidate_pairs:
+            games = set(self.buckets[key_a].game_counts) | set(self.buckets[key_b].game_counts)
+            if len(games) < 2:
+                continue
+            score = self.similarity(key_a, key_b)
+            if score >= threshold:
+                yield {
+                    "pattern_keys": [key_a, key_b],
+                    "similarity": round(score, 3),
+                    "appears_in_games": sorted(games),
+                    "sample_instances": self.buckets[key_a].samples[:1] + self.buckets[key_b].samples[:1]
+                }
+
+    def cross_game_patterns(self) -> List[Dict]:
+        return list(self.matches())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+📈 WitcherAI Instrumentation
+============================
+Per-stage timing spans, counters and latency histograms for the analysis
+pipeline, exported as Prometheus text or JSON. Disabled by default: spans
+and counters are then a single flag check.
+
+Set WITCHERAI_METRICS=<path>.prom (or .json) to enable collection for any
+entry point and write the metrics to that file at exit.
+"""
+
+import atexit
+import bisect
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+METRIC_PREFIX = "witcherai"
+
+class Histogram:
+    """Fixed-bucket latency histogram (non-cumulative counts, cumulated on export)"""
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Bucket upper bound containing the q-th observation"""
+        target = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS + (float('inf'),), self.counts):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return bound
+        return 0.0
+
+class Metrics:
+    """Thread-safe registry of counters and per-stage latency histograms"""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.stages: Dict[str, Histogram] = {}
+
+    def count(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def _span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def span(self, stage: str):
+        """Context manager timing one execution of a pipeline stage"""
+        return self._span(stage) if self.enabled else _NO_SPAN
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.stages.clear()
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'stages': {
+                    stage: {
+                        'count': histogram.count,
+                        'total_seconds': histogram.total,
+                        'mean_seconds': histogram.total / histogram.count if histogram.count else 0.0,
+                        'p50_seconds': histogram.quantile(0.5),
+                        'p95_seconds': histogram.quantile(0.95),
+                        'buckets': dict(zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], histogram.counts))
+                    }
+                    for stage, histogram in self.stages.items()
+                }
+            }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (for the node_exporter textfile collector)"""
+        lines: List[str] = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{METRIC_PREFIX}_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value:.15g}"]
+
+            metric = f"{METRIC_PREFIX}_stage_seconds"
+            if self.stages:
+                lines.append(f"# TYPE {metric} histogram")
+            for stage, histogram in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS + (float('inf'),), histogram.counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """Write to path: JSON for .json, Prometheus text otherwise (atomically)"""
+        content = json.dumps(self.to_dict(), indent=2) if path.endswith('.json') else self.to_prometheus()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+_NO_SPAN = contextlib.nullcontext()
+
+# Process-wide registry used by the pipeline modules
+METRICS = Metrics()
+
+def span(stage: str):
+    return METRICS.span(stage)
+
+def count(name: str, value: float = 1):
+    if METRICS.enabled:
+        METRICS.count(name, value)
+
+def enable(export_path: Optional[str] = None):
+    """Start collecting; with export_path the metrics are written there at exit"""
+    METRICS.enabled = True
+    if export_path:
+        atexit.register(METRICS.write, export_path)
+
+def disable():
+    METRICS.enabled = False
+
+def print_summary(metrics: Metrics = METRICS):
+    summary = metrics.to_dict()
+    print("📈 Pipeline Metrics")
+    print(f"{'stage':<16} {'calls':>8} {'total s':>10} {'mean ms':>9} {'p95 ms':>9}")
+    for stage, stats in sorted(summary['stages'].items(), key=lambda item: -item[1]['total_seconds']):
+        print(f"{stage:<16} {stats['count']:>8,} {stats['total_seconds']:>10.3f} "
+              f"{stats['mean_seconds'] * 1000:>9.2f} {stats['p95_seconds'] * 1000:>9.2f}")
+    for name, value in sorted(summary['counters'].items()):
+        print(f"  {name}: {value:,.15g}")
+
+if os.environ.get("WITCHERAI_METRICS"):
+    enable(os.environ["WITCHERAI_METRICS"])
+
+if __name__ == "__main__":
+    # Summarise a JSON metrics file written by a previous run
+    if len(sys.argv) < 2:
+        print("Usage: python instrumentation.py <metrics.json>")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    loaded = Metrics()
+    loaded.counters = state['counters']
+    for stage, stats in state['stages'].items():
+        histogram = loaded.stages[stage] = Histogram()
+        histogram.counts = list(stats['buckets'].values())
+        histogram.total = stats['total_seconds']
+        histogram.count = stats['count']
+    print_summary(loaded)
@@ -2,40 +2,152 @@
 # Uses machine learning to automatically score pattern reliability
 
 import sqlite3
+import argparse
+import contextlib
+import hashlib
+import copy
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
 import numpy as np
+import joblib
+import scipy.sparse as sp
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.feature_extraction.text import TfidfVectorizer
+from threadpoolctl import threadpool_limits
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 import json
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from instrumentation import count, span
+from ml.pattern_feature_store import PatternFeatureStore
+
+# Bump whenever FEATURE_NAMES or the feature extraction changes, so stale
+# persisted models are retrained instead of scoring with the wrong columns
+FEATURE_SCHEMA_VERSION = 3
+
+# Labelled rows used for training; 'rejected' patterns are negative examples
+TRAINING_STATUSES = ('confirmed', 'pending', 'rejected')
+
+# Column order of the feature matrix (matches extract_pattern_features)
+FEATURE_NAMES = [
+    'pattern_length',
+    'has_underscore',
+    'frequency_score',
+    'context_relevance',
+    'game_keyword_match',
+    'structural_indicators',
+    'save_count',
+    'game_count',
+    'positional_spread'
+]
+
+CONTEXT_KEYWORDS = ['quest', 'character', 'decision', 'act', 'choice', 'fact']
+WITCHER_KEYWORDS = ['quest', 'aryan', 'roche', 'iorveth', 'facts', 'choice']
+
+# Hashed char n-gram columns per text field (pattern_text, context_clues).
+# Fixed width means no vocabulary is kept and memory does not grow with the corpus
+TEXT_HASH_FEATURES = 2 ** 11
+TEXT_NGRAM_RANGE = (2, 4)
+
+# Rough per-row working set while scoring: the pattern/context strings
+# (numpy unicode, up to 256 chars each), the dense feature row and the
+# sparse n-gram entries (value + index, ~3 n-grams per character)
+SCORING_ROW_BYTES = 2 * 4 * 256 + 8 * len(FEATURE_NAMES) + 12 * 3 * 2 * 256
+
+def make_text_hasher():
+    """Stateless char n-gram hasher shared by training, scoring and benchmarks"""
+    return HashingVectorizer(
+        analyzer='char_wb',
+        ngram_range=TEXT_NGRAM_RANGE,
+        n_features=TEXT_HASH_FEATURES,
+        alternate_sign=False,
+        norm=None
+    )
+
+@dataclass
+class ResourceLimits:
+    """Parallelism and memory bounds for training and batch prediction"""
+    n_jobs: int = 1  # Forest workers for fit/predict_proba (-1 = all cores)
+    max_threads: Optional[int] = None  # Hard cap on worker and native (BLAS/OpenMP) threads
+    max_memory_mb: Optional[int] = None  # Working-set budget for a prediction chunk / training sample
+    
+    def effective_n_jobs(self) -> int:
+        """n_jobs resolved against the machine's cores and the thread cap"""
+        cores = os.cpu_count() or 1
+        n_jobs = cores if self.n_jobs is None or self.n_jobs < 0 else max(1, self.n_jobs)
+        n_jobs = min(n_jobs, cores)
+        return min(n_jobs, self.max_threads) if self.max_threads else n_jobs
+    
+    def thread_limit(self):
+        """Context manager capping native thread pools to max_threads"""
+        return threadpool_limits(limits=self.max_threads) if self.max_threads else contextlib.nullcontext()
+
 class PatternConfidenceEngine:
-    def __init__(self, db_path):
+    def __init__(self, db_path, model_path=None, resources=None):
         self.db_path = db_path
-        self.model = RandomForestClassifier(n_estimators=100)
-        self.vectorizer = TfidfVectorizer(max_features=1000)
+        self.resources = resources or ResourceLimits()
+        self.model_path = Path(model_path) if model_path else Path(db_path).with_name('confidence_model.joblib')
+        self.metadata_path = self.model_path.with_suffix('.json')
+        self.model = None  # Loaded lazily on first prediction
+        self.model_metadata = {}
+        self.row_checksums = None  # mapping_id -> checksum of the row version the model learned
+        self.text_hasher = make_text_hasher()
+        self.tfidf = None  # Fitted with the model; idf has a fixed TEXT_HASH_FEATURES width
+        self._scoring_snapshot = (None, None, 0)  # (model, tfidf, model_version), swapped as one
+        self.feature_store = PatternFeatureStore(db_path)
+        
+        # Incremental retraining settings (see update_model_incrementally)
+        self.trees_per_update = 10
+        self.max_estimators = 300  # Past this a full retrain compacts the forest
+        self.anchor_rows = 50  # Historical rows borrowed when the delta has one class
+        self._model_lock = threading.RLock()
+        self._retrain_stop = threading.Event()
+        self._retrain_thread = None
+        
+        # Bounded LRU of final scores keyed by (pattern, context, frequency bucket, model version,
+        # feature table version) - other processes ingesting features invalidate it too
+        self.model_version = 0
+        self.cache_size = 50000
+        self._score_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_feature_version = self.feature_store.version()
+        self._cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+        
+    def extract_pattern_features(self, pattern_text, context, frequency=None):
+        """Extract features for ML confidence scoring
         
-    def extract_pattern_features(self, pattern_text, context, frequency):
-        """Extract features for ML confidence scoring"""
+        Corpus statistics come from the precomputed feature table; frequency
+        defaults to the pattern's total corpus occurrence count.
+        """
+        total_count, save_count, game_count, positional_spread = self.feature_store.lookup([pattern_text])[0]
         features = {
             'pattern_length': len(pattern_text),
             'has_underscore': '_' in pattern_text,
-            'frequency_score': frequency,
+            'frequency_score': frequency if frequency is not None else total_count,
             'context_relevance': self.calculate_context_relevance(pattern_text, context),
             'game_keyword_match': self.count_game_keywords(pattern_text),
-            'structural_indicators': self.detect_structural_patterns(pattern_text)
+            'structural_indicators': self.detect_structural_patterns(pattern_text),
+            'save_count': save_count,
+            'game_count': game_count,
+            'positional_spread': positional_spread
         }
         return features
     
     def calculate_context_relevance(self, pattern, context):
         """Score how well pattern matches expected game context"""
-        game_keywords = ['quest', 'character', 'decision', 'act', 'choice', 'fact']
         context_lower = context.lower()
-        return sum(1 for keyword in game_keywords if keyword in context_lower)
+        return sum(1 for keyword in CONTEXT_KEYWORDS if keyword in context_lower)
     
     def count_game_keywords(self, pattern):
         """Count game-specific patterns in the text"""
-        witcher_patterns = ['quest', 'aryan', 'roche', 'iorveth', 'facts', 'choice']
         pattern_lower = pattern.lower()
-        return sum(1 for wp in witcher_patterns if wp in pattern_lower)
+        return sum(1 for wp in WITCHER_KEYWORDS if wp in pattern_lower)
     
     def detect_structural_patterns(self, pattern):
         """Detect structural indicators of valid game data"""
@@ -45,67 +157,667 @@ class PatternConfidenceEngine:
         if len(pattern) == 4 and pattern.isupper(): indicators += 2  # DZIP headers
         return indicators
     
-    def train_confidence_model(self):
-        """Train ML model on existing verified patterns"""
+    def count_keywords_batch(self, texts, keywords):
+        """Vectorized keyword hit count over an array of lowercased strings"""
+        counts = np.zeros(len(texts), dtype=np.int64)
+        for keyword in keywords:
+            counts += np.char.find(texts, keyword) >= 0
+        return counts
+    
+    def detect_structural_patterns_batch(self, patterns):
+        """Vectorized detect_structural_patterns over an array of strings"""
+        is_upper = np.char.isupper(patterns)
+        has_system = np.char.find(patterns, 'System') >= 0
+        is_header = is_upper & (np.char.str_len(patterns) == 4)
+        return is_upper.astype(np.int64) + has_system + 2 * is_header
+    
+    def extract_feature_matrix(self, pattern_texts, contexts, frequencies=None):
+        """Build the feature matrix for a whole batch of patterns at once
+        
+        Produces the same columns as extract_pattern_features (see FEATURE_NAMES)
+        without any per-row Python work, so thousands of candidates cost a
+        handful of numpy string operations. Missing frequencies (None) fall back
+        to the corpus occurrence count from the feature table.
+        """
+        patterns = np.array([p or '' for p in pattern_texts], dtype=str)
+        context_array = np.array([c or '' for c in contexts], dtype=str)
+        
+        if len(patterns) == 0:
+            return np.empty((0, len(FEATURE_NAMES)))
+        
+        corpus = np.array(self.feature_store.lookup(patterns.tolist()), dtype=np.float64).reshape(len(patterns), 4)
+        if frequencies is None:
+            frequencies = corpus[:, 0]
+        else:
+            frequencies = np.array([np.nan if f is None else f for f in frequencies], dtype=np.float64)
+            frequencies = np.where(np.isnan(frequencies), corpus[:, 0], frequencies)
+        
+        return np.column_stack([
+            np.char.str_len(patterns),
+            np.char.find(patterns, '_') >= 0,
+            frequencies,
+            self.count_keywords_batch(np.char.lower(context_array), CONTEXT_KEYWORDS),
+            self.count_keywords_batch(np.char.lower(patterns), WITCHER_KEYWORDS),
+            self.detect_structural_patterns_batch(patterns),
+            corpus[:, 1:]
+        ]).astype(np.float64)
+    
+    def load_training_rows(self):
+        """Load the labelled PatternGameMapping rows used for training"""
         conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(f"""
+                SELECT mapping_id, pattern_text, context_clues, confidence_level,
+                       verification_status, updated_at
+                FROM PatternGameMapping 
+                WHERE verification_status IN ({','.join('?' * len(TRAINING_STATUSES))})
+                ORDER BY mapping_id
+            """, TRAINING_STATUSES).fetchall()
+        finally:
+            conn.close()
+    
+    def load_rows_since(self, high_water_mark):
+        """Load labelled rows updated after the (updated_at, mapping_id) high-water mark"""
+        updated_at, mapping_id = high_water_mark
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(f"""
+                SELECT mapping_id, pattern_text, context_clues, confidence_level,
+                       verification_status, updated_at
+                FROM PatternGameMapping 
+                WHERE verification_status IN ({','.join('?' * len(TRAINING_STATUSES))})
+                  AND (updated_at > ? OR (updated_at = ? AND mapping_id > ?))
+                ORDER BY updated_at, mapping_id
+            """, (*TRAINING_STATUSES, updated_at, updated_at, mapping_id)).fetchall()
+        finally:
+            conn.close()
+    
+    def load_anchor_rows(self, label, exclude_ids):
+        """Load a bounded sample of recent historical rows carrying the given label"""
+        condition = ("verification_status != 'rejected' AND confidence_level >= 0.85" if label == 1
+                     else "(verification_status = 'rejected' OR confidence_level < 0.85)")
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(f"""
+                SELECT mapping_id, pattern_text, context_clues, confidence_level,
+                       verification_status, updated_at
+                FROM PatternGameMapping 
+                WHERE verification_status IN ({','.join('?' * len(TRAINING_STATUSES))})
+                  AND {condition}
+                ORDER BY updated_at DESC
+                LIMIT ?
+            """, (*TRAINING_STATUSES, self.anchor_rows + len(exclude_ids))).fetchall()
+        finally:
+            conn.close()
+        return [row for row in rows if row[0] not in exclude_ids][:self.anchor_rows]
+    
+    def mark_pattern_verification(self, mapping_id, status):
+        """Record an agent's verdict on a pattern and bump its updated_at
         
-        # Get training data from verified patterns
-        verified_patterns = conn.execute("""
-            SELECT pattern_text, context_clues, confidence_level, verification_status
-            FROM PatternGameMapping 
-            WHERE verification_status IN ('confirmed', 'pending')
-        """).fetchall()
-        
-        features = []
-        labels = []
-        
-        for pattern, context, confidence, status in verified_patterns:
-            # Create synthetic frequency data for training
-            frequency = np.random.randint(1, 10)
-            feature_dict = self.extract_pattern_features(pattern, context, frequency)
-            features.append(list(feature_dict.values()))
+        updated_at only defaults on insert, so verdicts must go through here (or
+        set updated_at themselves) for incremental retraining to see them.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("""
+                UPDATE PatternGameMapping
+                SET verification_status = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE mapping_id = ?
+            """, (status, mapping_id))
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def high_water_mark(self, rows, current=None):
+        """Latest (updated_at, mapping_id) seen in the given rows"""
+        marks = [(row[5] or '', row[0]) for row in rows]
+        if current is not None:
+            marks.append(tuple(current))
+        return max(marks) if marks else ('', 0)
+    
+    def training_data(self, rows, tfidf=None):
+        """Turn labelled PatternGameMapping rows into a sparse feature matrix and labels"""
+        _, patterns, contexts, confidences, statuses, _ = zip(*rows)
+        
+        # Frequencies come from the precomputed corpus feature table
+        features = self.build_model_input(patterns, contexts, tfidf=tfidf)
+        
+        # Convert confidence to binary classification (high/low); rejected is always low
+        labels = (np.array(confidences, dtype=np.float64) >= 0.85).astype(int)
+        labels[np.array(statuses) == 'rejected'] = 0
+        
+        return features, labels
+    
+    def training_fingerprint(self, rows):
+        """Hash of the training rows and feature table - changes whenever either changes"""
+        digest = hashlib.sha256(f"schema:{FEATURE_SCHEMA_VERSION}".encode('utf-8'))
+        digest.update(json.dumps(self.feature_store.table_version()).encode('utf-8'))
+        for row in rows:
+            digest.update(json.dumps(row, default=str).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def row_checksum(self, row):
+        """Checksum of a training row's labelled content (updated_at excluded)"""
+        return zlib.crc32(json.dumps(row[:5], default=str).encode('utf-8'))
+    
+    def delta_can_catch_up(self, rows):
+        """True when every change since the model was saved is visible to a delta update
+        
+        Deltas only see rows whose updated_at moved past the high-water mark.
+        Deleted rows, rows added or edited below the mark without bumping
+        updated_at, and a changed feature table all need a full retrain instead.
+        """
+        learned = self.row_checksums
+        if learned is None:
+            return False
+        if self.model_metadata.get('feature_table_version') != list(self.feature_store.table_version()):
+            return False
+        
+        high_water_mark = tuple(self.model_metadata.get('high_water_mark') or ('', 0))
+        current_ids = set()
+        for row in rows:
+            current_ids.add(row[0])
+            if (row[5] or '', row[0]) <= high_water_mark and learned.get(row[0]) != self.row_checksum(row):
+                return False
+        return learned.keys() <= current_ids
+    
+    def read_model_metadata(self):
+        """Read the persisted model's metadata without unpickling the model"""
+        if not self.metadata_path.exists() or not self.model_path.exists():
+            return None
+        try:
+            with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def is_model_current(self, fingerprint):
+        """True when the persisted model matches the feature schema and training data"""
+        metadata = self.read_model_metadata()
+        return (metadata is not None
+                and metadata.get('schema_version') == FEATURE_SCHEMA_VERSION
+                and metadata.get('training_fingerprint') == fingerprint)
+    
+    def save_model(self, fingerprint, training_rows, high_water_mark, delta_updates=0):
+        """Persist the trained model plus its schema version and data fingerprint
+        
+        delta_updates counts incremental updates since the last full training;
+        the fingerprint is that full training's, as deltas don't recompute it.
+        Per-row checksums go in the artifact so startup can tell whether a delta
+        is enough to catch up (see delta_can_catch_up).
+        """
+        self.model_metadata = {
+            'schema_version': FEATURE_SCHEMA_VERSION,
+            'training_fingerprint': fingerprint,
+            'training_rows': training_rows,
+            'high_water_mark': list(high_water_mark),
+            'feature_table_version': list(self.feature_store.table_version()),
+            'delta_updates': delta_updates,
+            'trained_at': time.time()
+        }
+        
+        self.model_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_model_path = self.model_path.with_name(self.model_path.name + '.tmp')
+        joblib.dump({'metadata': self.model_metadata, 'model': self.model, 'tfidf': self.tfidf,
+                     'row_checksums': self.row_checksums}, temp_model_path)
+        os.replace(temp_model_path, self.model_path)
+        
+        # Metadata is written last so it never describes a half-written model
+        temp_metadata_path = self.metadata_path.with_name(self.metadata_path.name + '.tmp')
+        with open(temp_metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(self.model_metadata, f, indent=2)
+        os.replace(temp_metadata_path, self.metadata_path)
+    
+    def load_model(self):
+        """Load the persisted model if it was built with the current feature schema"""
+        if not self.model_path.exists():
+            return False
+        
+        try:
+            artifact = joblib.load(self.model_path)
+        except Exception as e:
+            print(f"⚠️ Could not load confidence model {self.model_path}: {e}")
+            return False
+        
+        metadata = artifact.get('metadata', {})
+        if metadata.get('schema_version') != FEATURE_SCHEMA_VERSION:
+            print(f"Confidence model schema v{metadata.get('schema_version')} is stale (expected v{FEATURE_SCHEMA_VERSION})")
+            return False
+        
+        self.install_model(self.apply_resource_limits(artifact['model']), artifact.get('tfidf'))
+        self.model_metadata = metadata
+        self.row_checksums = artifact.get('row_checksums')
+        return True
+    
+    def new_forest(self, n_estimators, random_state=0, n_rows=None):
+        """RandomForestClassifier configured with the engine's resource limits"""
+        return RandomForestClassifier(
+            n_estimators=n_estimators,
+            random_state=random_state,
+            n_jobs=self.resources.effective_n_jobs(),
+            max_samples=self.training_sample_size(n_rows)
+        )
+    
+    def training_sample_size(self, n_rows):
+        """Per-tree bootstrap sample size that keeps training inside max_memory_mb
+        
+        Tree size grows with the rows it is fitted on, so bounding each tree's
+        bootstrap sample bounds the forest's memory. None means use all rows.
+        """
+        if not self.resources.max_memory_mb or not n_rows:
+            return None
+        
+        # Each parallel worker holds its bootstrap sample plus a tree of similar size
+        bytes_per_row = 2 * (SCORING_ROW_BYTES - 2 * 4 * 256)
+        budget_rows = self.resources.max_memory_mb * 1024 * 1024 // (bytes_per_row * self.resources.effective_n_jobs())
+        # Never 0 - sklearn rejects max_samples=0, and one row per tree still trains
+        return max(1, int(budget_rows)) if budget_rows < n_rows else None
+    
+    def prediction_chunk_rows(self):
+        """Rows scored per predict_proba call so a chunk fits in max_memory_mb"""
+        if not self.resources.max_memory_mb:
+            return None
+        
+        # predict_proba keeps one probability buffer per worker on top of the features
+        bytes_per_row = SCORING_ROW_BYTES + 16 * (self.resources.effective_n_jobs() + 1)
+        return max(1, self.resources.max_memory_mb * 1024 * 1024 // bytes_per_row)
+    
+    def apply_resource_limits(self, model):
+        """Re-apply this engine's worker count to a loaded or grown model"""
+        model.n_jobs = self.resources.effective_n_jobs()
+        return model
+    
+    def install_model(self, model, tfidf):
+        """Swap in a new model; bumps model_version so cached scores stop matching"""
+        self.tfidf = tfidf
+        self.model = model
+        self.model_version += 1
+        self._scoring_snapshot = (model, tfidf, self.model_version)
+        self.clear_score_cache()
+    
+    def scoring_snapshot(self):
+        """(model, tfidf, model_version) as installed together
+        
+        A batch scores with one snapshot throughout, so a retrain finishing
+        mid-batch can't pair the old forest with the new idf weights.
+        """
+        self.ensure_model()
+        return self._scoring_snapshot
+    
+    def clear_score_cache(self):
+        """Drop every cached score (on retrain or when corpus features change)"""
+        with self._cache_lock:
+            if self._score_cache:
+                self._cache_stats['invalidations'] += 1
+            self._score_cache.clear()
+            self._cache_feature_version = self.feature_store.version()
+    
+    def cache_stats(self):
+        """Scoring cache hit-rate metrics"""
+        with self._cache_lock:
+            lookups = self._cache_stats['hits'] + self._cache_stats['misses']
+            return {
+                **self._cache_stats,
+                'size': len(self._score_cache),
+                'capacity': self.cache_size,
+                'hit_rate': self._cache_stats['hits'] / lookups if lookups else 0.0
+            }
+    
+    def frequency_bucket(self, frequency):
+        """Power-of-two bucket of a frequency; None (corpus frequency) is its own bucket"""
+        if frequency is None:
+            return -1
+        return int(frequency).bit_length() if frequency > 0 else 0
+    
+    def ensure_model(self):
+        """Return the model, loading the persisted artifact or training on first use"""
+        model = self.model
+        if model is not None:
+            return model
+        
+        with self._model_lock:
+            if self.model is None and not self.load_model():
+                self.train_confidence_model(force=True)
+            if self.model is None:
+                raise RuntimeError("No confidence model available - no labelled patterns to train on")
+            return self.model
+    
+    def hash_text(self, pattern_texts, contexts):
+        """Hashed char n-gram counts for pattern_text and context, side by side"""
+        return sp.hstack([
+            self.text_hasher.transform([p or '' for p in pattern_texts]),
+            self.text_hasher.transform([c or '' for c in contexts])
+        ], format='csr')
+    
+    def build_model_input(self, pattern_texts, contexts, frequencies=None, tfidf=None):
+        """Sparse model input: dense hand-built features followed by TF-IDF n-grams"""
+        tfidf = tfidf or self.tfidf
+        text_features = self.hash_text(pattern_texts, contexts)
+        if tfidf is not None:
+            text_features = tfidf.transform(text_features)
+        
+        dense_features = sp.csr_matrix(self.extract_feature_matrix(pattern_texts, contexts, frequencies))
+        return sp.hstack([dense_features, text_features], format='csr')
+    
+    def train_confidence_model(self, force=False):
+        """Train ML model on existing verified patterns
+        
+        Training is skipped when the persisted model already matches the current
+        feature schema and labelled data; the model is then loaded lazily on the
+        first prediction instead of being rebuilt at startup.
+        """
+        with self._model_lock:
+            metadata = self.read_model_metadata()
+            verified_patterns = self.load_training_rows()
+            if (not force and metadata and metadata.get('delta_updates')
+                    and metadata.get('schema_version') == FEATURE_SCHEMA_VERSION):
+                # Grown by delta updates since its fingerprint was taken - catch up on the delta
+                # only, unless rows were deleted or edited in ways the delta cannot see
+                if (self.model is not None or self.load_model()) and self.delta_can_catch_up(verified_patterns):
+                    print("Confidence model was grown incrementally - learning only rows changed since")
+                    return self.update_model_incrementally() > 0
+                print("Labelled data changed below the incremental high-water mark - retraining from scratch")
+                force = True
+            
+            fingerprint = self.training_fingerprint(verified_patterns)
             
-            # Convert confidence to binary classification (high/low)
-            labels.append(1 if confidence >= 0.85 else 0)
+            if not force and self.is_model_current(fingerprint):
+                print(f"Confidence model up to date ({len(verified_patterns)} verified patterns) - skipping training")
+                return False
+            
+            if verified_patterns:
+                _, patterns, contexts, _, _, _ = zip(*verified_patterns)
+                tfidf = TfidfTransformer().fit(self.hash_text(patterns, contexts))
+                features, labels = self.training_data(verified_patterns, tfidf)
+                
+                model = self.new_forest(100, n_rows=len(labels))
+                with self.resources.thread_limit():
+                    model.fit(features, labels)
+                self.install_model(model, tfidf)
+                self.row_checksums = {row[0]: self.row_checksum(row) for row in verified_patterns}
+                self.save_model(fingerprint, len(verified_patterns), self.high_water_mark(verified_patterns))
+                print(f"Trained confidence model on {len(labels)} verified patterns")
+                return True
+            
+            return False
+    
+    def update_model_incrementally(self):
+        """Grow the forest with trees trained only on rows changed since the last update
+        
+        Rows past the stored high-water mark on (updated_at, mapping_id) are fitted
+        into a small forest whose trees are appended to the current model, so the
+        cost scales with the delta rather than the whole table. The existing trees
+        are shared, not copied, and the new model is swapped in atomically -
+        concurrent scoring keeps using the previous forest until then. The
+        training-data fingerprint is carried over rather than recomputed; only
+        full retrains (compactions) hash the table.
+        
+        Returns the number of delta rows learned from.
+        """
+        with self._model_lock:
+            model = self.ensure_model()
+            high_water_mark = tuple(self.model_metadata.get('high_water_mark') or ('', 0))
+            delta_rows = self.load_rows_since(high_water_mark)
+            if not delta_rows:
+                return 0
+            
+            if len(model.estimators_) + self.trees_per_update > self.max_estimators or len(model.classes_) < 2:
+                # Forest is full (or never saw both classes) - compact with a full retrain
+                self.train_confidence_model(force=True)
+                return len(delta_rows)
+            
+            features, labels = self.training_data(delta_rows)
+            
+            # New trees need both classes so their probabilities line up with the forest
+            for missing_label in set(model.classes_) - set(labels):
+                anchors = self.load_anchor_rows(missing_label, {row[0] for row in delta_rows})
+                if not anchors:
+                    return 0  # Nothing to anchor with yet - keep the delta for later
+                anchor_features, anchor_labels = self.training_data(anchors)
+                features = sp.vstack([features, anchor_features], format='csr')
+                labels = np.concatenate([labels, anchor_labels])
+            
+            delta_forest = self.new_forest(self.trees_per_update, random_state=len(model.estimators_), n_rows=len(labels))
+            with self.resources.thread_limit():
+                delta_forest.fit(features, labels)
+            
+            updated_model = self.apply_resource_limits(copy.copy(model))
+            updated_model.estimators_ = model.estimators_ + delta_forest.estimators_
+            updated_model.n_estimators = len(updated_model.estimators_)
+            self.install_model(updated_model, self.tfidf)
+            if self.row_checksums is not None:
+                self.row_checksums.update((row[0], self.row_checksum(row)) for row in delta_rows)
+            
+            self.save_model(
+                self.model_metadata.get('training_fingerprint'),
+                self.model_metadata.get('training_rows', 0) + len(delta_rows),
+                self.high_water_mark(delta_rows, high_water_mark),
+                self.model_metadata.get('delta_updates', 0) + 1
+            )
+            print(f"Incrementally trained confidence model on {len(delta_rows)} updated patterns "
+                  f"({updated_model.n_estimators} trees)")
+            return len(delta_rows)
+    
+    def start_incremental_training(self, poll_interval=30.0):
+        """Run update_model_incrementally on a background thread every poll_interval seconds"""
+        if self._retrain_thread is not None and self._retrain_thread.is_alive():
+            return self._retrain_thread
         
-        if len(features) > 0:
-            self.model.fit(features, labels)
-            print(f"Trained confidence model on {len(features)} verified patterns")
+        self._retrain_stop.clear()
         
-        conn.close()
+        def retrain_loop():
+            while not self._retrain_stop.wait(poll_interval):
+                try:
+                    self.update_model_incrementally()
+                except Exception as e:
+                    print(f"⚠️ Incremental confidence training failed: {e}")
+        
+        self._retrain_thread = threading.Thread(target=retrain_loop, name="ConfidenceRetrainer", daemon=True)
+        self._retrain_thread.start()
+        return self._retrain_thread
+    
+    def stop_incremental_training(self, timeout=None):
+        """Stop the background retraining thread"""
+        self._retrain_stop.set()
+        if self._retrain_thread is not None:
+            self._retrain_thread.join(timeout)
+            self._retrain_thread = None
     
-    def predict_confidence(self, pattern_text, context, frequency):
+    def predict_confidence(self, pattern_text, context, frequency=None):
         """Predict confidence score for new pattern"""
-        features = self.extract_pattern_features(pattern_text, context, frequency)
-        feature_vector = np.array(list(features.values())).reshape(1, -1)
+        return float(self.predict_confidence_batch([pattern_text], [context], [frequency])[0])
+    
+    def predict_confidence_batch(self, pattern_texts, contexts, frequencies=None):
+        """Predict confidence scores for many patterns with one predict_proba call
+        
+        Repeats of a (pattern, context, frequency bucket) already scored by the
+        current model against the current feature table come from the score cache; only the misses reach the
+        forest. Frequencies within one power-of-two bucket share a cached score.
+        """
+        pattern_texts = list(pattern_texts)
+        contexts = [context or '' for context in contexts]
+        frequencies = list(frequencies) if frequencies is not None else [None] * len(pattern_texts)
+        if not pattern_texts:
+            return np.empty(0)
+        
+        snapshot = self.scoring_snapshot()
+        feature_version = self.feature_store.version()
+        if self._cache_feature_version != feature_version:
+            self.clear_score_cache()
+        
+        model_version = snapshot[2]
+        keys = [
+            (pattern_text, context, self.frequency_bucket(frequency), model_version, feature_version)
+            for pattern_text, context, frequency in zip(pattern_texts, contexts, frequencies)
+        ]
+        
+        confidences = np.empty(len(keys))
+        miss_rows = {}  # key -> row indices, so duplicates inside a batch are scored once
+        with self._cache_lock:
+            for row, key in enumerate(keys):
+                cached = self._score_cache.get(key)
+                if cached is not None:
+                    self._score_cache.move_to_end(key)
+                    confidences[row] = cached
+                    self._cache_stats['hits'] += 1
+                else:
+                    miss_rows.setdefault(key, []).append(row)
+                    self._cache_stats['misses'] += 1
         
-        # Get probability of high confidence
-        confidence_prob = self.model.predict_proba(feature_vector)[0][1]
+        misses = sum(len(rows) for rows in miss_rows.values())
+        count('score_cache_hits', len(keys) - misses)
+        count('score_cache_misses', misses)
+        
+        if miss_rows:
+            first_rows = [rows[0] for rows in miss_rows.values()]
+            with span('score'):
+                scores = self.score_uncached(
+                    [pattern_texts[row] for row in first_rows],
+                    [contexts[row] for row in first_rows],
+                    [frequencies[row] for row in first_rows],
+                    snapshot
+                )
+            
+            with self._cache_lock:
+                for (key, rows), score in zip(miss_rows.items(), scores):
+                    confidences[rows] = score
+                    if key[3] == self.model_version:
+                        self._score_cache[key] = float(score)
+                while len(self._score_cache) > self.cache_size:
+                    self._score_cache.popitem(last=False)
+                    self._cache_stats['evictions'] += 1
+        
+        return confidences
+    
+    def score_uncached(self, pattern_texts, contexts, frequencies, snapshot=None):
+        """Score a batch with the forest, chunked when a memory limit is configured
+        
+        Every chunk uses the same scoring_snapshot(), taken once up front.
+        """
+        model, tfidf, _ = snapshot or self.scoring_snapshot()
+        high_class = list(model.classes_).index(1) if 1 in model.classes_ else None
+        chunk_rows = self.prediction_chunk_rows() or len(pattern_texts)
+        
+        confidence_prob = np.zeros(len(pattern_texts))
+        with self.resources.thread_limit():
+            for start in range(0, len(pattern_texts), chunk_rows):
+                end = start + chunk_rows
+                feature_matrix = self.build_model_input(
+                    pattern_texts[start:end],
+                    contexts[start:end],
+                    frequencies[start:end] if frequencies is not None else None,
+                    tfidf=tfidf
+                )
+                
+                # Get probability of high confidence
+                if high_class is not None:
+                    confidence_prob[start:end] = model.predict_proba(feature_matrix)[:, high_class]
         
         # Convert to 0.5-0.95 range for game analysis
         return 0.5 + (confidence_prob * 0.45)
     
     def auto_score_new_patterns(self, discovered_patterns):
-        """Automatically score newly discovered patterns"""
-        scored_patterns = []
+        """Automatically score newly discovered patterns in a single batch"""
+        if not discovered_patterns:
+            return []
         
-        for pattern_data in discovered_patterns:
-            predicted_confidence = self.predict_confidence(
-                pattern_data['pattern'],
-                pattern_data.get('context', ''),
-                pattern_data.get('frequency', 1)
-            )
-            
-            pattern_data['ml_confidence'] = predicted_confidence
+        predicted_confidences = self.predict_confidence_batch(
+            [pattern_data['pattern'] for pattern_data in discovered_patterns],
+            [pattern_data.get('context', '') for pattern_data in discovered_patterns],
+            [pattern_data.get('frequency') for pattern_data in discovered_patterns]
+        )
+        
+        scored_patterns = []
+        for pattern_data, predicted_confidence in zip(discovered_patterns, predicted_confidences):
+            pattern_data['ml_confidence'] = float(predicted_confidence)
             pattern_data['verification_status'] = 'ml_pending'
             scored_patterns.append(pattern_data)
         
         return scored_patterns
 
+def benchmark_forest_sizes(forest_sizes=(50, 100, 200, 400), n_rows=20000, resources=None, seed=0):
+    """Measure fit and predict throughput (rows/s) for different forest sizes
+    
+    Uses a synthetic matrix shaped like the model input (FEATURE_NAMES plus
+    hashed n-grams of generated pattern names) so the numbers reflect the
+    forest and its parallelism settings, not the database.
+    """
+    resources = resources or ResourceLimits()
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(WITCHER_KEYWORDS + CONTEXT_KEYWORDS + ['path', 'state', 'flag', 'System', 'DZIP'])
+    pattern_texts = ['_'.join(words) for words in rng.choice(vocabulary, size=(n_rows, 2))]
+    text_hasher = make_text_hasher()
+    dense_features = np.column_stack([
+        rng.integers(3, 40, n_rows),        # pattern_length
+        rng.integers(0, 2, n_rows),         # has_underscore
+        rng.integers(0, 500, n_rows),       # frequency_score
+        rng.integers(0, 4, n_rows),         # context_relevance
+        rng.integers(0, 3, n_rows),         # game_keyword_match
+        rng.integers(0, 4, n_rows),         # structural_indicators
+        rng.integers(0, 50, n_rows),        # save_count
+        rng.integers(0, 4, n_rows),         # game_count
+        rng.random(n_rows)                  # positional_spread
+    ]).astype(np.float64)
+    features = sp.hstack([
+        sp.csr_matrix(dense_features),
+        text_hasher.transform(pattern_texts),
+        text_hasher.transform(pattern_texts)
+    ], format='csr')
+    labels = (dense_features[:, 4] + dense_features[:, 7] + rng.normal(0, 1, n_rows) > 2).astype(int)
+    
+    results = []
+    for n_estimators in forest_sizes:
+        model = RandomForestClassifier(
+            n_estimators=n_estimators,
+            random_state=seed,
+            n_jobs=resources.effective_n_jobs()
+        )
+        with resources.thread_limit():
+            fit_start = time.perf_counter()
+            model.fit(features, labels)
+            fit_seconds = time.perf_counter() - fit_start
+            
+            predict_start = time.perf_counter()
+            model.predict_proba(features)
+            predict_seconds = time.perf_counter() - predict_start
+        
+        results.append({
+            'n_estimators': n_estimators,
+            'n_jobs': resources.effective_n_jobs(),
+            'rows': n_rows,
+            'fit_seconds': fit_seconds,
+            'fit_rows_per_second': n_rows / fit_seconds,
+            'predict_seconds': predict_seconds,
+            'predict_rows_per_second': n_rows / predict_seconds
+        })
+    
+    return results
+
 # Usage for Witcher save analysis
-def integrate_ml_confidence():
-    engine = PatternConfidenceEngine('database/witcher_save_manager.db')
-    engine.train_confidence_model()
+def integrate_ml_confidence(resources=None):
+    engine = PatternConfidenceEngine('database/witcher_save_manager.db', resources=resources)
+    engine.train_confidence_model()  # No-op when the labelled data is unchanged
     
     # This would integrate with our DZIP analysis
     return engine
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ML Pattern Confidence Engine")
+    parser.add_argument('--benchmark', action='store_true', help='Report fit/predict throughput per forest size')
+    parser.add_argument('--n-jobs', type=int, default=1, help='Forest workers (-1 = all cores)')
+    parser.add_argument('--max-threads', type=int, default=None, help='Cap on worker and native threads')
+    parser.add_argument('--max-memory-mb', type=int, default=None, help='Memory budget for scoring chunks and training samples')
+    parser.add_argument('--forest-sizes', type=int, nargs='+', default=[50, 100, 200, 400])
+    parser.add_argument('--rows', type=int, default=20000, help='Synthetic rows for --benchmark')
+    args = parser.parse_args()
+    
+    resources = ResourceLimits(n_jobs=args.n_jobs, max_threads=args.max_threads, max_memory_mb=args.max_memory_mb)
+    
+    if args.benchmark:
+        print(f"🌲 Confidence forest benchmark ({args.rows:,} rows, n_jobs={resources.effective_n_jobs()})")
+        print(f"{'trees':>6} {'fit s':>8} {'fit rows/s':>12} {'predict s':>10} {'predict rows/s':>15}")
+        for row in benchmark_forest_sizes(args.forest_sizes, args.rows, resources):
+            print(f"{row['n_estimators']:>6} {row['fit_seconds']:>8.3f} {row['fit_rows_per_second']:>12,.0f} "
+                  f"{row['predict_seconds']:>10.3f} {row['predict_rows_per_second']:>15,.0f}")
+    else:
+        integrate_ml_confidence(resources)
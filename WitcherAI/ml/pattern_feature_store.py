@@ -0,0 +1,237 @@
+# Pattern Feature Store
+# Aggregates real per-pattern statistics from hex analysis results into a compact
+# feature table, so the confidence engine trains and scores on measured corpus
+# frequencies instead of synthetic ones
+
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from instrumentation import count, span
+from witcher_hex_analyzer import HIT_MODE_FIRST, AnalysisResult, WitcherHexAnalyzer
+
+# Per-pattern corpus features, in the order returned by lookup()
+CORPUS_FEATURE_NAMES = ['total_count', 'save_count', 'game_count', 'positional_spread']
+
+class PatternFeatureStore:
+    """Compact per-pattern feature table backed by the knowledge database
+
+    PatternSaveOccurrence keeps one row per (pattern, save) so re-analysing a
+    save replaces its numbers instead of double counting them. PatternFeatures
+    is the aggregated table read at training and inference time. Both are
+    part of database/initialize_database.sql; reading a database that predates
+    them yields zero features, and the first ingest adds them.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._features = None  # pattern_text -> tuple of CORPUS_FEATURE_NAMES values
+        self._features_version = None  # version() the cached features were loaded at
+        self._version = None
+        self._version_checked_at = 0.0
+        self.revalidate_interval = 1.0  # Seconds between table_version() checks for other writers
+        self._schema_checked = False
+        self._lock = threading.Lock()
+
+    def ensure_schema(self):
+        """Create the occurrence and feature tables if they are missing (older databases)"""
+        if self._schema_checked:
+            return
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS PatternSaveOccurrence (
+                    pattern_text TEXT NOT NULL,
+                    save_path TEXT NOT NULL,
+                    game TEXT NOT NULL,
+                    occurrence_count INTEGER NOT NULL,
+                    first_offset INTEGER,
+                    last_offset INTEGER,
+                    file_size INTEGER NOT NULL,
+                    analyzed_at REAL NOT NULL,
+                    PRIMARY KEY (pattern_text, save_path)
+                );
+                CREATE TABLE IF NOT EXISTS PatternFeatures (
+                    pattern_text TEXT PRIMARY KEY,
+                    total_count INTEGER NOT NULL,
+                    save_count INTEGER NOT NULL,
+                    game_count INTEGER NOT NULL,
+                    positional_spread REAL NOT NULL, -- mean (last - first) / file_size across saves
+                    updated_at REAL NOT NULL
+                );
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+        self._schema_checked = True
+
+    def ingest_analysis(self, result: AnalysisResult, game: str):
+        """Record one analysed save's pattern occurrences and refresh their features"""
+        game = game.lower()  # Agents name games 'Witcher2' or 'witcher2'; game_count must not split them
+        save_path = str(Path(result.file_path).resolve())
+        now = time.time()
+        rows = []
+        for pattern in result.patterns_found:
+            pattern_text = pattern['pattern']
+            if isinstance(pattern_text, bytes):
+                pattern_text = pattern_text.decode('utf-8', errors='ignore')
+            positions = pattern.get('positions') or []
+            rows.append((
+                pattern_text,
+                save_path,
+                game,
+                pattern['count'],
+                positions[0] if positions else None,
+                pattern.get('last_position', positions[-1] if positions else None),
+                result.file_size,
+                now
+            ))
+
+        with span('store'):
+            self._store_occurrences(save_path, rows)
+        count('rows_stored', len(rows))
+
+        self._version = None  # Re-read on next use; the cached features are now stale
+        return len(rows)
+
+    def _store_occurrences(self, save_path: str, rows: List[Tuple]):
+        self.ensure_schema()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # Patterns that disappeared from a re-analysed save must drop out too
+            previous = {row[0] for row in conn.execute(
+                "SELECT pattern_text FROM PatternSaveOccurrence WHERE save_path = ?", (save_path,))}
+            conn.execute("DELETE FROM PatternSaveOccurrence WHERE save_path = ?", (save_path,))
+            conn.executemany("""
+                INSERT INTO PatternSaveOccurrence
+                (pattern_text, save_path, game, occurrence_count, first_offset, last_offset, file_size, analyzed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self._refresh_features(conn, previous | {row[0] for row in rows})
+            conn.commit()
+        finally:
+            conn.close()
+
+    def ingest_files(self, file_paths: Iterable[str], game: str, analyzer: WitcherHexAnalyzer = None) -> int:
+        """Analyse save files and ingest their pattern statistics"""
+        analyzer = analyzer or WitcherHexAnalyzer()
+        ingested = 0
+        for file_path in file_paths:
+            result = analyzer.analyze_file(file_path)
+            ingested += self.ingest_analysis(result, game)
+        return ingested
+
+    def ingest_save(self, save_path: str, game: str, analyzer: WitcherHexAnalyzer = None) -> int:
+        """Scan and ingest one save the agents analysed, unless it is unchanged since its last ingest
+
+        Uses the analyzer's quiet scan rather than analyze_file's console
+        report. Safe to call from agent worker threads. Returns the rows
+        stored, 0 when the save was skipped.
+        """
+        path = Path(save_path).resolve()
+        stat = path.stat()
+        with self._lock:
+            if self._ingested_at(str(path), stat.st_size) >= stat.st_mtime:
+                return 0
+            data = path.read_bytes()
+            patterns = (analyzer or WitcherHexAnalyzer()).scan_patterns(data, mode=HIT_MODE_FIRST, k=1)
+            return self.ingest_analysis(AnalysisResult(str(path), len(data), '', patterns, [], {}), game)
+
+    def _ingested_at(self, save_path: str, file_size: int) -> float:
+        """When this save was last ingested at its current size (0 if never)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("""
+                SELECT COALESCE(MAX(analyzed_at), 0) FROM PatternSaveOccurrence
+                WHERE save_path = ? AND file_size = ?
+            """, (save_path, file_size)).fetchone()[0]
+        except sqlite3.OperationalError:
+            return 0
+        finally:
+            conn.close()
+
+    def _refresh_features(self, conn, pattern_texts):
+        """Re-aggregate PatternFeatures for the touched patterns only"""
+        pattern_texts = list(pattern_texts)
+        if not pattern_texts:
+            return
+        placeholders = ','.join('?' * len(pattern_texts))
+        conn.execute(f"DELETE FROM PatternFeatures WHERE pattern_text IN ({placeholders})", pattern_texts)
+        conn.execute(f"""
+            INSERT INTO PatternFeatures
+            (pattern_text, total_count, save_count, game_count, positional_spread, updated_at)
+            SELECT pattern_text,
+                   SUM(occurrence_count),
+                   COUNT(*),
+                   COUNT(DISTINCT game),
+                   AVG(CASE WHEN file_size > 0 AND first_offset IS NOT NULL
+                            THEN (last_offset - first_offset) * 1.0 / file_size
+                            ELSE 0.0 END),
+                   ?
+            FROM PatternSaveOccurrence
+            WHERE pattern_text IN ({placeholders})
+            GROUP BY pattern_text
+        """, [time.time()] + pattern_texts)
+
+    def version(self) -> Tuple[int, float]:
+        """table_version(), re-read at most every revalidate_interval seconds
+
+        The agents ingest through their own stores and processes, so callers
+        caching anything derived from the features should key it on this.
+        """
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at >= self.revalidate_interval:
+            self._version = self.table_version()
+            self._version_checked_at = now
+        return self._version
+
+    def features(self) -> Dict[str, Tuple[int, int, int, float]]:
+        """All precomputed features, cached until the feature table's version changes"""
+        version = self.version()
+        if self._features is None or self._features_version != version:
+            self._features_version = version
+            conn = sqlite3.connect(self.db_path)
+            try:
+                self._features = {
+                    row[0]: tuple(row[1:])
+                    for row in conn.execute(f"""
+                        SELECT pattern_text, {', '.join(CORPUS_FEATURE_NAMES)}
+                        FROM PatternFeatures
+                    """)
+                }
+            except sqlite3.OperationalError:
+                self._features = {}  # Nothing ingested into this database yet
+            finally:
+                conn.close()
+        return self._features
+
+    def lookup(self, pattern_texts: Iterable[str]) -> List[Tuple[int, int, int, float]]:
+        """Corpus features per pattern; patterns never seen in the corpus get zeros"""
+        features = self.features()
+        missing = (0, 0, 0, 0.0)
+        return [features.get(pattern_text, missing) for pattern_text in pattern_texts]
+
+    def table_version(self) -> Tuple[int, float]:
+        """(row count, last update) of PatternFeatures - changes whenever features change"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            count, updated_at = conn.execute(
+                "SELECT COUNT(*), COALESCE(MAX(updated_at), 0) FROM PatternFeatures").fetchone()
+            return count, updated_at
+        except sqlite3.OperationalError:
+            return 0, 0
+        finally:
+            conn.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python pattern_feature_store.py <game> <save_file> [save_file ...]")
+        sys.exit(1)
+
+    store = PatternFeatureStore('database/witcher_save_manager.db')
+    ingested = store.ingest_files(sys.argv[2:], sys.argv[1])
+    print(f"✅ Ingested {ingested} pattern occurrences from {len(sys.argv) - 2} saves")
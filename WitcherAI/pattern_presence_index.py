@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+🧮 Pattern Presence Index
+=========================
+Columnar, bit-packed index of which known patterns occur in which saves,
+with delta-encoded offset lists, for corpus-wide queries without re-analysis
+"""
+
+import argparse
+import base64
+import json
+import sys
+from array import array
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from witcher_hex_analyzer import HIT_MODE_ALL, AnalysisResult, WitcherHexAnalyzer
+
+def pattern_name(pattern) -> str:
+    return pattern.decode('utf-8', errors='ignore') if isinstance(pattern, bytes) else str(pattern)
+
+def delta_encode(positions: Iterable[int]) -> array:
+    """Sorted offsets -> array('I') of gaps (first element is the first offset)"""
+    encoded = array('I')
+    previous = 0
+    for position in sorted(positions):
+        encoded.append(position - previous)
+        previous = position
+    return encoded
+
+def delta_decode(encoded: array) -> List[int]:
+    return list(accumulate(encoded))
+
+class PatternPresenceIndex:
+    """One bitset per pattern over all indexed saves, plus per-save offsets
+
+    Save i is bit i of every pattern's bitset (a Python int), so boolean
+    queries across the whole library are a handful of integer AND/OR/NOT
+    operations. Offsets are kept per (pattern, save) as delta-encoded
+    array('I'), which stays small because pattern hits cluster.
+    Re-adding a save replaces its previous entry.
+    """
+
+    def __init__(self):
+        self.saves: List[str] = []  # bit index -> save path
+        self.save_mtimes: List[float] = []
+        self._save_index: Dict[str, int] = {}
+        self.bitsets: Dict[str, int] = {}
+        self.offsets: Dict[Tuple[str, int], array] = {}
+        self.counts: Dict[Tuple[str, int], int] = {}
+
+    def _slot(self, save_path: str) -> int:
+        """Bit index for a save, clearing whatever it held before"""
+        index = self._save_index.get(save_path)
+        if index is None:
+            index = self._save_index[save_path] = len(self.saves)
+            self.saves.append(save_path)
+            self.save_mtimes.append(0.0)
+            return index
+
+        bit = 1 << index
+        for name in list(self.bitsets):
+            if self.bitsets[name] & bit:
+                self.bitsets[name] &= ~bit
+                self.offsets.pop((name, index), None)
+                self.counts.pop((name, index), None)
+        return index
+
+    def add_patterns(self, save_path: str, patterns: List[Dict], mtime: Optional[float] = None) -> int:
+        """Index one save's pattern hits (_find_patterns dicts or scan_patterns records)"""
+        save_path = str(Path(save_path).resolve())
+        index = self._slot(save_path)
+        if mtime is None:
+            try:
+                mtime = Path(save_path).stat().st_mtime
+            except OSError:
+                mtime = 0.0
+        self.save_mtimes[index] = mtime
+
+        bit = 1 << index
+        for pattern in patterns:
+            name = pattern_name(pattern['pattern'])
+            self.bitsets[name] = self.bitsets.get(name, 0) | bit
+            self.offsets[(name, index)] = delta_encode(pattern.get('positions') or [])
+            self.counts[(name, index)] = pattern['count']
+        return index
+
+    def add_analysis(self, result: AnalysisResult) -> int:
+        """Index an existing AnalysisResult (only the offsets it kept)"""
+        return self.add_patterns(result.file_path, result.patterns_found)
+
+    def add_files(self, file_paths: Iterable[str], analyzer: WitcherHexAnalyzer = None) -> int:
+        """Scan saves quietly and index every offset of every known pattern"""
+        analyzer = analyzer or WitcherHexAnalyzer()
+        indexed = 0
+        for file_path in file_paths:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            self.add_patterns(file_path, analyzer.scan_patterns(data, mode=HIT_MODE_ALL))
+            indexed += 1
+        return indexed
+
+    # Queries - all return bitsets so they compose with &, | and ~
+
+    @property
+    def all_saves(self) -> int:
+        return (1 << len(self.saves)) - 1
+
+    def having(self, pattern: str) -> int:
+        return self.bitsets.get(pattern, 0)
+
+    def query(self, all_of: Iterable[str] = (), any_of: Iterable[str] = (),
+              none_of: Iterable[str] = ()) -> int:
+        """Saves containing every all_of, at least one any_of and no none_of pattern"""
+        result = self.all_saves
+        for pattern in all_of:
+            result &= self.having(pattern)
+        any_of = list(any_of)
+        if any_of:
+            matches = 0
+            for pattern in any_of:
+                matches |= self.having(pattern)
+            result &= matches
+        for pattern in none_of:
+            result &= ~self.having(pattern)
+        return result & self.all_saves
+
+    def decode(self, bitset: int) -> List[str]:
+        """Save paths whose bits are set"""
+        paths = []
+        while bitset:
+            low_bit = bitset & -bitset
+            paths.append(self.saves[low_bit.bit_length() - 1])
+            bitset ^= low_bit
+        return paths
+
+    @staticmethod
+    def cardinality(bitset: int) -> int:
+        return bin(bitset).count('1')
+
+    def positions(self, pattern: str, save_path: str) -> List[int]:
+        index = self._save_index.get(str(Path(save_path).resolve()))
+        encoded = self.offsets.get((pattern, index))
+        return delta_decode(encoded) if encoded is not None else []
+
+    def timeline(self, pattern: str) -> List[Dict]:
+        """Per-save occurrence count and first offset of a pattern, oldest save first"""
+        rows = []
+        for index in sorted(range(len(self.saves)), key=lambda i: self.save_mtimes[i]):
+            encoded = self.offsets.get((pattern, index))
+            rows.append({
+                'save': self.saves[index],
+                'mtime': self.save_mtimes[index],
+                'count': self.counts.get((pattern, index), 0),
+                'first_offset': encoded[0] if encoded else None
+            })
+        return rows
+
+    # Persistence
+
+    def save(self, index_path: str):
+        state = {
+            'saves': self.saves,
+            'save_mtimes': self.save_mtimes,
+            'bitsets': {name: format(bits, 'x') for name, bits in self.bitsets.items()},
+            'offsets': [
+                [name, index, self.counts[(name, index)], base64.b64encode(encoded.tobytes()).decode('ascii')]
+                for (name, index), encoded in self.offsets.items()
+            ]
+        }
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, index_path: str) -> "PatternPresenceIndex":
+        with open(index_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+        index = cls()
+        index.saves = state['saves']
+        index.save_mtimes = state['save_mtimes']
+        index._save_index = {path: i for i, path in enumerate(index.saves)}
+        index.bitsets = {name: int(bits, 16) for name, bits in state['bitsets'].items()}
+        for name, save_index, count, encoded in state['offsets']:
+            offsets = array('I')
+            offsets.frombytes(base64.b64decode(encoded))
+            index.offsets[(name, save_index)] = offsets
+            index.counts[(name, save_index)] = count
+        return index
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build and query the pattern presence index")
+    parser.add_argument('index', help="Index file (JSON)")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    build = subcommands.add_parser('add', help="Analyse saves and add them to the index")
+    build.add_argument('saves', nargs='+')
+
+    query = subcommands.add_parser('query', help="Boolean query over indexed saves")
+    query.add_argument('--has', nargs='*', default=[], help="Patterns that must all be present")
+    query.add_argument('--any', nargs='*', default=[], help="At least one of these must be present")
+    query.add_argument('--not', dest='none', nargs='*', default=[], help="Patterns that must be absent")
+
+    timeline = subcommands.add_parser('timeline', help="How a pattern evolves across saves")
+    timeline.add_argument('pattern')
+
+    args = parser.parse_args(argv)
+    index = PatternPresenceIndex.load(args.index) if Path(args.index).exists() else PatternPresenceIndex()
+
+    if args.command == 'add':
+        indexed = index.add_files(args.saves)
+        index.save(args.index)
+        print(f"✅ Indexed {indexed} saves ({len(index.saves)} total, {len(index.bitsets)} patterns)")
+    elif args.command == 'query':
+        matches = index.query(args.has, args.any, args.none)
+        print(f"🔎 {index.cardinality(matches)} of {len(index.saves)} saves match")
+        for path in index.decode(matches):
+            print(f"  {path}")
+    elif args.command == 'timeline':
+        for row in index.timeline(args.pattern):
+            first = f"0x{row['first_offset']:08X}" if row['first_offset'] is not None else "-"
+            print(f"  {Path(row['save']).name}: {row['count']} occurrences, first at {first}")
+
+if __name__ == "__main__":
+    sys.exit(main())
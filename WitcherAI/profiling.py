@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+🔬 WitcherAI Profiling Mode
+===========================
+Profiles one analysis run: cProfile stats, a stack sampler writing collapsed
+stacks for flamegraph tools (flamegraph.pl, speedscope, inferno) and a
+tracemalloc top-N allocation report. Used by the --profile flag of the hex
+analyzer and agent entry points.
+"""
+
+import cProfile
+import contextlib
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+class StackSampler:
+    """Samples every thread's Python stack at a fixed interval
+
+    Unlike cProfile's caller/callee pairs these are whole stacks, which is
+    what collapsed-stack flamegraphs need. Each thread's root frame is its
+    thread name, so worker pools show up side by side.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})".replace(';', ':')
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format: 'root;caller;callee count' per line"""
+        return ''.join(f"{stack} {samples}\n" for stack, samples in self.stacks.most_common())
+
+class RunProfiler:
+    """Context manager profiling the enclosed run and writing its reports
+
+    Outputs in output_dir, prefixed with <name>_<timestamp>:
+        .prof              cProfile stats (pstats, snakeviz)
+        .collapsed         sampled stacks for flamegraph tools
+        _allocations.txt   top_n allocation sites by size, plus the peak
+
+    tracemalloc slows allocation-heavy code severalfold; memory=False skips
+    it when only timings matter.
+    """
+
+    def __init__(self, name: str, output_dir: str = "profiles", top_n: int = 25,
+                 sample_interval: float = 0.005, memory: bool = True, trace_frames: int = 10):
+        self.name = name
+        self.output_dir = Path(output_dir)
+        self.top_n = top_n
+        self.memory = memory
+        self.trace_frames = trace_frames
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(sample_interval)
+        self.paths: Dict[str, Path] = {}
+
+    def __enter__(self):
+        if self.memory:
+            tracemalloc.start(self.trace_frames)
+        self.started = time.perf_counter()
+        self.sampler.start()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.profiler.disable()
+        self.sampler.stop()
+        self.elapsed = time.perf_counter() - self.started
+        snapshot = None
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, self.peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        self.write_reports(snapshot)
+        return False
+
+    def allocation_report(self, snapshot: tracemalloc.Snapshot) -> str:
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ])
+        lines = [f"Peak traced memory: {self.peak_bytes / (1024 * 1024):.1f} MB",
+                 f"Top {self.top_n} allocation sites still held at the end of the run:", ""]
+        for rank, stat in enumerate(snapshot.statistics('lineno')[:self.top_n], 1):
+            frame = stat.traceback[0]
+            lines.append(f"{rank:>3}. {stat.size / 1024:>10.1f} KB {stat.count:>8} blocks  {frame.filename}:{frame.lineno}")
+
+        lines += ["", "Largest allocation tracebacks:"]
+        for stat in snapshot.statistics('traceback')[:3]:
+            lines.append(f"  {stat.size / 1024:.1f} KB in {stat.count} blocks")
+            lines += [f"    {line}" for line in stat.traceback.format()]
+        return '\n'.join(lines) + '\n'
+
+    def write_reports(self, snapshot: Optional[tracemalloc.Snapshot] = None):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        prefix = self.output_dir / f"{self.name}_{time.strftime('%Y%m%d_%H%M%S')}"
+
+        self.paths['stats'] = prefix.with_suffix('.prof')
+        self.profiler.dump_stats(str(self.paths['stats']))
+
+        self.paths['collapsed'] = prefix.with_suffix('.collapsed')
+        self.paths['collapsed'].write_text(self.sampler.collapsed(), encoding='utf-8')
+
+        if snapshot is not None:
+            self.paths['allocations'] = prefix.with_name(prefix.name + '_allocations.txt')
+            self.paths['allocations'].write_text(self.allocation_report(snapshot), encoding='utf-8')
+
+        self.print_summary()
+
+    def print_summary(self, limit: int = 15):
+        report = io.StringIO()
+        pstats.Stats(self.profiler, stream=report).sort_stats('cumulative').print_stats(limit)
+        print()
+        print(f"🔬 Profile of {self.name} ({self.elapsed:.2f} s)")
+        print("=" * 50)
+        print(report.getvalue().split('\n\n', 1)[-1].rstrip())
+        print()
+        for kind, path in self.paths.items():
+            print(f"  {kind}: {path}")
+
+def profiling(name: str, enabled: bool, **options):
+    """RunProfiler when enabled, otherwise a no-op context"""
+    return RunProfiler(name, **options) if enabled else contextlib.nullcontext()
+
+if __name__ == "__main__":
+    # Profile any WitcherAI script: python profiling.py <script.py> [args...]
+    if len(sys.argv) < 2:
+        print("Usage: python profiling.py <script.py> [script args...]")
+        sys.exit(1)
+
+    import runpy
+    script = sys.argv[1]
+    sys.argv = sys.argv[1:]
+    sys.path.insert(0, str(Path(script).resolve().parent))
+    with RunProfiler(Path(script).stem):
+        runpy.run_path(script, run_name="__main__")
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+🗂️ Save Retention Planner
+=========================
+Chooses the smallest set of saves that still covers every distinct decision
+state in a library (greedy set cover over bitsets), and reports the rest as
+prune candidates for the backup-before-delete flow - as a dry run
+"""
+
+import argparse
+import heapq
+import json
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from universal_decision_taxonomy import UniversalDecisionTaxonomy
+from witcher_hex_analyzer import WitcherHexAnalyzer, extract_dzip_payload
+
+GAME_BY_EXTENSION = {'.thewitchersave': 'Witcher 1', '.sav': 'Witcher 2'}
+
+class DecisionStateExtractor:
+    """Distinct decision states present in a save
+
+    Two sources, both found with a single regex pass over the payload:
+      taxonomy:<decision id>          a taxonomy pattern or known analyzer
+                                      marker classified by the taxonomy
+      decision:<decision id>=<value>  a DecisionReference variable, with the
+                                      first possible value found within
+                                      value_window bytes after it
+    """
+
+    def __init__(self, db_path: str = "database/witcher_save_manager.db",
+                 taxonomy: UniversalDecisionTaxonomy = None, value_window: int = 64):
+        self.taxonomy = taxonomy or UniversalDecisionTaxonomy()
+        self.value_window = value_window
+        self.decisions = self._load_decisions(db_path)
+
+        terms = {pattern for decisions in self.taxonomy.decision_tree.values()
+                 for decision in decisions for pattern in decision.patterns}
+        terms.update(p.pattern.decode('utf-8', errors='ignore') for p in WitcherHexAnalyzer().known_patterns)
+        terms.update(decision['variable_name'] for decision in self.decisions)
+        self.terms = sorted(terms, key=len, reverse=True)  # Longest first so prefixes don't shadow
+        self.term_regex = re.compile(b'|'.join(re.escape(term.encode('utf-8')) for term in self.terms))
+        self._classified: Dict[tuple, Optional[str]] = {}
+
+    @staticmethod
+    def _load_decisions(db_path: str) -> List[Dict]:
+        if not Path(db_path).exists():
+            return []
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute("SELECT decision_id, variable_name, possible_values FROM DecisionReference").fetchall()
+        finally:
+            conn.close()
+        return [
+            {
+                'decision_id': decision_id,
+                'variable_name': variable_name,
+                # Longest first: 'controlled' must win over a shorter value it contains
+                'values': sorted(json.loads(possible_values or '[]'), key=len, reverse=True)
+            }
+            for decision_id, variable_name, possible_values in rows
+        ]
+
+    def _classify(self, term: str, game: str) -> Optional[str]:
+        key = (term, game)
+        if key not in self._classified:
+            decision = self.taxonomy.classify_decision(term, {'game': game})
+            self._classified[key] = decision.id if decision else None
+        return self._classified[key]
+
+    def states(self, payload: bytes, game: str) -> Set[str]:
+        first_seen: Dict[str, int] = {}
+        for match in self.term_regex.finditer(payload):
+            first_seen.setdefault(match.group().decode('utf-8'), match.start())
+
+        states = set()
+        for term in first_seen:
+            decision_id = self._classify(term, game)
+            if decision_id:
+                states.add(f"taxonomy:{decision_id}")
+
+        for decision in self.decisions:
+            position = first_seen.get(decision['variable_name'])
+            if position is None:
+                continue
+            window = payload[position:position + len(decision['variable_name']) + self.value_window]
+            value = next((v for v in decision['values'] if v.encode('utf-8') in window), None)
+            states.add(f"decision:{decision['decision_id']}" + (f"={value}" if value else ""))
+        return states
+
+    def states_for_file(self, save_path: str, game: Optional[str] = None) -> Set[str]:
+        game = game or GAME_BY_EXTENSION.get(Path(save_path).suffix.lower(), 'Witcher 2')
+        with open(save_path, 'rb') as f:
+            return self.states(extract_dzip_payload(f.read()), game)
+
+@dataclass
+class SaveRecord:
+    path: str
+    size: int
+    mtime: float
+    states: Set[str] = field(default_factory=set)
+
+@dataclass
+class RetentionPlan:
+    """Dry-run retention plan: nothing is deleted or moved"""
+    keep: List[Dict]
+    prune: List[Dict]
+    total_states: int
+    bytes_kept: int
+    bytes_reclaimable: int
+    planning_ms: float
+
+class RetentionPlanner:
+    """Greedy set cover of decision states with bitset saves
+
+    Each distinct state is a bit; each save is the int of its states. The
+    keep_latest newest saves are always kept. Then the save covering the most
+    still-uncovered states is kept, ties going to the newer save, until every
+    state is covered. Coverage gains only shrink as saves are kept, so stale
+    heap entries are re-scored lazily instead of rescanning every save per
+    pick.
+    """
+
+    def __init__(self, keep_latest: int = 1):
+        self.keep_latest = keep_latest
+
+    @staticmethod
+    def popcount(bits: int) -> int:
+        return bin(bits).count('1')
+
+    def plan(self, saves: List[SaveRecord]) -> RetentionPlan:
+        started = time.perf_counter()
+        state_bits: Dict[str, int] = {}
+        bitsets = []
+        for save in saves:
+            bits = 0
+            for state in save.states:
+                bits |= 1 << state_bits.setdefault(state, len(state_bits))
+            bitsets.append(bits)
+
+        uncovered = (1 << len(state_bits)) - 1
+        kept: Dict[int, List[str]] = {}
+        by_age = sorted(range(len(saves)), key=lambda i: saves[i].mtime, reverse=True)
+
+        def cover(index: int):
+            nonlocal uncovered
+            kept[index] = [state for state, bit in state_bits.items() if bitsets[index] & uncovered & (1 << bit)]
+            uncovered &= ~bitsets[index]
+
+        for index in by_age[:self.keep_latest]:
+            cover(index)
+
+        # Max-heap of (gain, recency rank); recency rank 0 is the newest save
+        recency = {index: rank for rank, index in enumerate(by_age)}
+        heap = [(-self.popcount(bitsets[i] & uncovered), recency[i], i) for i in range(len(saves)) if i not in kept]
+        heapq.heapify(heap)
+        while uncovered and heap:
+            negative_gain, rank, index = heapq.heappop(heap)
+            gain = self.popcount(bitsets[index] & uncovered)
+            if gain == 0:
+                continue
+            if gain < -negative_gain:
+                heapq.heappush(heap, (-gain, rank, index))  # Stale - re-score and retry
+                continue
+            cover(index)
+
+        keep = []
+        prune = []
+        for index in by_age:
+            save = saves[index]
+            if index in kept:
+                reason = "newest save" if recency[index] < self.keep_latest else "covers decision states"
+                keep.append({'path': save.path, 'size': save.size, 'reason': reason,
+                             'new_states': sorted(kept[index]), 'states': len(save.states)})
+            else:
+                prune.append({'path': save.path, 'size': save.size, 'states': len(save.states),
+                              'backup_path': str(Path(save.path).parent / "_backup" / Path(save.path).name)})
+
+        return RetentionPlan(
+            keep=keep,
+            prune=prune,
+            total_states=len(state_bits),
+            bytes_kept=sum(item['size'] for item in keep),
+            bytes_reclaimable=sum(item['size'] for item in prune),
+            planning_ms=(time.perf_counter() - started) * 1000
+        )
+
+def scan_library(save_paths: Iterable[str], extractor: DecisionStateExtractor,
+                 game: Optional[str] = None) -> List[SaveRecord]:
+    records = []
+    for save_path in save_paths:
+        stat = Path(save_path).stat()
+        records.append(SaveRecord(str(save_path), stat.st_size, stat.st_mtime,
+                                  extractor.states_for_file(save_path, game)))
+    return records
+
+def print_plan(plan: RetentionPlan):
+    print("🗂️ Save Retention Plan (dry run - nothing is deleted)")
+    print("=" * 50)
+    print(f"  Decision states covered: {plan.total_states}")
+    print(f"  Keep: {len(plan.keep)} saves ({plan.bytes_kept / (1024 * 1024):.1f} MB)")
+    print(f"  Prune candidates: {len(plan.prune)} saves ({plan.bytes_reclaimable / (1024 * 1024):.1f} MB reclaimable)")
+    print(f"  Planned in {plan.planning_ms:.1f} ms")
+    print()
+
+    print("✅ Keep:")
+    for item in plan.keep:
+        covered = f", adds {', '.join(item['new_states'][:4])}" if item['new_states'] else ""
+        print(f"  {Path(item['path']).name} - {item['reason']}{covered}")
+    print()
+
+    print("🧹 Prune (back up, then delete):")
+    for item in plan.prune:
+        print(f"  {Path(item['path']).name} → {item['backup_path']}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Plan which saves to keep so every decision state survives")
+    parser.add_argument('save_dir', help="Folder with the save library")
+    parser.add_argument('--pattern', default="*.sav", help="Save file glob")
+    parser.add_argument('--game', help="Game name for taxonomy context (default: from extension)")
+    parser.add_argument('--db', default="database/witcher_save_manager.db", help="Knowledge database")
+    parser.add_argument('--keep-latest', type=int, default=1, help="Always keep this many newest saves")
+    parser.add_argument('--json', help="Write the plan as JSON to this path")
+    args = parser.parse_args(argv)
+
+    extractor = DecisionStateExtractor(args.db)
+    saves = scan_library(sorted(Path(args.save_dir).glob(args.pattern)), extractor, args.game)
+    plan = RetentionPlanner(keep_latest=args.keep_latest).plan(saves)
+    print_plan(plan)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(asdict(plan), f)
+
+if __name__ == "__main__":
+    sys.exit(main())
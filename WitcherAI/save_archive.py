@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+🗜️ Save Archive
+===============
+Single-file archival container for saves and analysis results: each blob is
+compressed with the codec that measured best for it, and an index footer
+lets any single entry be read with one seek, without unpacking the archive
+"""
+
+import argparse
+import bz2
+import contextlib
+import hashlib
+import json
+import lzma
+import os
+import struct
+import sys
+import time
+import zlib
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from witcher_hex_analyzer import AnalysisResult, WitcherHexAnalyzer
+
+ARCHIVE_MAGIC = b'WSAR'
+ARCHIVE_VERSION = 2  # 2: chained index segments
+HEADER = struct.Struct('<4sH2x')  # magic, version
+TRAILER = struct.Struct('<QI4s')  # index offset, index length, magic
+TRAILER_MAGIC = b'WSAI'
+
+CODECS = {
+    'none': (lambda data: data, lambda data: data),
+    'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+    'bz2': (lambda data: bz2.compress(data, 9), bz2.decompress),
+    'lzma': (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+# Codec probing compresses SAMPLE_SLICES evenly spaced slices, SAMPLE_BYTES in total
+SAMPLE_BYTES = 256 * 1024
+SAMPLE_SLICES = 4
+
+def sample_blob(data: bytes) -> bytes:
+    """Slices from across the blob - save sections compress very differently"""
+    if len(data) <= SAMPLE_BYTES:
+        return data
+    slice_size = SAMPLE_BYTES // SAMPLE_SLICES
+    stride = (len(data) - slice_size) // (SAMPLE_SLICES - 1)
+    return b''.join(data[i * stride:i * stride + slice_size] for i in range(SAMPLE_SLICES))
+
+def choose_codec(data: bytes, min_gain: float = 0.05) -> Tuple[str, Dict[str, float]]:
+    """Pick a codec from its measured ratio on a sample of the data
+
+    zlib is the fast default; a slower codec must shrink the sample by at
+    least min_gain more to be chosen, and data zlib can't shrink by 5% is
+    stored as-is. Returns (codec, ratio per codec).
+    """
+    sample = sample_blob(data)
+    if not sample:
+        return 'none', {}
+
+    ratios = {name: len(sample) / max(len(compress(sample)), 1)
+              for name, (compress, _) in CODECS.items() if name != 'none'}
+    if ratios['zlib'] < 1.05:
+        return 'none', ratios
+
+    best = max(ratios, key=ratios.get)
+    if best != 'zlib' and ratios[best] < ratios['zlib'] * (1 + min_gain):
+        best = 'zlib'
+    return best, ratios
+
+def _json_default(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+class SaveArchive:
+    """Append-only archive of saves, AnalysisResults and JSON documents
+
+    Layout: header, then compressed blobs, each append followed by a small
+    zlib-compressed JSON index segment and a fixed-size trailer pointing at
+    it. A segment lists only the entries of its own append plus the location
+    of the previous segment, so appends cost O(new data) and the index chain
+    is walked back from the last trailer on open. Appends inside batch()
+    share one segment.
+
+    A torn append leaves garbage after the last complete trailer; opening
+    falls back to that trailer and the next append overwrites the garbage.
+    Re-added names and torn appends leave dead bytes behind until compact()
+    rewrites the archive with only the live entries.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.index: Dict[str, Dict] = {}
+        self.head: Optional[Tuple[int, int]] = None  # (offset, length) of the newest index segment
+        self.end = HEADER.size  # End of the last complete append
+        self.index_bytes = 0  # Index segments and trailers in the chain
+        self._pending: Optional[List[Dict]] = None  # Entries of an open batch()
+        if self.path.exists() and self.path.stat().st_size:
+            self._load_index()
+        else:
+            with open(self.path, 'wb') as f:
+                f.write(HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION))
+
+    @staticmethod
+    def _read_segment(f, offset: int, length: int) -> Dict:
+        f.seek(offset)
+        segment = json.loads(zlib.decompress(f.read(length)))
+        if isinstance(segment, list):  # Version 1: one full index, no chain
+            segment = {'previous': None, 'entries': segment}
+        return segment
+
+    def _find_trailer(self, f, file_size: int) -> Tuple[int, int, int]:
+        """(index offset, index length, trailer end) of the last trailer whose segment decodes
+
+        Scans back from the end of the file, so an interrupted append only
+        loses that append instead of the whole archive.
+        """
+        block_size = 1024 * 1024
+        block_end = file_size
+        while block_end > HEADER.size:
+            block_start = max(HEADER.size, block_end - block_size)
+            f.seek(block_start)
+            block = f.read(block_end - block_start + TRAILER.size - len(TRAILER_MAGIC))
+            position = len(block)
+            while True:
+                position = block.rfind(TRAILER_MAGIC, 0, position)
+                if position < 0:
+                    break
+                trailer_start = block_start + position + len(TRAILER_MAGIC) - TRAILER.size
+                if trailer_start < HEADER.size:
+                    continue
+                f.seek(trailer_start)
+                index_offset, index_length, _ = TRAILER.unpack(f.read(TRAILER.size))
+                if index_offset + index_length == trailer_start and index_offset >= HEADER.size:
+                    try:
+                        self._read_segment(f, index_offset, index_length)
+                        return index_offset, index_length, trailer_start + TRAILER.size
+                    except (zlib.error, ValueError):
+                        pass
+            block_end = block_start
+        raise ValueError(f"{self.path} has no valid index trailer")
+
+    def _load_index(self):
+        with open(self.path, 'rb') as f:
+            magic, version = HEADER.unpack(f.read(HEADER.size))
+            if magic != ARCHIVE_MAGIC:
+                raise ValueError(f"{self.path} is not a save archive")
+            if version > ARCHIVE_VERSION:
+                raise ValueError(f"Archive version {version} is newer than supported ({ARCHIVE_VERSION})")
+
+            file_size = self.path.stat().st_size
+            if file_size == HEADER.size:
+                return
+            index_offset, index_length, self.end = self._find_trailer(f, file_size)
+            if self.end != file_size:
+                print(f"⚠️ {self.path}: ignoring {file_size - self.end:,} bytes after the last complete append")
+
+            self.head = (index_offset, index_length)
+            segments = []
+            location = self.head
+            while location:
+                segment = self._read_segment(f, *location)
+                segments.append(segment['entries'])
+                self.index_bytes += location[1] + TRAILER.size
+                location = tuple(segment['previous']) if segment['previous'] else None
+
+        for entries in reversed(segments):
+            for entry in entries:
+                self.index[entry['name']] = entry
+
+    def _write_index(self, f, entries: List[Dict]):
+        index_offset = f.tell()
+        index = zlib.compress(json.dumps({'previous': self.head, 'entries': entries}).encode('utf-8'))
+        f.write(index)
+        f.write(TRAILER.pack(index_offset, len(index), TRAILER_MAGIC))
+        self.head = (index_offset, len(index))
+        self.index_bytes += len(index) + TRAILER.size
+
+    def _write_blob(self, f, data: bytes, codec: Optional[str] = None) -> Dict:
+        codec, ratios = (codec, {}) if codec else choose_codec(data)
+        compressed = CODECS[codec][0](data)
+        offset = f.tell()
+        f.write(compressed)
+        return {
+            'offset': offset,
+            'length': len(compressed),
+            'size': len(data),
+            'codec': codec,
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'measured_ratios': {name: round(ratio, 3) for name, ratio in ratios.items()}
+        }
+
+    def _append(self, name: str, blobs: Dict[str, Tuple[bytes, Optional[str]]], metadata: Dict) -> Dict:
+        entry = {'name': name, 'added_at': time.time(), 'metadata': metadata, 'blobs': {}}
+        with open(self.path, 'r+b') as f:
+            f.seek(self.end)  # Overwrites whatever a torn append left behind
+            for blob_name, (data, codec) in blobs.items():
+                entry['blobs'][blob_name] = self._write_blob(f, data, codec)
+            if self._pending is None:
+                self._write_index(f, [entry])
+            else:
+                self._pending.append(entry)
+            self.end = f.tell()
+            f.truncate()
+        self.index[name] = entry
+        return entry
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Group appends under one index segment, written when the block exits
+
+        Entries of a batch interrupted by a crash are lost together; the
+        archive reopens at the previous segment.
+        """
+        if self._pending is not None:
+            yield self
+            return
+        self._pending = []
+        try:
+            yield self
+        finally:
+            entries, self._pending = self._pending, None
+            if entries:
+                with open(self.path, 'r+b') as f:
+                    f.seek(self.end)
+                    self._write_index(f, entries)
+                    self.end = f.tell()
+                    f.truncate()
+
+    def compact(self) -> Tuple[int, int]:
+        """Rewrite the archive with only the live entries under a single index segment
+
+        Blobs are copied still compressed. The new file replaces the old one
+        atomically. Returns (bytes before, bytes after).
+        """
+        before = self.path.stat().st_size
+        temp_path = self.path.with_name(self.path.name + '.compact')
+        compacted = {}
+        with open(self.path, 'rb') as source, open(temp_path, 'wb') as target:
+            target.write(HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION))
+            for name, entry in self.index.items():
+                entry = dict(entry, blobs={})
+                for blob_name, blob in self.index[name]['blobs'].items():
+                    source.seek(blob['offset'])
+                    entry['blobs'][blob_name] = dict(blob, offset=target.tell())
+                    target.write(source.read(blob['length']))
+                compacted[name] = entry
+
+            self.head, self.index_bytes = None, 0
+            self._write_index(target, list(compacted.values()))
+            self.end = target.tell()
+        os.replace(temp_path, self.path)
+        self.index = compacted
+        return before, self.end
+
+    def add_save(self, save_path: str, analysis: Optional[AnalysisResult] = None,
+                 metadata: Optional[Dict] = None, name: Optional[str] = None) -> Dict:
+        """Archive a save file, optionally with its AnalysisResult"""
+        data = Path(save_path).read_bytes()
+        blobs = {'save': (data, None)}
+        if analysis is not None:
+            blobs['analysis'] = (json.dumps(asdict(analysis), default=_json_default).encode('utf-8'), 'zlib')
+
+        metadata = dict(metadata or {})
+        metadata.setdefault('source_path', str(Path(save_path).resolve()))
+        metadata.setdefault('mtime', Path(save_path).stat().st_mtime)
+        return self._append(name or Path(save_path).name, blobs, metadata)
+
+    def add_document(self, name: str, document, metadata: Optional[Dict] = None) -> Dict:
+        """Archive a JSON-serialisable result document (taxonomy or cross-game analyses, ...)"""
+        data = json.dumps(document, separators=(',', ':'), default=_json_default).encode('utf-8')
+        return self._append(name, {'document': (data, None)}, dict(metadata or {}))
+
+    def names(self) -> List[str]:
+        return list(self.index)
+
+    def entry(self, name: str) -> Dict:
+        return self.index[name]
+
+    def read_blob(self, name: str, blob_name: str, verify: bool = True) -> bytes:
+        """Read one blob with a single seek; only that blob is decompressed"""
+        blob = self.index[name]['blobs'][blob_name]
+        with open(self.path, 'rb') as f:
+            f.seek(blob['offset'])
+            data = CODECS[blob['codec']][1](f.read(blob['length']))
+        if verify and hashlib.sha256(data).hexdigest() != blob['sha256']:
+            raise ValueError(f"Archive entry {name}/{blob_name} is corrupt")
+        return data
+
+    def read_save(self, name: str) -> bytes:
+        return self.read_blob(name, 'save')
+
+    def read_analysis(self, name: str) -> Optional[AnalysisResult]:
+        if 'analysis' not in self.index[name]['blobs']:
+            return None
+        state = json.loads(self.read_blob(name, 'analysis'))
+        for pattern in state['patterns_found']:
+            pattern['pattern'] = pattern['pattern'].encode('utf-8')
+        return AnalysisResult(**state)
+
+    def read_document(self, name: str):
+        return json.loads(self.read_blob(name, 'document'))
+
+    def extract(self, name: str, destination: str) -> str:
+        Path(destination).write_bytes(self.read_save(name))
+        return destination
+
+    def stats(self) -> Dict:
+        blobs = [blob for entry in self.index.values() for blob in entry['blobs'].values()]
+        stored = sum(blob['length'] for blob in blobs)
+        original = sum(blob['size'] for blob in blobs)
+        archive_bytes = self.path.stat().st_size
+        return {
+            'entries': len(self.index),
+            'original_bytes': original,
+            'stored_bytes': stored,
+            'archive_bytes': archive_bytes,
+            'dead_bytes': archive_bytes - HEADER.size - stored - self.index_bytes,
+            'ratio': original / stored if stored else 0.0
+        }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compressed archive of saves and analysis results")
+    parser.add_argument('archive', help="Archive file")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    add = subcommands.add_parser('add', help="Archive save files")
+    add.add_argument('saves', nargs='+')
+    add.add_argument('--analyze', action='store_true', help="Also run and archive the hex analysis")
+
+    add_json = subcommands.add_parser('add-json', help="Archive JSON result files")
+    add_json.add_argument('documents', nargs='+')
+
+    subcommands.add_parser('list', help="List entries")
+    subcommands.add_parser('compact', help="Drop replaced entries and torn appends")
+
+    extract = subcommands.add_parser('extract', help="Extract an archived save or document")
+    extract.add_argument('name')
+    extract.add_argument('destination')
+
+    args = parser.parse_args(argv)
+    archive = SaveArchive(args.archive)
+
+    if args.command == 'add':
+        analyzer = WitcherHexAnalyzer() if args.analyze else None
+        with archive.batch():
+            for save_path in args.saves:
+                analysis = analyzer.analyze_file(save_path) if analyzer else None
+                blob = archive.add_save(save_path, analysis)['blobs']['save']
+                print(f"✅ {Path(save_path).name}: {blob['size']:,} → {blob['length']:,} bytes ({blob['codec']})")
+    elif args.command == 'add-json':
+        with archive.batch():
+            for document_path in args.documents:
+                with open(document_path, 'r', encoding='utf-8') as f:
+                    blob = archive.add_document(Path(document_path).name, json.load(f))['blobs']['document']
+                print(f"✅ {Path(document_path).name}: {blob['size']:,} → {blob['length']:,} bytes ({blob['codec']})")
+    elif args.command == 'list':
+        for name in archive.names():
+            entry = archive.entry(name)
+            sizes = ', '.join(f"{blob_name} {blob['size']:,}→{blob['length']:,} ({blob['codec']})"
+                              for blob_name, blob in entry['blobs'].items())
+            print(f"  {name}: {sizes}")
+        stats = archive.stats()
+        print(f"📊 {stats['entries']} entries, {stats['original_bytes']:,} → {stats['archive_bytes']:,} bytes "
+              f"({stats['ratio']:.1f}x, {stats['dead_bytes']:,} reclaimable)")
+    elif args.command == 'compact':
+        before, after = archive.compact()
+        print(f"✅ Compacted {args.archive}: {before:,} → {after:,} bytes")
+    elif args.command == 'extract':
+        blobs = archive.entry(args.name)['blobs']
+        if 'save' in blobs:
+            archive.extract(args.name, args.destination)
+        else:
+            Path(args.destination).write_bytes(archive.read_blob(args.name, 'document'))
+        print(f"✅ Extracted {args.name} to {args.destination}")
+
+if __name__ == "__main__":
+    sys.exit(main())
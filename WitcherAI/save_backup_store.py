@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+💾 Save Backup Store
+====================
+Deduplicating backup store for save files: saves are split with
+content-defined chunking, each distinct chunk is stored once (zlib, keyed by
+SHA-256) and every backup is a small manifest listing its chunks
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from content_chunker import chunk_boundaries
+
+class SaveBackupStore:
+    """Content-addressed chunk store plus per-backup manifests
+
+    Layout under root:
+        chunks/<2 hex>/<sha256>   zlib-compressed chunk, written once
+        manifests/<backup_id>.json
+        latest.json               save path -> newest backup id and (mtime_ns, size)
+
+    Consecutive saves of a playthrough share almost all their chunks, so each
+    new backup only writes the few chunks around what changed. A save whose
+    (mtime_ns, size) matches its latest backup is skipped without reading it.
+    """
+
+    def __init__(self, root: str, min_chunk: int = 2048, avg_chunk: int = 8192,
+                 max_chunk: int = 65536, compression_level: int = 6):
+        self.root = Path(root)
+        self.chunk_dir = self.root / "chunks"
+        self.manifest_dir = self.root / "manifests"
+        self.latest_path = self.root / "latest.json"
+        self.chunk_sizes = (min_chunk, avg_chunk, max_chunk)
+        self.compression_level = compression_level
+
+        self.chunk_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+        self.latest = json.loads(self.latest_path.read_text(encoding='utf-8')) if self.latest_path.exists() else {}
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.chunk_dir / digest[:2] / digest
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        temp_path = path.with_name(path.name + '.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def backup(self, save_path: str, force: bool = False) -> Dict:
+        """Back up one save; returns its manifest plus write statistics"""
+        path = Path(save_path).resolve()
+        stat = path.stat()
+        signature = [stat.st_mtime_ns, stat.st_size]
+
+        latest = self.latest.get(str(path))
+        if latest and latest['signature'] == signature and not force:
+            return {'backup_id': latest['backup_id'], 'skipped': True, 'new_chunks': 0, 'bytes_written': 0}
+
+        data = path.read_bytes()
+        chunks = []
+        new_chunks = 0
+        bytes_written = 0
+        for offset, length in chunk_boundaries(data, *self.chunk_sizes):
+            chunk = data[offset:offset + length]
+            digest = hashlib.sha256(chunk).hexdigest()
+            chunks.append([digest, length])
+
+            chunk_path = self._chunk_path(digest)
+            if not chunk_path.exists():
+                chunk_path.parent.mkdir(exist_ok=True)
+                compressed = zlib.compress(chunk, self.compression_level)
+                self._write_atomic(chunk_path, compressed)
+                new_chunks += 1
+                bytes_written += len(compressed)
+
+        file_digest = hashlib.sha256(data).hexdigest()
+        backup_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{file_digest[:8]}_{path.stem}"
+        manifest = {
+            'backup_id': backup_id,
+            'save_path': str(path),
+            'size': len(data),
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_digest,
+            'created_at': time.time(),
+            'chunks': chunks
+        }
+        # Manifest last: a backup only exists once all its chunks are durable
+        self._write_atomic(self.manifest_dir / f"{backup_id}.json", json.dumps(manifest).encode('utf-8'))
+        self.latest[str(path)] = {'backup_id': backup_id, 'signature': signature}
+        self._write_atomic(self.latest_path, json.dumps(self.latest).encode('utf-8'))
+
+        return {'backup_id': backup_id, 'skipped': False, 'new_chunks': new_chunks,
+                'reused_chunks': len(chunks) - new_chunks, 'bytes_written': bytes_written}
+
+    def backup_files(self, save_paths: Iterable[str]) -> List[Dict]:
+        return [self.backup(save_path) for save_path in save_paths]
+
+    def manifest(self, backup_id: str) -> Dict:
+        with open(self.manifest_dir / f"{backup_id}.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def list_backups(self, save_name: Optional[str] = None) -> List[str]:
+        """Backup ids, oldest first, optionally only those of one save file name
+
+        save_name matches the backed-up file's name, or its stem when given
+        without an extension. Ids carry the stem after the digest, which
+        narrows the manifests read; the manifest's save_path decides.
+        """
+        wanted = Path(save_name) if save_name is not None else None
+        backups = []
+        for manifest_path in sorted(self.manifest_dir.glob("*.json")):
+            backup_id = manifest_path.stem
+            if wanted is None:
+                backups.append(backup_id)
+                continue
+
+            id_parts = backup_id.split('_', 4)
+            if len(id_parts) < 5 or id_parts[4] != wanted.stem:
+                continue
+            saved = Path(self.manifest(backup_id)['save_path'])
+            if saved.name == wanted.name or (not wanted.suffix and saved.stem == wanted.name):
+                backups.append(backup_id)
+        return backups
+
+    def restore(self, backup_id: str, destination: str, verify: bool = True) -> str:
+        """Reassemble a backup at destination (atomically); verifies SHA-256 by default"""
+        manifest = self.manifest(backup_id)
+        destination = Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = destination.with_name(destination.name + '.restore')
+
+        file_hash = hashlib.sha256()
+        try:
+            with open(temp_path, 'wb') as f:
+                for digest, length in manifest['chunks']:
+                    chunk = zlib.decompress(self._chunk_path(digest).read_bytes())
+                    if len(chunk) != length:
+                        raise ValueError(f"Chunk {digest} has {len(chunk)} bytes, manifest says {length}")
+                    file_hash.update(chunk)
+                    f.write(chunk)
+
+            if verify and file_hash.hexdigest() != manifest['sha256']:
+                raise ValueError(f"Restored data for {backup_id} does not match its SHA-256")
+
+            os.replace(temp_path, destination)
+        finally:
+            # Missing or corrupt chunks must not leave a partial restore behind
+            if temp_path.exists():
+                temp_path.unlink()
+
+        os.utime(destination, ns=(manifest['mtime_ns'], manifest['mtime_ns']))
+        return str(destination)
+
+    def delete_backup(self, backup_id: str):
+        """Drop a manifest; its chunks are reclaimed by the next gc()"""
+        (self.manifest_dir / f"{backup_id}.json").unlink()
+        self.latest = {path: entry for path, entry in self.latest.items() if entry['backup_id'] != backup_id}
+        self._write_atomic(self.latest_path, json.dumps(self.latest).encode('utf-8'))
+
+    def gc(self) -> int:
+        """Delete chunks no manifest references; returns the number removed"""
+        referenced = set()
+        for backup_id in self.list_backups():
+            referenced.update(digest for digest, _ in self.manifest(backup_id)['chunks'])
+
+        removed = 0
+        for chunk_path in self.chunk_dir.glob("*/*"):
+            if chunk_path.name not in referenced:
+                chunk_path.unlink()
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict:
+        """Logical (sum of backed-up save sizes) vs stored bytes"""
+        backups = self.list_backups()
+        logical = sum(self.manifest(backup_id)['size'] for backup_id in backups)
+        chunk_files = list(self.chunk_dir.glob("*/*"))
+        stored = sum(chunk_path.stat().st_size for chunk_path in chunk_files)
+        return {
+            'backups': len(backups),
+            'chunks': len(chunk_files),
+            'logical_bytes': logical,
+            'stored_bytes': stored,
+            'reduction': logical / stored if stored else 0.0
+        }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Deduplicating save backup store")
+    parser.add_argument('store', help="Backup store directory")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    backup = subcommands.add_parser('backup', help="Back up save files")
+    backup.add_argument('saves', nargs='+')
+    backup.add_argument('--force', action='store_true', help="Back up even if unchanged since the last backup")
+
+    restore = subcommands.add_parser('restore', help="Restore a backup")
+    restore.add_argument('backup_id')
+    restore.add_argument('destination')
+
+    listing = subcommands.add_parser('list', help="List backups")
+    listing.add_argument('--save', help="Only backups of this save file name")
+
+    subcommands.add_parser('stats', help="Show deduplication statistics")
+    subcommands.add_parser('gc', help="Remove unreferenced chunks")
+
+    args = parser.parse_args(argv)
+    store = SaveBackupStore(args.store)
+
+    if args.command == 'backup':
+        for save_path in args.saves:
+            result = store.backup(save_path, force=args.force)
+            if result['skipped']:
+                print(f"⏭️ {Path(save_path).name}: unchanged (backup {result['backup_id']})")
+            else:
+                print(f"✅ {Path(save_path).name}: {result['backup_id']} - {result['new_chunks']} new chunks, "
+                      f"{result['reused_chunks']} reused, {result['bytes_written']:,} bytes written")
+    elif args.command == 'restore':
+        print(f"✅ Restored to {store.restore(args.backup_id, args.destination)}")
+    elif args.command == 'list':
+        for backup_id in store.list_backups(args.save):
+            print(f"  {backup_id}")
+    elif args.command == 'stats':
+        stats = store.stats()
+        print(f"📊 {stats['backups']} backups, {stats['chunks']} chunks")
+        print(f"  Logical: {stats['logical_bytes']:,} bytes, stored: {stats['stored_bytes']:,} bytes "
+              f"({stats['reduction']:.1f}x reduction)")
+    elif args.command == 'gc':
+        print(f"🧹 Removed {store.gc()} unreferenced chunks")
+
+if __name__ == "__main__":
+    sys.exit(main())
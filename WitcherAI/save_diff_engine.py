@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+🔀 Save Diff Engine
+===================
+Binary diff of two saves (e.g. just before and after a key decision) over
+their decompressed payloads, to localise the bytes a decision changed
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import struct
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from content_chunker import chunk_boundaries
+from witcher_hex_analyzer import HIT_MODE_ALL, WitcherHexAnalyzer, extract_dzip_payload
+
+@dataclass
+class ChangedRegion:
+    """One changed byte range; offsets are into the decompressed payloads"""
+    kind: str  # 'modified', 'inserted' or 'deleted'
+    before_offset: int
+    before_length: int
+    after_offset: int
+    after_length: int
+    before_hex: str
+    after_hex: str
+    values: Dict = field(default_factory=dict)
+    nearby_patterns: List[Dict] = field(default_factory=list)
+
+@dataclass
+class SaveDiff:
+    """Result of diffing two saves"""
+    before_path: str
+    after_path: str
+    before_size: int
+    after_size: int
+    chunks_matched: int
+    chunks_total: int
+    regions: List[ChangedRegion]
+
+    @property
+    def changed_bytes(self) -> int:
+        return sum(max(r.before_length, r.after_length) for r in self.regions)
+
+class SaveDiffEngine:
+    """rsync/CDC-style save differ
+
+    Both payloads are cut into content-defined chunks and joined on chunk
+    digest, which aligns the saves even when data was inserted, shifted or
+    moved. The longest run of matched chunks in the same relative order in
+    both saves becomes the anchors;
+    the gaps between anchors are refined byte-wise into tight changed regions
+    and annotated with known analyzer patterns found close to them.
+    """
+
+    def __init__(self, analyzer: WitcherHexAnalyzer = None, avg_chunk_size: int = 4096,
+                 merge_gap: int = 8, context_bytes: int = 256, preview_bytes: int = 32,
+                 repeat_window: int = 16):
+        self.analyzer = analyzer or WitcherHexAnalyzer()
+        self.avg_chunk_size = avg_chunk_size
+        self.repeat_window = repeat_window  # Repeated chunks (e.g. zero padding) only pair with nearby repeats
+        self.merge_gap = merge_gap  # Differing runs closer than this become one region
+        self.context_bytes = context_bytes  # How far to look for nearby patterns
+        self.preview_bytes = preview_bytes
+
+    def _chunks(self, data: bytes) -> List[Tuple[int, int, bytes]]:
+        min_size = max(self.avg_chunk_size // 4, 64)
+        return [
+            (offset, length, hashlib.blake2b(data[offset:offset + length], digest_size=16).digest())
+            for offset, length in chunk_boundaries(data, min_size, self.avg_chunk_size, self.avg_chunk_size * 8)
+        ]
+
+    def _anchors(self, before: bytes, after: bytes) -> Tuple[List[Tuple[int, int, int]], int]:
+        """Matched chunks as (before_offset, after_offset, length), increasing in both saves
+
+        Every digest match is a candidate; the anchors are the longest chain of
+        candidates increasing in both saves (LIS on before_offset, in after
+        order), so a block moved forward does not hide the data it jumped over.
+        The k-th repeat of a chunk in after is only paired with repeats k +/-
+        repeat_window in before, which keeps padding runs from going quadratic.
+        """
+        before_chunks = self._chunks(before)
+        by_digest: Dict[bytes, List[int]] = {}
+        for offset, _, digest in before_chunks:
+            by_digest.setdefault(digest, []).append(offset)
+
+        candidates = []  # (before_offset, after_offset, length)
+        predecessors = []  # Index of the previous candidate in the best chain ending here
+        tails = []  # tails[n]: smallest before_offset ending a chain of n + 1 candidates
+        tail_candidates = []
+        repeats: Dict[bytes, int] = {}
+        for after_offset, length, digest in self._chunks(after):
+            occurrences = by_digest.get(digest)
+            if not occurrences:
+                continue
+            repeat = repeats.get(digest, 0)
+            repeats[digest] = repeat + 1
+            window = occurrences[max(0, repeat - self.repeat_window):repeat + self.repeat_window + 1]
+
+            # Decreasing before_offset so one after chunk never chains onto itself
+            for before_offset in reversed(window):
+                position = bisect.bisect_left(tails, before_offset)
+                predecessors.append(tail_candidates[position - 1] if position else -1)
+                candidates.append((before_offset, after_offset, length))
+                if position == len(tails):
+                    tails.append(before_offset)
+                    tail_candidates.append(len(candidates) - 1)
+                else:
+                    tails[position] = before_offset
+                    tail_candidates[position] = len(candidates) - 1
+
+        anchors = []
+        candidate = tail_candidates[-1] if tail_candidates else -1
+        while candidate != -1:
+            anchors.append(candidates[candidate])
+            candidate = predecessors[candidate]
+        anchors.reverse()
+        return anchors, len(before_chunks)
+
+    def _gaps(self, before: bytes, after: bytes, anchors) -> List[Tuple[int, int, int, int]]:
+        """Unaligned (before_start, before_end, after_start, after_end) spans between anchors"""
+        gaps = []
+        before_position = after_position = 0
+        for before_offset, after_offset, length in anchors + [(len(before), len(after), 0)]:
+            if before_offset > before_position or after_offset > after_position:
+                gaps.append((before_position, before_offset, after_position, after_offset))
+            before_position = before_offset + length
+            after_position = after_offset + length
+        return gaps
+
+    def _refine(self, before: bytes, after: bytes, gap) -> List[Tuple[int, int, int, int]]:
+        """Trim common prefix/suffix, then split equal-length spans into differing runs"""
+        b_start, b_end, a_start, a_end = gap
+        overlap = min(b_end - b_start, a_end - a_start)
+        if overlap:
+            equal = (np.frombuffer(before, np.uint8, overlap, b_start) ==
+                     np.frombuffer(after, np.uint8, overlap, a_start))
+            prefix = overlap if equal.all() else int(np.argmin(equal))
+            b_start += prefix
+            a_start += prefix
+
+        overlap = min(b_end - b_start, a_end - a_start)
+        if overlap:
+            equal = (np.frombuffer(before, np.uint8, overlap, b_end - overlap) ==
+                     np.frombuffer(after, np.uint8, overlap, a_end - overlap))
+            suffix = overlap if equal.all() else int(np.argmin(equal[::-1]))
+            b_end -= suffix
+            a_end -= suffix
+
+        if b_end - b_start != a_end - a_start or b_start == b_end:
+            return [(b_start, b_end, a_start, a_end)] if (b_end > b_start or a_end > a_start) else []
+
+        differing = np.flatnonzero(
+            np.frombuffer(before, np.uint8, b_end - b_start, b_start) !=
+            np.frombuffer(after, np.uint8, a_end - a_start, a_start))
+        # Split where consecutive differing bytes are more than merge_gap apart
+        splits = np.flatnonzero(np.diff(differing) > self.merge_gap) + 1
+        shift = a_start - b_start
+        return [
+            (b_start + int(run[0]), b_start + int(run[-1]) + 1, b_start + int(run[0]) + shift, b_start + int(run[-1]) + 1 + shift)
+            for run in np.split(differing, splits)
+        ]
+
+    def _annotate(self, region: ChangedRegion, hits: List[Tuple[int, str, str]], hit_positions: np.ndarray):
+        """Attach analyzer patterns found within context_bytes of the region (after-save offsets)"""
+        low = region.after_offset - self.context_bytes
+        high = region.after_offset + region.after_length + self.context_bytes
+        start = int(np.searchsorted(hit_positions, low))
+        for position, name, category in hits[start:]:
+            if position > high:
+                break
+            region.nearby_patterns.append({
+                'pattern': name,
+                'category': category,
+                'offset': position,
+                'distance': position - region.after_offset
+            })
+
+    @staticmethod
+    def _values(before: bytes, after: bytes) -> Dict:
+        """Integer readings of small changes - decision flags are usually u8/u32"""
+        values = {}
+        if len(before) == len(after) == 1:
+            values['u8'] = [before[0], after[0]]
+        elif len(before) == len(after) == 2:
+            values['u16'] = [struct.unpack('<H', before)[0], struct.unpack('<H', after)[0]]
+        elif len(before) == len(after) == 4:
+            values['u32'] = [struct.unpack('<I', before)[0], struct.unpack('<I', after)[0]]
+        return values
+
+    def diff_bytes(self, before: bytes, after: bytes, before_path: str = '', after_path: str = '') -> SaveDiff:
+        anchors, before_chunk_count = self._anchors(before, after)
+
+        hits = sorted(
+            (position, match.pattern.decode('utf-8', errors='ignore'), match.category)
+            for match in self.analyzer.scan_patterns(after, mode=HIT_MODE_ALL)
+            for position in match.positions
+        )
+        hit_positions = np.array([hit[0] for hit in hits], dtype=np.int64)
+
+        regions = []
+        for gap in self._gaps(before, after, anchors):
+            for b_start, b_end, a_start, a_end in self._refine(before, after, gap):
+                kind = 'modified' if b_end > b_start and a_end > a_start else 'inserted' if a_end > a_start else 'deleted'
+                old, new = before[b_start:b_end], after[a_start:a_end]
+                region = ChangedRegion(
+                    kind=kind,
+                    before_offset=b_start, before_length=b_end - b_start,
+                    after_offset=a_start, after_length=a_end - a_start,
+                    before_hex=old[:self.preview_bytes].hex(),
+                    after_hex=new[:self.preview_bytes].hex(),
+                    values=self._values(old, new)
+                )
+                self._annotate(region, hits, hit_positions)
+                regions.append(region)
+
+        return SaveDiff(
+            before_path=before_path,
+            after_path=after_path,
+            before_size=len(before),
+            after_size=len(after),
+            chunks_matched=len(anchors),
+            chunks_total=before_chunk_count,
+            regions=regions
+        )
+
+    def diff_files(self, before_path: str, after_path: str) -> SaveDiff:
+        """Diff two save files over their decompressed DZIP payloads"""
+        with open(before_path, 'rb') as f:
+            before = extract_dzip_payload(f.read())
+        with open(after_path, 'rb') as f:
+            after = extract_dzip_payload(f.read())
+        return self.diff_bytes(before, after, before_path, after_path)
+
+def print_diff(diff: SaveDiff, limit: int = 50):
+    print(f"🔀 Save Diff: {Path(diff.before_path).name} → {Path(diff.after_path).name}")
+    print("=" * 50)
+    print(f"  Payload sizes: {diff.before_size:,} → {diff.after_size:,} bytes")
+    print(f"  Aligned chunks: {diff.chunks_matched}/{diff.chunks_total}")
+    print(f"  Changed regions: {len(diff.regions)} ({diff.changed_bytes:,} bytes)")
+    print()
+
+    for region in diff.regions[:limit]:
+        print(f"  [{region.kind}] 0x{region.before_offset:08X}+{region.before_length} → "
+              f"0x{region.after_offset:08X}+{region.after_length}")
+        print(f"     {region.before_hex or '-'} → {region.after_hex or '-'}")
+        if region.values:
+            print(f"     values: {region.values}")
+        for hit in region.nearby_patterns[:5]:
+            print(f"     near '{hit['pattern']}' ({hit['category']}) at {hit['distance']:+d}")
+    if len(diff.regions) > limit:
+        print(f"  ... {len(diff.regions) - limit} more regions")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Diff two Witcher saves to localise decision variables")
+    parser.add_argument('before', help="Save made just before the decision")
+    parser.add_argument('after', help="Save made just after the decision")
+    parser.add_argument('--chunk-size', type=int, default=4096, help="Average CDC chunk size")
+    parser.add_argument('--context', type=int, default=256, help="Bytes around a change searched for known patterns")
+    parser.add_argument('--json', help="Also write the full diff as JSON to this path")
+    args = parser.parse_args(argv)
+
+    engine = SaveDiffEngine(avg_chunk_size=args.chunk_size, context_bytes=args.context)
+    diff = engine.diff_files(args.before, args.after)
+    print_diff(diff)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(asdict(diff), f)
+
+if __name__ == "__main__":
+    sys.exit(main())
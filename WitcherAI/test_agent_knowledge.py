@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the agents' hashed, bounded knowledge containers
+"""
+
+from agents.agent_knowledge import OutcomeLedger, PatternRegistry, pattern_identity
+from agents.agent_state_store import AgentStateStore
+
+def test_identity_ignores_volatile_fields():
+    found = {'pattern': 'questSystem', 'context': 'header', 'confidence': 0.5, 'tool': 'hex'}
+    rescored = {'pattern': 'questSystem', 'context': 'header', 'confidence': 0.9}
+    assert pattern_identity(found) == pattern_identity(rescored)
+    assert pattern_identity(found) != pattern_identity({'pattern': 'questSystem', 'context': 'footer'})
+
+def test_unhashable_contexts_have_stable_identities():
+    registry = PatternRegistry()
+    assert registry.add({'pattern': 'aryan_fate', 'context': ['act2', {'b': 2, 'a': 1}]})
+    assert not registry.add({'pattern': 'aryan_fate', 'context': ['act2', {'a': 1, 'b': 2}]})
+    assert registry.add({'pattern': 'aryan_fate', 'context': {'act': 3}})
+    assert len(registry) == 2
+
+def test_bytes_patterns_keep_their_identity_across_snapshots(tmp_path):
+    registry = PatternRegistry()
+    registry.add({'pattern': b'questSystem', 'context': b'DZIP'})
+    registry.add(b'activeBool')
+
+    store = AgentStateStore(str(tmp_path), "agent")
+    store.load()
+    store.snapshot({'patterns': registry.to_state()})
+    store.close()
+    state, _ = AgentStateStore(str(tmp_path), "agent").load()
+    restored = PatternRegistry.from_state(state['patterns'])
+
+    assert len(restored) == 2
+    assert {'pattern': b'questSystem', 'context': b'DZIP'} in restored
+    assert {'pattern': 'questSystem', 'context': 'DZIP'} in restored
+    assert b'activeBool' in restored
+
+def test_registry_forgets_oldest_patterns_first():
+    registry = PatternRegistry(max_patterns=2)
+    for name in ('a', 'b', 'c'):
+        registry.add({'pattern': name})
+    assert [pattern['pattern'] for pattern in registry] == ['b', 'c']
+    assert {'pattern': 'a'} not in registry
+
+def test_ledger_bounds_keys_and_history():
+    ledger = OutcomeLedger(max_keys=2, max_records_per_key=3)
+    for n in range(5):
+        ledger.record("a.sav", {'n': n})
+    ledger.record("b.sav", {'n': 0})
+    ledger.record("c.sav", {'n': 0})
+
+    assert list(ledger.keys()) == ["b.sav", "c.sav"]
+    assert ledger.total_recorded == 7
+
+    ledger.record("b.sav", {'n': 1})
+    restored = OutcomeLedger.from_state(ledger.to_state())
+    assert restored.outcomes("b.sav") == [{'n': 0}, {'n': 1}]
+    assert restored.latest("c.sav") == {'n': 0}
+    assert restored.total_recorded == 8
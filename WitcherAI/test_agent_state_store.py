@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the agents' snapshot + write-ahead log state store
+"""
+
+import json
+
+from agents.agent_state_store import AgentStateStore
+
+def test_replays_log_after_snapshot(tmp_path):
+    store = AgentStateStore(str(tmp_path), "agent")
+    store.load()
+    store.append({"n": 1})
+    store.append({"n": 2})
+    store.snapshot({"seen": [1, 2]})
+    store.append({"n": 3})
+    store.close()
+
+    state, events = AgentStateStore(str(tmp_path), "agent").load()
+    assert state == {"seen": [1, 2]}
+    assert events == [{"n": 3}]
+
+def test_snapshotted_events_are_not_replayed_twice(tmp_path):
+    store = AgentStateStore(str(tmp_path), "agent")
+    store.load()
+    for n in range(3):
+        store.append({"n": n})
+    log = store.log_path.read_bytes()
+    store.snapshot({"seen": 3})
+    store.close()
+
+    # Crash between writing the snapshot and truncating the log
+    store.log_path.write_bytes(log)
+    state, events = AgentStateStore(str(tmp_path), "agent").load()
+    assert state == {"seen": 3}
+    assert events == []
+
+def test_torn_last_line_is_dropped_and_later_appends_survive(tmp_path):
+    store = AgentStateStore(str(tmp_path), "agent")
+    store.load()
+    store.append({"n": 1})
+    store.append({"n": 2})
+    store.close()
+    with open(store.log_path, 'a', encoding='utf-8') as f:
+        f.write('{"seq": 3, "event": {"n"')
+
+    store = AgentStateStore(str(tmp_path), "agent")
+    assert store.load() == (None, [{"n": 1}, {"n": 2}])
+    store.append({"n": 3})
+    store.close()
+
+    store = AgentStateStore(str(tmp_path), "agent")
+    assert store.load() == (None, [{"n": 1}, {"n": 2}, {"n": 3}])
+    assert store.sequence == 3
+    with open(store.log_path, 'r', encoding='utf-8') as f:
+        assert [json.loads(line)['seq'] for line in f] == [1, 2, 3]
+
+def test_unterminated_last_line_counts_as_torn(tmp_path):
+    store = AgentStateStore(str(tmp_path), "agent")
+    store.load()
+    store.append({"n": 1})
+    store.close()
+    with open(store.log_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'seq': 2, 'event': {"n": 2}}))  # Complete JSON, newline never written
+
+    store = AgentStateStore(str(tmp_path), "agent")
+    assert store.load() == (None, [{"n": 1}])
+    store.append({"n": 2})
+    store.close()
+    assert AgentStateStore(str(tmp_path), "agent").load() == (None, [{"n": 1}, {"n": 2}])
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark history store and its median/IQR regression check
+"""
+
+import pytest
+
+from benchmarks.benchmark_history import BenchmarkHistory, summarize
+
+ENVIRONMENT = {'python': '3.11.0', 'platform': 'test', 'processor': 'x86_64', 'cpu_count': 8}
+CORPUS = {'seed': 0, 'count': 4}
+
+def reports(stage_seconds, environment=ENVIRONMENT, corpus=CORPUS):
+    """One report per trial from {stage: [seconds per trial]}"""
+    trials = len(next(iter(stage_seconds.values())))
+    return [{
+        'environment': environment,
+        'corpus': corpus,
+        'stages': {stage: {'seconds': seconds[trial], 'items': 10, 'bytes': 1024, 'peak_rss_mb': 50.0 + trial}
+                   for stage, seconds in stage_seconds.items()}
+    } for trial in range(trials)]
+
+def test_summarize_uses_median_and_iqr():
+    summary = summarize([1.0, 2.0, 3.0, 4.0, 100.0])
+    assert summary['median'] == 3.0
+    assert (summary['q1'], summary['q3'], summary['iqr']) == (2.0, 4.0, 2.0)
+    assert summarize([0.5]) == {'median': 0.5, 'q1': 0.5, 'q3': 0.5, 'iqr': 0.0, 'n': 1}
+
+def test_trials_round_trip_through_the_history(tmp_path):
+    history = BenchmarkHistory(str(tmp_path / "history.db"))
+    run_id = history.record(reports({'hex_analyzer': [0.2, 0.1, 0.3]}), label="baseline")
+
+    stats = history.stage_stats(run_id)['hex_analyzer']
+    assert stats['median'] == pytest.approx(0.2)
+    assert stats['n'] == 3
+    assert stats['peak_rss_mb'] == 52.0
+    assert history.environment_of(run_id) == {'environment': ENVIRONMENT, 'corpus': CORPUS}
+    assert [run['label'] for run in history.runs()] == ["baseline"]
+
+def test_resolve_looks_before_the_candidate(tmp_path):
+    history = BenchmarkHistory(str(tmp_path / "history.db"))
+    first = history.record(reports({'hex_analyzer': [0.1]}), label="release")
+    second = history.record(reports({'hex_analyzer': [0.1]}))
+    third = history.record(reports({'hex_analyzer': [0.1]}), label="release")
+
+    assert history.resolve('latest', before=third) == second
+    assert history.resolve('release', before=third) == first
+    assert history.resolve('release') == third
+    assert history.resolve(str(first)) == first
+    assert history.resolve('999') is None
+
+def test_only_slowdowns_beyond_noise_regress(tmp_path):
+    history = BenchmarkHistory(str(tmp_path / "history.db"))
+    baseline = history.record(reports({
+        'hex_analyzer': [1.00, 1.01, 0.99, 1.00, 1.02],
+        'db_ingest': [1.0, 0.7, 1.3, 0.9, 1.1],
+        'confidence': [0.001, 0.001, 0.001, 0.001, 0.001],
+    }))
+    candidate = history.record(reports({
+        'hex_analyzer': [1.30, 1.31, 1.29, 1.30, 1.32],  # Clear 30% shift
+        'db_ingest': [1.15, 0.85, 1.45, 1.05, 1.25],  # 15% slower but within the IQR
+        'confidence': [0.002, 0.002, 0.002, 0.002, 0.002],  # 2x, below min_delta
+    }))
+
+    comparison = history.compare(baseline, candidate)
+    assert comparison['regressions'] == ['hex_analyzer']
+    assert comparison['stages']['hex_analyzer']['change'] == pytest.approx(0.3)
+    assert not comparison['warnings']
+
+def test_environment_and_corpus_changes_are_warned_about(tmp_path):
+    history = BenchmarkHistory(str(tmp_path / "history.db"))
+    baseline = history.record(reports({'hex_analyzer': [1.0]}))
+    candidate = history.record(reports({'hex_analyzer': [1.0]}, {**ENVIRONMENT, 'cpu_count': 4},
+                                       {**CORPUS, 'seed': 1}))
+
+    warnings = history.compare(baseline, candidate)['warnings']
+    assert warnings == ["cpu_count differs: 8 → 4", "corpus spec differs - timings are not comparable"]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for ML confidence scoring: batch vs single-pattern parity and the score cache
+"""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from benchmarks.benchmark_suite import SCRATCH_SCHEMA
+from ml.ml_confidence_engine import PatternConfidenceEngine, ResourceLimits
+from ml.pattern_feature_store import PatternFeatureStore
+from witcher_hex_analyzer import AnalysisResult
+
+PATTERNS = ['questSystem', 'activeBool', 'aryan_la_valette_fate', 'DZIP', 'geralt_sword', 'noise_00ff', '']
+CONTEXTS = ['quest decision', 'boolean flag', 'political choice', 'header', 'inventory', 'padding', '']
+
+@pytest.fixture
+def engine(tmp_path):
+    db_path = str(tmp_path / "scratch.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCRATCH_SCHEMA)
+    rows = [(f"quest_{n}_System", 'marker', 'synthetic', 0.9, 'text', 'quest decision', 'confirmed') for n in range(30)]
+    rows += [(f"noise_{n:04x}", 'noise', 'synthetic', 0.3, 'text', 'padding', 'rejected') for n in range(30)]
+    conn.executemany("""
+        INSERT INTO PatternGameMapping
+        (pattern_text, pattern_type, game_concept, confidence_level, data_type, context_clues, verification_status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+    engine = PatternConfidenceEngine(db_path, model_path=str(tmp_path / "model.joblib"))
+    engine.train_confidence_model()
+    return engine
+
+def test_batch_matches_single_pattern_scores(engine):
+    frequencies = [3, None, 40, 1, None, 0, None]
+    batch = engine.predict_confidence_batch(PATTERNS, CONTEXTS, frequencies)
+
+    engine.clear_score_cache()
+    single = [engine.predict_confidence(p, c, f) for p, c, f in zip(PATTERNS, CONTEXTS, frequencies)]
+    np.testing.assert_allclose(batch, single)
+    assert all(0.5 <= score <= 0.95 for score in single)
+
+def test_cached_scores_match_fresh_scores(engine):
+    fresh = engine.predict_confidence_batch(PATTERNS, CONTEXTS)
+    cached = engine.predict_confidence_batch(PATTERNS, CONTEXTS)
+    np.testing.assert_array_equal(fresh, cached)
+    assert engine.cache_stats()['hits'] == len(PATTERNS)
+
+def test_chunked_scoring_matches_unchunked(engine):
+    unchunked = engine.predict_confidence_batch(PATTERNS, CONTEXTS)
+
+    chunked_engine = PatternConfidenceEngine(engine.db_path, model_path=str(engine.model_path),
+                                             resources=ResourceLimits(max_memory_mb=1))
+    chunked_engine.prediction_chunk_rows = lambda: 2
+    np.testing.assert_allclose(chunked_engine.predict_confidence_batch(PATTERNS, CONTEXTS), unchunked)
+
+def test_batch_scores_with_one_model_snapshot(engine):
+    model, tfidf, _ = engine.scoring_snapshot()
+    expected = engine.score_uncached(PATTERNS, CONTEXTS, None)
+
+    # A retrain landing mid-batch must not leak its idf weights into a batch already scoring
+    engine.tfidf = None
+    np.testing.assert_allclose(engine.score_uncached(PATTERNS, CONTEXTS, None, (model, tfidf, 0)), expected)
+
+def test_features_ingested_elsewhere_invalidate_cached_scores(engine):
+    engine.feature_store.revalidate_interval = 0
+    engine.predict_confidence_batch(PATTERNS, CONTEXTS)
+
+    # An agent ingesting through its own store (or process) must not leave stale scores behind
+    patterns = [{'pattern': 'questSystem', 'type': 'quest', 'count': 500, 'positions': [0, 90_000]}]
+    PatternFeatureStore(engine.db_path).ingest_analysis(AnalysisResult("a.sav", 100_000, '', patterns, [], {}), "witcher2")
+
+    hits = engine.cache_stats()['hits']
+    engine.predict_confidence_batch(PATTERNS, CONTEXTS)
+    assert engine.cache_stats()['hits'] == hits
+
+def test_tiny_memory_budget_still_trains(engine):
+    resources = ResourceLimits(max_memory_mb=1)
+    resources.effective_n_jobs = lambda: 64  # Budget per worker rounds down to zero rows
+    tiny = PatternConfidenceEngine(engine.db_path, model_path=str(engine.model_path), resources=resources)
+    assert tiny.training_sample_size(60) == 1
+    assert tiny.train_confidence_model(force=True)
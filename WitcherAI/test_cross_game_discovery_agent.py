@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the cross-game discovery agent's strategy execution and durable knowledge
+"""
+
+import sqlite3
+
+from agents.cross_game_discovery_agent import CrossGameDiscoveryAgent, SaveDiscovery
+from benchmarks.benchmark_suite import SCRATCH_SCHEMA
+
+def successful_analysis(save_path, game_key, patterns):
+    return {"status": "success", "save_path": save_path, "game": game_key,
+            "patterns_found": patterns, "pattern_count": len(patterns)}
+
+def pattern(value, pattern_type="quest", confidence=0.7):
+    return {"type": pattern_type, "value": value, "game": "Witcher2", "confidence": confidence}
+
+def discovery(save_files):
+    return SaveDiscovery("Witcher 2", save_files, len(save_files), 1.0, save_files[-1], save_files[0])
+
+def test_single_game_analysis_uses_the_chosen_target_save(tmp_path):
+    agent = CrossGameDiscoveryAgent(str(tmp_path / "missing.db"), ingest_features=False)
+    analysed = []
+    agent.analyze_save_cached = lambda save_path, game_key: (
+        analysed.append(save_path) or successful_analysis(save_path, game_key, []))
+
+    discoveries = {"Witcher2": discovery(["old.sav", "mid.sav", "new.sav"])}
+    strategy = agent.decide_analysis_strategy(discoveries)
+    assert strategy["target_save"] == "new.sav"
+
+    strategy["target_save"] = "mid.sav"
+    agent.execute_cross_game_analysis(strategy, discoveries)
+    assert analysed == ["mid.sav"]
+
+def test_session_count_is_not_capped_by_retained_results(tmp_path):
+    agent = CrossGameDiscoveryAgent(str(tmp_path / "missing.db"), state_dir=str(tmp_path / "state"), ingest_features=False)
+    for _ in range(15):
+        agent.remember({"kind": "session", "results": {"analyses": {}}})
+    agent.state_store.snapshot(agent.export_state())
+    for _ in range(10):
+        agent.remember({"kind": "session", "results": {"analyses": {}}})
+    agent.state_store.close()
+
+    restored = CrossGameDiscoveryAgent(str(tmp_path / "missing.db"), state_dir=str(tmp_path / "state"),
+                                       ingest_features=False)
+    assert restored.knowledge["discovery_sessions"] == 25
+    assert len(restored.knowledge["analysis_results"]) == 20
+
+def test_combined_analyses_merge_repeated_patterns(tmp_path):
+    agent = CrossGameDiscoveryAgent(str(tmp_path / "missing.db"), ingest_features=False)
+    combined = agent.combine_game_analyses("Witcher2", [
+        successful_analysis("a.sav", "Witcher2", [pattern("questSystem", confidence=0.6), pattern("activeBool")]),
+        successful_analysis("b.sav", "Witcher2", [pattern("questSystem", confidence=0.9)]),
+    ])
+    merged = {p["value"]: p for p in combined["patterns_found"]}
+    assert combined["save_paths"] == ["a.sav", "b.sav"]
+    assert (merged["questSystem"]["occurrences"], merged["questSystem"]["confidence"]) == (2, 0.9)
+    assert merged["activeBool"]["occurrences"] == 1
+
+def test_stored_patterns_are_one_row_per_game(tmp_path):
+    db_path = str(tmp_path / "knowledge.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCRATCH_SCHEMA)
+    conn.close()
+
+    agent = CrossGameDiscoveryAgent(db_path, ingest_features=False)
+    repeated = [pattern("questSystem"), pattern("questSystem"), pattern("activeBool", "variable")]
+    agent.store_patterns_in_database({"analyses": {
+        "Witcher2": successful_analysis("a.sav", "Witcher2", repeated),
+        "Witcher3": successful_analysis("b.sav", "Witcher3", repeated[:1]),
+    }})
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT game_concept, pattern_text FROM PatternGameMapping ORDER BY 1, 2").fetchall()
+    conn.close()
+    assert rows == [("Witcher2_discovery", "activeBool"), ("Witcher2_discovery", "questSystem"),
+                    ("Witcher3_discovery", "questSystem")]
+
+def test_result_set_carries_offsets_from_the_analyzer_output(tmp_path):
+    agent = CrossGameDiscoveryAgent(str(tmp_path / "missing.db"), ingest_features=False)
+    output = ("📋 Patterns Found: 2\n"
+              "  🟢 Quest state: 3 occurrences\n"
+              "     First at: 0x0000001A\n"
+              "  🟡 Decision variable: 1 occurrences\n")
+    patterns = agent.extract_patterns_from_output(output, "Witcher2")
+    assert [p.get("offset") for p in patterns] == [None, 0x1A, None]
+
+    patterns.append({**pattern("roche_path"), "positions": [64, 128]})
+    results = {"analyses": {"Witcher2": successful_analysis("a.sav", "Witcher2", patterns)}}
+    hits = agent.build_result_set(results).hits
+    assert [hit.offset for hit in hits] == [-1, 0x1A, -1, 64]
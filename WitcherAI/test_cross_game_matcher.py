@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the cross-game hash-join matcher and its MinHash/LSH near matches
+"""
+
+import pytest
+
+from cross_game_matcher import CrossGameMatcher, normalize_pattern_key, shingles
+
+def test_keys_normalize_case_separators_and_status_suffixes():
+    assert {normalize_pattern_key(text) for text in
+            ("RochePath_Confirmed", "roche-path-2", "roche_path_confirmed", "rochePath")} == {"roche_path"}
+    assert normalize_pattern_key("Flag") == "flag"
+
+def test_hash_join_reports_each_key_once_when_it_becomes_shared():
+    matcher = CrossGameMatcher()
+    assert matcher.add("Witcher1", [{"type": "RochePath"}, {"type": "Inventory"}]) == []
+    assert matcher.add("Witcher2", [{"type": "roche_path_done"}, {"type": "roche-path"}]) == ["roche_path"]
+    assert matcher.add("Witcher3", [{"type": "RochePath"}]) == []
+
+    [match] = matcher.cross_game_patterns()
+    assert match["pattern_type"] == "roche_path"
+    assert match["counts_by_game"] == {"Witcher1": 1, "Witcher2": 2, "Witcher3": 1}
+    assert match["transfer_potential"] == "high"
+
+def test_samples_stay_bounded():
+    matcher = CrossGameMatcher(sample_size=3)
+    matcher.add("Witcher2", ({"type": "questSystem", "n": n} for n in range(1000)))
+    bucket = matcher.buckets["quest_system"]
+    assert bucket.instance_count == 1000
+    assert len(bucket.samples) == 3
+
+def test_similarity_estimates_shingle_jaccard():
+    matcher = CrossGameMatcher(num_perm=256, bands=32)
+    matcher.add("Witcher2", [{"type": "aryan_la_valette_fate"}, {"type": "aryan_valette_fate"}])
+    a, b = shingles("aryan_la_valette_fate"), shingles("aryan_valette_fate")
+    assert matcher.similarity("aryan_la_valette_fate", "aryan_valette_fate") == pytest.approx(
+        len(a & b) / len(a | b), abs=0.1)
+
+def test_near_matches_span_games_and_respect_threshold():
+    matcher = CrossGameMatcher()
+    matcher.add("Witcher2", [{"type": "aryan_la_valette_fate"}, {"type": "geralt_sword"}])
+    matcher.add("Witcher3", [{"type": "aryan_valette_fate"}, {"type": "dandelion_lute"}])
+    matcher.add("Witcher3", [{"type": "geralt_swords_inv"}])
+
+    pairs = {frozenset(match["pattern_keys"]) for match in matcher.near_matches()}
+    assert frozenset({"aryan_la_valette_fate", "aryan_valette_fate"}) in pairs
+    assert all("dandelion_lute" not in pair for pair in pairs)
+    assert not list(matcher.near_matches(threshold=1.01))
+
+def test_same_game_near_duplicates_are_not_reported():
+    matcher = CrossGameMatcher()
+    matcher.add("Witcher2", [{"type": "aryan_la_valette_fate"}, {"type": "aryan_valette_fate"}])
+    assert not list(matcher.near_matches())
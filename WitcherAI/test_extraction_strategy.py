@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the UCB1 extraction-size strategy
+"""
+
+import threading
+
+from agents.extraction_strategy import ExtractionStrategy
+
+SMALL_SAVE = 100 * 1024
+LARGE_SAVE = 8 * 1024 * 1024
+
+def test_untried_sizes_are_explored_smallest_first():
+    strategy = ExtractionStrategy((4096, 8192, 16384))
+    assert strategy.choose(SMALL_SAVE) == 4096
+    strategy.record(SMALL_SAVE, 4096, 10, 5.0)
+    assert strategy.choose(SMALL_SAVE) == 8192
+    assert strategy.best(SMALL_SAVE) == 4096
+
+def test_converges_on_highest_yield_per_ms():
+    strategy = ExtractionStrategy((4096, 8192, 16384))
+    patterns_per_ms = {4096: 1.0, 8192: 4.0, 16384: 2.0}
+    for _ in range(200):
+        size = strategy.choose(SMALL_SAVE)
+        strategy.record(SMALL_SAVE, size, int(patterns_per_ms[size] * 10), 10.0)
+
+    assert strategy.best(SMALL_SAVE) == 8192
+    pulls = {size: stats['pulls'] for size, stats in strategy.stats(SMALL_SAVE).items()}
+    assert pulls[8192] > pulls[4096] and pulls[8192] > pulls[16384]
+
+def test_save_size_buckets_learn_independently():
+    strategy = ExtractionStrategy((4096, 8192))
+    strategy.record(SMALL_SAVE, 4096, 50, 1.0)
+    strategy.record(SMALL_SAVE, 8192, 1, 1.0)
+    strategy.record(LARGE_SAVE, 4096, 1, 1.0)
+    strategy.record(LARGE_SAVE, 8192, 50, 1.0)
+    assert strategy.best(SMALL_SAVE) == 4096
+    assert strategy.best(LARGE_SAVE) == 8192
+
+def test_state_round_trip_keeps_measurements():
+    strategy = ExtractionStrategy((4096, 8192), exploration=0.5)
+    strategy.record(SMALL_SAVE, 8192, 30, 3.0)
+    restored = ExtractionStrategy.from_state(strategy.to_state())
+    assert restored.exploration == 0.5
+    assert restored.stats(SMALL_SAVE) == strategy.stats(SMALL_SAVE)
+
+def test_concurrent_workers_lose_no_records():
+    strategy = ExtractionStrategy()
+    save_sizes = [SMALL_SAVE, LARGE_SAVE, 2 * 1024 * 1024, 512 * 1024]
+
+    def worker(offset):
+        for n in range(500):
+            save_size = save_sizes[(n + offset) % len(save_sizes)]
+            strategy.record(save_size, strategy.choose(save_size), 1, 1.0)
+            strategy.to_state()
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(arm[2] for arm in strategy.to_state()['arms']) == 2000
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the hex analyzer's count-only, first-k and all-offset hit modes
+"""
+
+import pytest
+
+from witcher_hex_analyzer import (HIT_MODE_ALL, HIT_MODE_COUNT, HIT_MODE_FIRST, WitcherHexAnalyzer,
+                                  count_occurrences, iter_offsets, self_overlaps)
+
+QUEST_OFFSETS = [10 + 20 * i for i in range(8)]
+
+def sample_save():
+    data = bytearray(200)
+    for offset in QUEST_OFFSETS:
+        data[offset:offset + 5] = b"quest"
+    data[180:190] = b"roche_path"
+    return bytes(data)
+
+def by_pattern(matches):
+    return {match.pattern: match for match in matches}
+
+def test_overlapping_needles_are_counted_at_every_offset():
+    assert self_overlaps(b"abab") and self_overlaps(b"aa")
+    assert not self_overlaps(b"quest")
+    assert count_occurrences(b"aaaa", b"aa") == 3
+    assert list(iter_offsets(b"ababab", b"abab")) == [0, 2]
+    assert list(iter_offsets(b"xquest quest", b"quest")) == [1, 7]
+
+def test_modes_agree_on_counts_and_first_last_offsets():
+    analyzer = WitcherHexAnalyzer()
+    data = sample_save()
+    results = {mode: by_pattern(analyzer.scan_patterns(data, mode=mode, k=3))
+               for mode in (HIT_MODE_COUNT, HIT_MODE_FIRST, HIT_MODE_ALL)}
+
+    for matches in results.values():
+        quest = matches[b"quest"]
+        assert (quest.count, quest.first_position, quest.last_position) == (8, 10, 150)
+        assert matches[b"roche_path"].count == 1
+        assert b"triss" not in matches
+
+    assert list(results[HIT_MODE_COUNT][b"quest"].positions) == []
+    assert list(results[HIT_MODE_FIRST][b"quest"].positions) == QUEST_OFFSETS[:3]
+    assert list(results[HIT_MODE_ALL][b"quest"].positions) == QUEST_OFFSETS
+
+def test_matches_are_sorted_by_confidence_and_filtered_by_category():
+    analyzer = WitcherHexAnalyzer()
+    matches = analyzer.scan_patterns(sample_save())
+    assert [match.pattern for match in matches] == [b"quest", b"roche_path"]
+    assert [match.pattern for match in analyzer.scan_patterns(sample_save(), 'character')] == [b"roche_path"]
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        WitcherHexAnalyzer().scan_patterns(sample_save(), mode='some')
+
+def test_find_patterns_maps_max_positions_onto_modes():
+    analyzer = WitcherHexAnalyzer()
+    data = sample_save()
+    legacy = {limit: {match['pattern']: match for match in analyzer._find_patterns(data, 'quest', limit)}
+              for limit in (None, 0, 2)}
+    assert legacy[None][b"quest"]['positions'] == QUEST_OFFSETS
+    assert legacy[0][b"quest"]['positions'] == []
+    assert legacy[2][b"quest"]['positions'] == QUEST_OFFSETS[:2]
+    assert {match[b"quest"]['count'] for match in legacy.values()} == {8}
+    assert legacy[2][b"quest"]['last_position'] == 150
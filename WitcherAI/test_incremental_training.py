@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental confidence training: delta catch-up at startup vs full retrains
+"""
+
+import sqlite3
+
+import pytest
+
+from benchmarks.benchmark_suite import SCRATCH_SCHEMA
+from ml.ml_confidence_engine import PatternConfidenceEngine
+from witcher_hex_analyzer import AnalysisResult
+
+def execute(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+def add_rows(db_path, prefix, count, status='confirmed'):
+    confidence = 0.9 if status == 'confirmed' else 0.3
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executemany("""
+            INSERT INTO PatternGameMapping
+            (pattern_text, pattern_type, game_concept, confidence_level, data_type, context_clues,
+             verification_status, updated_at)
+            VALUES (?, 'marker', 'synthetic', ?, 'text', 'quest decision', ?, datetime('now', '+1 minute'))
+        """, [(f"{prefix}_{n}", confidence, status) for n in range(count)])
+        conn.commit()
+    finally:
+        conn.close()
+
+@pytest.fixture
+def grown_engine(tmp_path):
+    """Engine whose persisted model has had one delta update since its full training"""
+    db_path = str(tmp_path / "scratch.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCRATCH_SCHEMA)
+    conn.close()
+    add_rows(db_path, "quest", 30)
+    add_rows(db_path, "noise", 30, status='rejected')
+
+    engine = PatternConfidenceEngine(db_path, model_path=str(tmp_path / "model.joblib"))
+    engine.train_confidence_model()
+    add_rows(db_path, "delta", 5)
+    assert engine.update_model_incrementally() == 5
+    assert engine.read_model_metadata()['delta_updates'] == 1
+    return engine
+
+def restart(engine):
+    restarted = PatternConfidenceEngine(engine.db_path, model_path=str(engine.model_path))
+    restarted.train_confidence_model()
+    return restarted.read_model_metadata()
+
+def test_startup_catches_up_on_delta_only(grown_engine):
+    add_rows(grown_engine.db_path, "later", 5)
+    metadata = restart(grown_engine)
+    assert metadata['delta_updates'] == 2
+    assert metadata['training_rows'] == 70
+
+def test_deleted_row_forces_full_retrain(grown_engine):
+    execute(grown_engine.db_path, "DELETE FROM PatternGameMapping WHERE pattern_text = 'quest_0'")
+    metadata = restart(grown_engine)
+    assert metadata['delta_updates'] == 0
+    assert metadata['training_rows'] == 64
+
+def test_edit_without_updated_at_bump_forces_full_retrain(grown_engine):
+    execute(grown_engine.db_path, """
+        UPDATE PatternGameMapping SET verification_status = 'rejected', confidence_level = 0.2
+        WHERE pattern_text = 'quest_1'
+    """)
+    assert restart(grown_engine)['delta_updates'] == 0
+
+def test_feature_table_change_forces_full_retrain(grown_engine):
+    patterns = [{'pattern': 'quest_0', 'type': 'quest', 'count': 2, 'positions': [10, 20]}]
+    grown_engine.feature_store.ingest_analysis(AnalysisResult("a.sav", 100, '', patterns, [], {}), "witcher2")
+    assert restart(grown_engine)['delta_updates'] == 0
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for the corpus feature store: per-save ingestion and cross-instance cache freshness
+"""
+
+import os
+
+from ml.pattern_feature_store import PatternFeatureStore
+from witcher_hex_analyzer import AnalysisResult
+
+def analysis(save_path, pattern_counts, file_size=1000):
+    patterns = [{'pattern': pattern, 'type': 'quest', 'count': n, 'positions': [10, 10 + n]}
+                for pattern, n in pattern_counts.items()]
+    return AnalysisResult(save_path, file_size, '', patterns, [], {})
+
+def test_reanalysed_save_replaces_its_counts(tmp_path):
+    store = PatternFeatureStore(str(tmp_path / "features.db"))
+    store.ingest_analysis(analysis(str(tmp_path / "a.sav"), {"questSystem": 3, "activeBool": 1}), "Witcher2")
+    store.ingest_analysis(analysis(str(tmp_path / "b.sav"), {"questSystem": 2}), "witcher3")
+    store.ingest_analysis(analysis(str(tmp_path / "a.sav"), {"questSystem": 5}), "witcher2")
+
+    assert store.lookup(["questSystem", "activeBool", "unseen"]) == [
+        (7, 2, 2, 0.0035),
+        (0, 0, 0, 0.0),
+        (0, 0, 0, 0.0),
+    ]
+
+def test_cached_features_see_other_writers(tmp_path):
+    db_path = str(tmp_path / "features.db")
+    reader, writer = PatternFeatureStore(db_path), PatternFeatureStore(db_path)
+    reader.revalidate_interval = 0
+    assert reader.lookup(["questSystem"]) == [(0, 0, 0, 0.0)]
+    version = reader.version()
+
+    writer.ingest_analysis(analysis(str(tmp_path / "a.sav"), {"questSystem": 3}), "witcher2")
+    assert reader.lookup(["questSystem"])[0][0] == 3
+    assert reader.version() != version
+
+def test_ingest_save_skips_unchanged_saves(tmp_path):
+    save = tmp_path / "a.sav"
+    save.write_bytes(b"DZIP" + b"questSystem\x00" * 4)
+    store = PatternFeatureStore(str(tmp_path / "features.db"))
+
+    assert store.ingest_save(str(save), "witcher2") > 0
+    assert store.ingest_save(str(save), "witcher2") == 0
+
+    save.write_bytes(b"DZIP" + b"questSystem\x00" * 8)
+    os.utime(save, (save.stat().st_atime, save.stat().st_mtime + 10))
+    assert store.ingest_save(str(save), "witcher2") > 0
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the bit-packed pattern presence index
+"""
+
+from array import array
+from pathlib import Path
+
+from pattern_presence_index import PatternPresenceIndex, delta_decode, delta_encode
+
+def hit(pattern, positions):
+    return {'pattern': pattern, 'count': len(positions), 'positions': positions}
+
+def sample_index(tmp_path):
+    index = PatternPresenceIndex()
+    index.add_patterns(str(tmp_path / "a.sav"), [hit('quest', [4, 40, 400]), hit('roche_path', [90])], mtime=1.0)
+    index.add_patterns(str(tmp_path / "b.sav"), [hit('quest', [8]), hit('iorveth_path', [70])], mtime=2.0)
+    index.add_patterns(str(tmp_path / "c.sav"), [hit(b'triss', [12])], mtime=3.0)
+    return index
+
+def names(index, bitset):
+    return sorted(Path(path).name for path in index.decode(bitset))
+
+def test_delta_encoding_round_trips_unsorted_offsets():
+    encoded = delta_encode([400, 4, 40])
+    assert list(encoded) == [4, 36, 360]
+    assert delta_decode(encoded) == [4, 40, 400]
+    assert delta_decode(array('I')) == []
+
+def test_boolean_queries(tmp_path):
+    index = sample_index(tmp_path)
+    assert names(index, index.query(all_of=['quest'])) == ["a.sav", "b.sav"]
+    assert names(index, index.query(any_of=['roche_path', 'iorveth_path'])) == ["a.sav", "b.sav"]
+    assert names(index, index.query(all_of=['quest'], none_of=['roche_path'])) == ["b.sav"]
+    assert names(index, index.query(none_of=['quest'])) == ["c.sav"]
+    assert index.query(all_of=['never_seen']) == 0
+    assert index.cardinality(index.all_saves) == 3
+
+def test_readding_a_save_replaces_its_entry(tmp_path):
+    index = sample_index(tmp_path)
+    index.add_patterns(str(tmp_path / "a.sav"), [hit('iorveth_path', [16])], mtime=4.0)
+
+    assert len(index.saves) == 3
+    assert names(index, index.having('roche_path')) == []
+    assert names(index, index.having('quest')) == ["b.sav"]
+    assert names(index, index.having('iorveth_path')) == ["a.sav", "b.sav"]
+    assert index.positions('quest', str(tmp_path / "a.sav")) == []
+
+def test_timeline_is_ordered_by_save_mtime(tmp_path):
+    index = sample_index(tmp_path)
+    timeline = index.timeline('quest')
+    assert [row['mtime'] for row in timeline] == [1.0, 2.0, 3.0]
+    assert [(row['count'], row['first_offset']) for row in timeline] == [(3, 4), (1, 8), (0, None)]
+
+def test_save_and_load_round_trip(tmp_path):
+    index = sample_index(tmp_path)
+    index.save(str(tmp_path / "index.json"))
+    loaded = PatternPresenceIndex.load(str(tmp_path / "index.json"))
+
+    assert loaded.saves == index.saves
+    assert loaded.bitsets == index.bitsets
+    assert loaded.positions('quest', str(tmp_path / "a.sav")) == [4, 40, 400]
+    assert loaded.timeline('triss') == index.timeline('triss')
+
+def test_add_files_indexes_every_offset(tmp_path):
+    save = tmp_path / "scan.sav"
+    save.write_bytes(b"DZIP" + b"\x00" * 12 + b"quest" + b"\x00" * 100 + b"quest" + b"roche_path")
+    index = PatternPresenceIndex()
+    assert index.add_files([str(save)]) == 1
+    assert index.positions('quest', str(save)) == [16, 121]
+    assert names(index, index.query(all_of=['DZIP', 'roche_path'])) == ["scan.sav"]
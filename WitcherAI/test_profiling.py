@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the --profile mode: cProfile stats, collapsed stacks and allocation report
+"""
+
+import contextlib
+import pstats
+import time
+
+from profiling import RunProfiler, StackSampler, profiling
+
+def busy_work(seconds):
+    deadline = time.perf_counter() + seconds
+    chunks = []
+    while time.perf_counter() < deadline:
+        chunks.append(bytes(1024))
+    return len(chunks)
+
+def test_disabled_profiling_is_a_no_op():
+    assert isinstance(profiling("run", False), contextlib.nullcontext)
+    assert isinstance(profiling("run", True, output_dir="unused"), RunProfiler)
+
+def test_profiled_run_writes_every_report(tmp_path):
+    with profiling("hex_analysis", True, output_dir=str(tmp_path), sample_interval=0.001) as profiler:
+        busy_work(0.1)
+
+    assert set(profiler.paths) == {'stats', 'collapsed', 'allocations'}
+    assert all(path.parent == tmp_path and path.name.startswith("hex_analysis_") for path in profiler.paths.values())
+
+    stats = pstats.Stats(str(profiler.paths['stats']))
+    assert any(function == 'busy_work' for _, _, function in stats.stats)
+
+    allocations = profiler.paths['allocations'].read_text(encoding='utf-8')
+    assert allocations.startswith("Peak traced memory:")
+    assert profiler.peak_bytes > 0
+
+def test_collapsed_stacks_are_rooted_at_the_thread_name(tmp_path):
+    with RunProfiler("agent", output_dir=str(tmp_path), sample_interval=0.001, memory=False) as profiler:
+        busy_work(0.1)
+
+    assert 'allocations' not in profiler.paths
+    lines = profiler.paths['collapsed'].read_text(encoding='utf-8').splitlines()
+    assert lines
+    for line in lines:
+        stack, samples = line.rsplit(' ', 1)
+        assert int(samples) > 0
+        assert "StackSampler" not in stack.split(';')[0]
+    assert any(line.startswith("MainThread;") and "busy_work (test_profiling.py:" in line for line in lines)
+
+def test_collapsed_output_is_sorted_by_samples():
+    sampler = StackSampler()
+    sampler.stacks.update({"MainThread;main;scan": 3, "MainThread;main": 7})
+    assert sampler.collapsed() == "MainThread;main 7\nMainThread;main;scan 3\n"
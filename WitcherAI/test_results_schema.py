@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Round-trip tests for the .wres columnar results format
+"""
+
+from results_schema import DecisionClassification, PatternHit, PatternScore, ResultSet
+
+def sample_result_set():
+    result_set = ResultSet()
+    result_set.extend([
+        PatternHit("saves/a.sav", "witcher2", "questSystem", "quest", 0x1F40, 0.95),
+        PatternHit("saves/a.sav", "witcher2", "questSystem", "quest", 0x2F40, 0.95),
+        PatternHit("saves/b.sav", "witcher3", "Geralt", "character", -1, 0.8),
+        PatternHit("saves/ü.sav", "witcher1", "wiedźmin", "character", 2 ** 40, 0.5),
+        DecisionClassification("saves/a.sav", "witcher2", "aryan_fate", "D001", "political", "major", 0.9),
+        PatternScore("questSystem", 0.875, 3),
+        PatternScore("activeBool", 0.5, 3),
+    ])
+    return result_set
+
+def test_binary_round_trip(tmp_path):
+    original = sample_result_set()
+    path = tmp_path / "results.wres"
+    original.write_binary(str(path))
+
+    loaded = ResultSet.read_binary(str(path))
+    assert loaded.tables == original.tables
+    assert all(type(hit) is PatternHit for hit in loaded.hits)
+
+def test_binary_columns_match_records(tmp_path):
+    original = sample_result_set()
+    path = tmp_path / "results.wres"
+    original.write_binary(str(path))
+
+    columns = ResultSet.read_binary_columns(str(path))
+    assert columns['PatternHit']['offset'] == [hit.offset for hit in original.hits]
+    assert columns['PatternHit']['pattern'] == [hit.pattern for hit in original.hits]
+    assert columns['PatternScore']['score'] == [score.score for score in original.scores]
+
+def test_empty_result_set_round_trip(tmp_path):
+    path = tmp_path / "empty.wres"
+    ResultSet().write_binary(str(path))
+
+    loaded = ResultSet.read_binary(str(path))
+    assert len(loaded) == 0
+    assert set(loaded.tables) == set(ResultSet().tables)
+
+def test_save_and_load_pick_format_by_extension(tmp_path):
+    original = sample_result_set()
+    for name in ("results.wres", "results.ndjson"):
+        original.save(str(tmp_path / name))
+        assert ResultSet.load(str(tmp_path / name)).tables == original.tables
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the decision-coverage retention planner (greedy set cover)
+"""
+
+import sqlite3
+
+from retention_planner import DecisionStateExtractor, RetentionPlanner, SaveRecord
+
+def record(name, mtime, states, size=100):
+    return SaveRecord(name, size, mtime, set(states))
+
+def kept_paths(plan):
+    return sorted(item['path'] for item in plan.keep)
+
+def test_kept_saves_cover_every_state():
+    saves = [
+        record("a.sav", 1, {"s1", "s2", "s3"}),
+        record("b.sav", 2, {"s3", "s4"}),
+        record("c.sav", 3, {"s1"}),
+        record("d.sav", 4, {"s5"}),
+    ]
+    plan = RetentionPlanner(keep_latest=0).plan(saves)
+
+    covered = set().union(*(save.states for save in saves if save.path in kept_paths(plan)))
+    assert covered == {"s1", "s2", "s3", "s4", "s5"}
+    assert plan.total_states == 5
+    assert kept_paths(plan) == ["a.sav", "b.sav", "d.sav"]
+    assert [item['path'] for item in plan.prune] == ["c.sav"]
+    assert plan.bytes_kept + plan.bytes_reclaimable == 400
+
+def test_greedy_picks_the_largest_gain_first():
+    saves = [
+        record("small_1.sav", 1, {"a", "b"}),
+        record("small_2.sav", 2, {"c", "d"}),
+        record("big.sav", 3, {"a", "b", "c", "d"}),
+    ]
+    plan = RetentionPlanner(keep_latest=0).plan(saves)
+    assert kept_paths(plan) == ["big.sav"]
+    assert plan.keep[0]['new_states'] == ["a", "b", "c", "d"]
+
+def test_newest_saves_are_always_kept():
+    saves = [record("old.sav", 1, {"a", "b"}), record("new.sav", 2, set())]
+    plan = RetentionPlanner(keep_latest=1).plan(saves)
+    reasons = {item['path']: item['reason'] for item in plan.keep}
+    assert reasons == {"new.sav": "newest save", "old.sav": "covers decision states"}
+
+def test_ties_go_to_the_newer_save():
+    saves = [record("older.sav", 1, {"a"}), record("newer.sav", 2, {"a"}), record("latest.sav", 3, set())]
+    plan = RetentionPlanner(keep_latest=0).plan(saves)
+    assert kept_paths(plan) == ["newer.sav"]
+    assert {item['path'] for item in plan.prune} == {"older.sav", "latest.sav"}
+
+def test_plan_is_a_dry_run(tmp_path):
+    save = tmp_path / "redundant.sav"
+    save.write_bytes(b"DZIP")
+    plan = RetentionPlanner(keep_latest=0).plan([record(str(save), 1, set())])
+    assert plan.prune[0]['backup_path'].endswith("redundant.sav")
+    assert save.exists()
+
+def test_extractor_reads_decision_values(tmp_path):
+    db_path = str(tmp_path / "knowledge.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE DecisionReference (decision_id TEXT, variable_name TEXT, possible_values TEXT)")
+    conn.execute("INSERT INTO DecisionReference VALUES ('D001', 'vergen_state', '[\"free\", \"controlled\"]')")
+    conn.commit()
+    conn.close()
+
+    extractor = DecisionStateExtractor(db_path)
+    states = extractor.states(b"\x00" * 32 + b"vergen_state\x00\x01controlled" + b"\x00" * 32, "Witcher 2")
+    assert "decision:D001=controlled" in states
+    assert "decision:D001=free" not in states
+    assert not any(state.startswith("decision:") for state in extractor.states(b"\x00" * 64, "Witcher 2"))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the save archive container: read-back, index chain, compaction and torn appends
+"""
+
+import os
+
+from save_archive import SaveArchive
+
+def test_reads_back_every_append(tmp_path):
+    path = str(tmp_path / "saves.wsar")
+    archive = SaveArchive(path)
+    save = tmp_path / "a.sav"
+    save.write_bytes(b"DZIP" + bytes(range(256)) * 64)
+    archive.add_save(str(save))
+    for n in range(5):
+        archive.add_document(f"doc{n}", {"n": n, "patterns": ["questSystem"] * n})
+
+    reopened = SaveArchive(path)
+    assert reopened.names() == ["a.sav"] + [f"doc{n}" for n in range(5)]
+    assert reopened.read_save("a.sav") == save.read_bytes()
+    assert [reopened.read_document(f"doc{n}")["n"] for n in range(5)] == list(range(5))
+
+def test_archive_grows_linearly(tmp_path):
+    path = str(tmp_path / "docs.wsar")
+    archive = SaveArchive(path)
+    archive.add_document("doc0", {"n": 0})
+    first_append = os.path.getsize(path)
+    for n in range(1, 200):
+        archive.add_document(f"doc{n}", {"n": n})
+
+    assert os.path.getsize(path) < 250 * first_append
+    assert archive.stats()['dead_bytes'] == 0
+
+def test_batch_shares_one_index_segment(tmp_path):
+    path = str(tmp_path / "batch.wsar")
+    archive = SaveArchive(path)
+    with archive.batch():
+        for n in range(3):
+            archive.add_document(f"doc{n}", n)
+
+    reopened = SaveArchive(path)
+    assert reopened.names() == ["doc0", "doc1", "doc2"]
+    assert reopened.index_bytes == archive.index_bytes
+
+def test_compact_drops_replaced_entries(tmp_path):
+    path = str(tmp_path / "compact.wsar")
+    archive = SaveArchive(path)
+    archive.add_document("doc", {"version": 1, "padding": "x" * 4096})
+    archive.add_document("other", {"keep": True})
+    archive.add_document("doc", {"version": 2})
+    assert archive.stats()['dead_bytes'] > 0
+
+    before, after = archive.compact()
+    assert after < before
+    reopened = SaveArchive(path)
+    assert reopened.stats()['dead_bytes'] == 0
+    assert reopened.read_document("doc") == {"version": 2}
+    assert reopened.read_document("other") == {"keep": True}
+
+def test_torn_append_falls_back_to_previous_trailer(tmp_path):
+    path = str(tmp_path / "torn.wsar")
+    archive = SaveArchive(path)
+    archive.add_document("kept", {"n": 1})
+    archive.add_document("torn", {"n": 2})
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 3)
+
+    reopened = SaveArchive(path)
+    assert reopened.names() == ["kept"]
+    reopened.add_document("after", {"n": 3})
+
+    recovered = SaveArchive(path)
+    assert recovered.names() == ["kept", "after"]
+    assert recovered.read_document("after") == {"n": 3}
+    assert recovered.stats()['dead_bytes'] == 0
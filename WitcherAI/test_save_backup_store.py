@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the deduplicating CDC save backup store
+"""
+
+import os
+import random
+
+import pytest
+
+from save_backup_store import SaveBackupStore
+
+def write_save(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+def playthrough(size=300_000, seed=3):
+    return random.Random(seed).randbytes(size)
+
+def test_consecutive_saves_share_chunks(tmp_path):
+    store = SaveBackupStore(str(tmp_path / "store"))
+    data = playthrough()
+    first = store.backup(write_save(tmp_path / "quick.sav", data))
+
+    edited = bytearray(data)
+    edited[150_000:150_004] = b"\xFF\xFF\xFF\xFF"
+    save = write_save(tmp_path / "quick.sav", bytes(edited) + b"tail")
+    os.utime(save, ns=(1, 1))
+    second = store.backup(save)
+
+    assert not first['skipped'] and not second['skipped']
+    assert second['new_chunks'] <= 3
+    assert second['reused_chunks'] >= first['new_chunks'] - 3
+    assert store.stats()['reduction'] > 1.5
+
+def test_unchanged_save_is_skipped(tmp_path):
+    store = SaveBackupStore(str(tmp_path / "store"))
+    save = write_save(tmp_path / "auto.sav", playthrough())
+    backup_id = store.backup(save)['backup_id']
+    assert store.backup(save) == {'backup_id': backup_id, 'skipped': True, 'new_chunks': 0, 'bytes_written': 0}
+    assert not store.backup(save, force=True)['skipped']
+
+def test_restore_round_trips_bytes_and_mtime(tmp_path):
+    store = SaveBackupStore(str(tmp_path / "store"))
+    data = playthrough()
+    save = write_save(tmp_path / "auto.sav", data)
+    os.utime(save, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+    backup_id = store.backup(save)['backup_id']
+
+    restored = store.restore(backup_id, str(tmp_path / "restored" / "auto.sav"))
+    with open(restored, 'rb') as f:
+        assert f.read() == data
+    assert os.stat(restored).st_mtime_ns == 1_600_000_000_000_000_000
+
+@pytest.mark.parametrize("damage", ["missing", "corrupt"])
+def test_failed_restore_leaves_no_partial_file(tmp_path, damage):
+    store = SaveBackupStore(str(tmp_path / "store"))
+    backup_id = store.backup(write_save(tmp_path / "auto.sav", playthrough()))['backup_id']
+    digest = store.manifest(backup_id)['chunks'][-1][0]
+    if damage == "missing":
+        store._chunk_path(digest).unlink()
+    else:
+        store._chunk_path(digest).write_bytes(b"not zlib")
+
+    destination = tmp_path / "restored" / "auto.sav"
+    with pytest.raises(Exception):
+        store.restore(backup_id, str(destination))
+    assert list(destination.parent.iterdir()) == []
+
+def test_list_backups_filters_by_the_saved_file_name(tmp_path):
+    store = SaveBackupStore(str(tmp_path / "store"))
+    foo = store.backup(write_save(tmp_path / "foo.sav", b"DZIP foo" * 100))['backup_id']
+    x_foo = store.backup(write_save(tmp_path / "x_foo.sav", b"DZIP x_foo" * 100))['backup_id']
+
+    assert store.list_backups("foo.sav") == [foo]
+    assert store.list_backups("foo") == [foo]
+    assert store.list_backups("x_foo.sav") == [x_foo]
+    assert store.list_backups("foo.TheWitcherSave") == []
+    assert store.list_backups() == sorted([foo, x_foo])
+
+def test_gc_reclaims_chunks_of_deleted_backups(tmp_path):
+    store = SaveBackupStore(str(tmp_path / "store"))
+    kept = store.backup(write_save(tmp_path / "a.sav", playthrough(seed=1)))['backup_id']
+    dropped = store.backup(write_save(tmp_path / "b.sav", playthrough(seed=2)))
+    store.delete_backup(dropped['backup_id'])
+
+    assert store.gc() == dropped['new_chunks']
+    assert store.stats()['backups'] == 1
+    store.restore(kept, str(tmp_path / "a_restored.sav"))
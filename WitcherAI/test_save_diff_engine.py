@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for content-defined chunking and the CDC save differ's alignment
+"""
+
+import random
+import struct
+
+from content_chunker import chunk_boundaries
+from save_diff_engine import SaveDiffEngine
+
+def payload(size: int = 200_000, seed: int = 7) -> bytes:
+    return random.Random(seed).randbytes(size)
+
+def chunk_contents(data: bytes):
+    return {data[offset:offset + length] for offset, length in chunk_boundaries(data, 512, 2048, 16384)}
+
+def test_chunks_cover_data_contiguously():
+    data = payload()
+    chunks = chunk_boundaries(data, 512, 2048, 16384)
+    assert chunks[0][0] == 0
+    assert all(offset + length == next_offset for (offset, length), (next_offset, _) in zip(chunks, chunks[1:]))
+    assert sum(length for _, length in chunks) == len(data)
+    assert all(length <= 16384 for _, length in chunks)
+
+def test_insertion_only_disturbs_nearby_chunks():
+    before = payload()
+    after = before[:100_000] + b"inserted quest flag" + before[100_000:]
+    before_chunks, after_chunks = chunk_contents(before), chunk_contents(after)
+    assert len(before_chunks - after_chunks) <= 2
+
+def test_insertion_is_aligned_to_one_region():
+    before = payload()
+    inserted = b"\xAB" * 100
+    after = before[:100_000] + inserted + before[100_000:]
+
+    diff = SaveDiffEngine(avg_chunk_size=2048).diff_bytes(before, after)
+    assert diff.chunks_matched >= diff.chunks_total - 2
+    assert len(diff.regions) == 1
+    region = diff.regions[0]
+    assert region.kind == 'inserted'
+    assert (region.before_length, region.after_length) == (0, len(inserted))
+    assert after[region.after_offset:region.after_offset + region.after_length] == inserted
+
+def test_modified_value_is_decoded():
+    before = bytearray(payload())
+    struct.pack_into('<I', before, 150_000, 1)
+    after = bytearray(before)
+    struct.pack_into('<I', after, 150_000, 0xDEADBEEF)
+
+    diff = SaveDiffEngine(avg_chunk_size=2048).diff_bytes(bytes(before), bytes(after))
+    assert len(diff.regions) == 1
+    region = diff.regions[0]
+    assert region.kind == 'modified'
+    assert region.before_offset == region.after_offset
+    assert 150_000 <= region.after_offset and region.after_offset + region.after_length <= 150_004
+    assert diff.changed_bytes <= 4
+
+def test_identical_payloads_have_no_regions():
+    data = payload()
+    diff = SaveDiffEngine(avg_chunk_size=2048).diff_bytes(data, data)
+    assert diff.regions == []
+    assert diff.chunks_matched == diff.chunks_total
+
+def test_block_moved_forward_keeps_the_data_it_jumped_over_aligned():
+    data = payload(300_000)
+    head, moved, tail = data[:150_000], data[150_000:170_000], data[170_000:]
+    before, after = head + moved + tail, moved + head + tail
+
+    diff = SaveDiffEngine(avg_chunk_size=2048).diff_bytes(before, after)
+    # Only the moved block (reported once as inserted, once as deleted) is unaligned
+    assert diff.changed_bytes <= 2 * len(moved) + 2 * 16384
+    assert {region.kind for region in diff.regions} <= {'inserted', 'deleted', 'modified'}
+    assert any(region.kind == 'inserted' and region.after_offset == 0 for region in diff.regions)
+
+def test_repeated_padding_chunks_still_align():
+    data = payload(100_000)
+    before = data + bytes(200_000) + data
+    after = data + bytes(200_000) + b"\x01" + data
+
+    diff = SaveDiffEngine(avg_chunk_size=2048).diff_bytes(before, after)
+    assert diff.changed_bytes == 1
+    assert diff.regions[0].kind == 'inserted'
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the event-driven save watcher on both the inotify and polling backends
+"""
+
+import sys
+import time
+
+import pytest
+
+from agents.save_watcher import SaveWatcher
+
+BACKENDS = [
+    pytest.param(True, id="inotify", marks=pytest.mark.skipif(not sys.platform.startswith('linux'),
+                                                              reason="inotify is Linux-only")),
+    pytest.param(False, id="polling"),
+]
+
+def watcher(directory, use_inotify, **kwargs):
+    return SaveWatcher([str(directory)], settle_seconds=0.2, poll_interval=0.05, use_inotify=use_inotify, **kwargs)
+
+@pytest.mark.parametrize("use_inotify", BACKENDS)
+def test_new_save_is_queued_once(tmp_path, use_inotify):
+    with watcher(tmp_path, use_inotify) as save_watcher:
+        assert save_watcher.backend_name == ("inotify" if use_inotify else "polling")
+        (tmp_path / "notes.txt").write_text("not a save")
+        (tmp_path / "quicksave.sav").write_bytes(b"DZIP" + b"\x00" * 64)
+
+        assert save_watcher.get(timeout=3) == str(tmp_path / "quicksave.sav")
+        assert save_watcher.get(timeout=0.5) is None
+
+@pytest.mark.parametrize("use_inotify", BACKENDS)
+def test_save_is_queued_only_after_writes_settle(tmp_path, use_inotify):
+    save = tmp_path / "autosave.sav"
+    with watcher(tmp_path, use_inotify) as save_watcher:
+        with open(save, 'wb') as f:
+            for _ in range(6):
+                f.write(b"\xAB" * 1024)
+                f.flush()
+                time.sleep(0.08)
+                assert save_watcher.ready.empty()
+
+        assert save_watcher.get(timeout=3) == str(save)
+        assert save_watcher.get(timeout=0.5) is None
+
+@pytest.mark.parametrize("use_inotify", BACKENDS)
+def test_existing_saves_only_queued_when_asked(tmp_path, use_inotify):
+    (tmp_path / "old.sav").write_bytes(b"DZIP")
+    with watcher(tmp_path, use_inotify) as save_watcher:
+        assert save_watcher.get(timeout=0.5) is None
+
+    with watcher(tmp_path, use_inotify, include_existing=True) as save_watcher:
+        assert save_watcher.get(timeout=3) == str(tmp_path / "old.sav")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for the seeded synthetic save corpus used by the benchmarks
+"""
+
+import sqlite3
+import zlib
+
+from benchmarks.synthetic_corpus import CorpusSpec, generate_corpus, load_corpus
+from witcher_hex_analyzer import DZIP_HEADER_SIZE
+
+SMALL = dict(count=4, min_size=64 * 1024, max_size=256 * 1024, markers_per_mb=200.0)
+
+def corpus_bytes(corpus_dir):
+    return {path.name: path.read_bytes() for path in sorted(corpus_dir.iterdir())}
+
+def test_same_seed_gives_identical_saves_and_manifest(tmp_path):
+    first = generate_corpus(str(tmp_path / "a"), CorpusSpec(seed=7, **SMALL))
+    second = generate_corpus(str(tmp_path / "b"), CorpusSpec(seed=7, **SMALL))
+    assert first == second
+    assert corpus_bytes(tmp_path / "a") == corpus_bytes(tmp_path / "b")
+
+    other = generate_corpus(str(tmp_path / "c"), CorpusSpec(seed=8, **SMALL))
+    assert [save['payload_size'] for save in other['saves']] != [save['payload_size'] for save in first['saves']]
+
+def test_planted_markers_are_in_the_payload(tmp_path):
+    manifest = generate_corpus(str(tmp_path), CorpusSpec(seed=1, **SMALL))
+    for save in load_corpus(str(tmp_path))['saves']:
+        data = open(save['path'], 'rb').read()
+        assert data[:4] == b"DZIP"
+        assert len(data) == save['file_size']
+        assert SMALL['min_size'] <= save['payload_size'] <= SMALL['max_size']
+        assert save['planted']
+        for marker, planted in save['planted'].items():
+            assert data.count(marker.encode('utf-8')) >= planted
+    assert manifest['spec']['seed'] == 1
+
+def test_compressed_saves_inflate_to_the_stored_payload(tmp_path):
+    raw = generate_corpus(str(tmp_path / "raw"), CorpusSpec(seed=3, **SMALL))
+    generate_corpus(str(tmp_path / "deflated"), CorpusSpec(seed=3, compressed=True, **SMALL))
+    for save in raw['saves']:
+        stored = (tmp_path / "raw" / save['path']).read_bytes()[DZIP_HEADER_SIZE:]
+        deflated = (tmp_path / "deflated" / save['path']).read_bytes()[DZIP_HEADER_SIZE:]
+        assert zlib.decompress(deflated, -15) == stored
+
+def test_decision_reference_values_become_markers(tmp_path):
+    db_path = str(tmp_path / "knowledge.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE DecisionReference (decision_id TEXT, variable_name TEXT, possible_values TEXT)")
+    conn.execute("INSERT INTO DecisionReference VALUES ('D001', 'vergen_state', '[\"free\", \"controlled\"]')")
+    conn.commit()
+    conn.close()
+
+    manifest = generate_corpus(str(tmp_path / "corpus"), CorpusSpec(seed=0, **SMALL), db_path)
+    assert manifest['markers'][-2:] == ["vergen_state\x00free", "vergen_state\x00controlled"]
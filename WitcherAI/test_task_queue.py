@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the analysis agent's de-duplicating task queue and worker-pool drain
+"""
+
+import threading
+import time
+
+from agents.witcher_analysis_agent import AnalysisGoal, AnalysisTask, TaskQueue, WitcherAnalysisAgent
+
+def task(save, priority=5, goal=AnalysisGoal.DISCOVER_PATTERNS):
+    return AnalysisTask(goal, save, [], priority, {})
+
+def test_requeued_task_keeps_one_entry_at_higher_priority():
+    queue = TaskQueue()
+    assert queue.push(task("a.sav", 3))
+    assert queue.push(task("b.sav", 5))
+    assert not queue.push(task("a.sav", 2))
+    assert queue.push(task("a.sav", 9))
+    assert len(queue) == 2
+
+    assert [queue.pop().save_file_path, queue.pop().save_file_path] == ["a.sav", "b.sav"]
+    assert queue.pop() is None
+
+def test_running_task_is_not_queued_again_until_done():
+    queue = TaskQueue()
+    queue.push(task("a.sav"))
+    running = queue.pop()
+    assert not queue.push(task("a.sav", 10))
+    assert queue.push(task("a.sav", goal=AnalysisGoal.HUNT_DECISIONS))
+
+    queue.done(running)
+    assert queue.push(task("a.sav"))
+
+def test_equal_priorities_pop_in_fifo_order():
+    queue = TaskQueue()
+    for name in ("a.sav", "b.sav", "c.sav"):
+        queue.push(task(name))
+    assert [queue.pop().save_file_path for _ in range(3)] == ["a.sav", "b.sav", "c.sav"]
+
+def test_state_round_trip_keeps_queued_order():
+    queue = TaskQueue()
+    queue.push(task("low.sav", 1))
+    queue.push(task("high.sav", 8, AnalysisGoal.VALIDATE_PATTERNS))
+    restored = TaskQueue.from_state(queue.to_state())
+    first = restored.pop()
+    assert (first.save_file_path, first.goal) == ("high.sav", AnalysisGoal.VALIDATE_PATTERNS)
+    assert restored.pop().save_file_path == "low.sav"
+
+def test_drain_runs_each_task_once_within_worker_limit(tmp_path):
+    agent = WitcherAnalysisAgent(str(tmp_path / "missing.db"), "witcher2", max_workers=3, ingest_features=False)
+    in_flight, peak, executed = [0], [0], []
+    lock = threading.Lock()
+
+    def execute(analysis_task):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            executed.append(analysis_task.save_file_path)
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        if analysis_task.save_file_path == "bad.sav":
+            raise ValueError("corrupt save")
+        return {"task": analysis_task.save_file_path}
+
+    agent.execute_analysis_task = execute
+    for n in range(10):
+        agent.task_queue.push(task(f"{n}.sav"))
+        agent.task_queue.push(task(f"{n}.sav"))
+    agent.task_queue.push(task("bad.sav"))
+
+    results = agent.drain_task_queue()
+    assert sorted(executed) == sorted([f"{n}.sav" for n in range(10)] + ["bad.sav"])
+    assert len(results) == 10
+    assert peak[0] <= 3
+    assert agent.memory.failed_attempts.has("bad.sav")
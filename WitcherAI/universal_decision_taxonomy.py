@@ -11,6 +11,18 @@ from dataclasses import dataclass
 from typing import Dict, List, Optional
 from pathlib import Path
 
+try:
+    from instrumentation import count, span
+except ImportError:
+    # run_taxonomy_via_mcp.py executes this source as a standalone temp script
+    import contextlib
+
+    def span(stage: str):
+        return contextlib.nullcontext()
+
+    def count(name: str, value: float = 1):
+        pass
+
 @dataclass
 class DecisionNode:
     """Universal decision classification node"""
@@ -204,19 +216,22 @@ class UniversalDecisionTaxonomy:
             'decision_summary': {}
         }
         
-        for pattern in patterns:
-            context = {'game': game}
-            decision = self.classify_decision(pattern, context)
-            
-            if decision:
-                results['classified_decisions'].append({
-                    'pattern': pattern,
-                    'decision': decision,
-                    'category': decision.category,
-                    'impact': decision.impact_level
-                })
-            else:
-                results['unclassified_patterns'].append(pattern)
+        with span('classify'):
+            for pattern in patterns:
+                context = {'game': game}
+                decision = self.classify_decision(pattern, context)
+                
+                if decision:
+                    results['classified_decisions'].append({
+                        'pattern': pattern,
+                        'decision': decision,
+                        'category': decision.category,
+                        'impact': decision.impact_level
+                    })
+                else:
+                    results['unclassified_patterns'].append(pattern)
+        count('classifications', len(results['classified_decisions']))
+        count('unclassified_patterns', len(results['unclassified_patterns']))
         
         # Generate summary by category
         for item in results['classified_decisions']:
@@ -8,11 +8,15 @@ Integrates with Phase 2B Universal Decision Taxonomy
 
 import struct
 import re
+import zlib
+from array import array
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import binascii
 
+from instrumentation import count, span
+
 @dataclass
 class HexPattern:
     """Represents a hex pattern found in save data"""
@@ -32,6 +36,86 @@ class AnalysisResult:
     cross_game_matches: List[str]
     summary: Dict
 
+# Hit collection modes for WitcherHexAnalyzer.scan_patterns
+HIT_MODE_COUNT = 'count'  # Occurrence count and first/last offset only
+HIT_MODE_FIRST = 'first'  # Plus the first k offsets
+HIT_MODE_ALL = 'all'  # Every offset
+HIT_MODES = (HIT_MODE_COUNT, HIT_MODE_FIRST, HIT_MODE_ALL)
+
+def self_overlaps(needle: bytes) -> bool:
+    """True when a prefix of the needle is also its suffix ('aa', 'abab')
+    
+    Only such needles can overlap themselves, so for every other needle the
+    non-overlapping bytes.count / re.finditer give the overlapping result.
+    """
+    return any(needle[:i] == needle[-i:] for i in range(1, len(needle)))
+
+def count_occurrences(data: bytes, needle: bytes) -> int:
+    """Overlapping occurrence count without collecting offsets"""
+    if not self_overlaps(needle):
+        return data.count(needle)
+    occurrences = 0
+    pos = data.find(needle)
+    while pos != -1:
+        occurrences += 1
+        pos = data.find(needle, pos + 1)
+    return occurrences
+
+def iter_offsets(data: bytes, needle: bytes):
+    """Every (overlapping) offset of needle, found by the regex engine"""
+    expression = re.escape(needle)
+    if self_overlaps(needle):
+        expression = b'(?=' + expression + b')'
+    return map(re.Match.start, re.finditer(expression, data))
+
+class PatternMatch:
+    """Hits of one known pattern, with offsets in a compact array
+    
+    Supports the item access of the legacy result dict (match['count'],
+    match.get('positions')) so dict consumers accept it as-is; to_dict()
+    gives a JSON-ready dict.
+    """
+    __slots__ = ('hex_pattern', 'count', 'positions', 'first_position', 'last_position')
+    
+    FIELDS = ('pattern', 'description', 'category', 'confidence', 'count', 'positions', 'last_position')
+    
+    def __init__(self, hex_pattern: HexPattern, count: int, positions: array,
+                 first_position: int, last_position: int):
+        self.hex_pattern = hex_pattern
+        self.count = count
+        self.positions = positions
+        self.first_position = first_position
+        self.last_position = last_position
+    
+    @property
+    def pattern(self) -> bytes:
+        return self.hex_pattern.pattern
+    
+    @property
+    def description(self) -> str:
+        return self.hex_pattern.description
+    
+    @property
+    def category(self) -> str:
+        return self.hex_pattern.category
+    
+    @property
+    def confidence(self) -> float:
+        return self.hex_pattern.confidence
+    
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+    
+    def to_dict(self) -> Dict:
+        match = {key: getattr(self, key) for key in self.FIELDS}
+        match['positions'] = match['positions'].tolist()
+        return match
+
 class WitcherHexAnalyzer:
     """
     Advanced hex analysis engine for Witcher save files
@@ -191,8 +275,9 @@ class WitcherHexAnalyzer:
             raise FileNotFoundError(f"Save file not found: {file_path}")
         
         # Read file data
-        with open(file_path, 'rb') as f:
+        with span('read'), open(file_path, 'rb') as f:
             data = f.read()
+        count('bytes_read', len(data))
         
         file_size = len(data)
         print(f"📊 File Analysis:")
@@ -206,7 +291,9 @@ class WitcherHexAnalyzer:
         print()
         
         # Find patterns
-        patterns_found = self._find_patterns(data, pattern_type)
+        with span('scan'):
+            patterns_found = self._find_patterns(data, pattern_type)
+        count('patterns_matched', sum(p['count'] for p in patterns_found))
         print(f"📋 Patterns Found: {len(patterns_found)}")
         for pattern in patterns_found:
             confidence_icon = "🟢" if pattern['confidence'] > 0.9 else "🟡" if pattern['confidence'] > 0.8 else "🔴"
@@ -216,7 +303,8 @@ class WitcherHexAnalyzer:
         print()
         
         # Cross-game analysis
-        cross_game_matches = self._analyze_cross_game_patterns(data)
+        with span('cross_game'):
+            cross_game_matches = self._analyze_cross_game_patterns(data)
         if cross_game_matches:
             print(f"🔗 Cross-Game Pattern Matches:")
             for match in cross_game_matches:
@@ -265,38 +353,59 @@ class WitcherHexAnalyzer:
         else:
             return "Unknown/Custom format"
     
-    def _find_patterns(self, data: bytes, pattern_type: str) -> List[Dict]:
-        """Find hex patterns in the data"""
+    def _find_patterns(self, data: bytes, pattern_type: str, max_positions: Optional[int] = 5) -> List[Dict]:
+        """Find hex patterns in the data
         
-        results = []
+        max_positions limits the positions kept per pattern (None keeps all,
+        0 only counts)
+        """
+        if max_positions is None:
+            mode = HIT_MODE_ALL
+        else:
+            mode = HIT_MODE_FIRST if max_positions > 0 else HIT_MODE_COUNT
+        return [match.to_dict() for match in self.scan_patterns(data, pattern_type, mode, max_positions or 0)]
+    
+    def scan_patterns(self, data: bytes, pattern_type: str = 'all', mode: str = HIT_MODE_FIRST,
+                      k: int = 5) -> List['PatternMatch']:
+        """Find hex patterns as compact PatternMatch records
+        
+        mode is HIT_MODE_COUNT (count and first/last offset), HIT_MODE_FIRST
+        (plus the first k offsets) or HIT_MODE_ALL (every offset); only the
+        offsets asked for are ever materialised.
+        """
+        if mode not in HIT_MODES:
+            raise ValueError(f"Unknown hit mode: {mode}")
         
-        # Filter patterns based on type
         search_patterns = self.known_patterns
         if pattern_type != 'all':
             search_patterns = [p for p in search_patterns if p.category == pattern_type]
         
+        typecode = 'I' if len(data) < 2 ** 32 else 'Q'
+        results = []
         for pattern in search_patterns:
-            positions = []
-            start = 0
+            needle = pattern.pattern
+            first = data.find(needle)
+            if first == -1:
+                continue
             
-            while True:
-                pos = data.find(pattern.pattern, start)
-                if pos == -1:
-                    break
-                positions.append(pos)
-                start = pos + 1
+            if mode == HIT_MODE_ALL:
+                positions = array(typecode, iter_offsets(data, needle))
+                occurrences = len(positions)
+            elif mode == HIT_MODE_FIRST:
+                positions = array(typecode)
+                pos = first
+                while pos != -1 and len(positions) < k:
+                    positions.append(pos)
+                    pos = data.find(needle, pos + 1)
+                # Offsets past the first k are counted, not collected
+                occurrences = len(positions) if pos == -1 else count_occurrences(data, needle)
+            else:
+                positions = array(typecode)
+                occurrences = count_occurrences(data, needle)
             
-            if positions:
-                results.append({
-                    'pattern': pattern.pattern,
-                    'description': pattern.description,
-                    'category': pattern.category,
-                    'confidence': pattern.confidence,
-                    'count': len(positions),
-                    'positions': positions[:5]  # Limit to first 5 positions
-                })
+            results.append(PatternMatch(pattern, occurrences, positions, first, data.rfind(needle)))
         
-        return sorted(results, key=lambda x: x['confidence'], reverse=True)
+        return sorted(results, key=lambda match: match.confidence, reverse=True)
     
     def _analyze_cross_game_patterns(self, data: bytes) -> List[str]:
         """Analyze patterns that work across multiple Witcher games"""
@@ -329,6 +438,34 @@ class WitcherHexAnalyzer:
         
         print()
 
+DZIP_HEADER_SIZE = 24
+
+def extract_dzip_payload(data: bytes) -> bytes:
+    """Decompressed payload of a DZIP save (mirrors WitcherCore's DZipDecompressor)
+    
+    Header: magic, version, compression type, data type, uncompressed size,
+    reserved (little-endian u32s). Most saves are a 1:1 wrapper, so a payload
+    within 100 bytes of the declared size is returned as-is; otherwise raw
+    deflate and then gzip are tried. Non-DZIP data is returned unchanged.
+    """
+    if len(data) < DZIP_HEADER_SIZE or data[:4] != b'DZIP':
+        return data
+    
+    uncompressed_size = struct.unpack_from('<I', data, 16)[0]
+    payload = data[DZIP_HEADER_SIZE:]
+    if abs(uncompressed_size - len(payload)) <= 100:
+        return payload
+    
+    with span('decompress'):
+        for wbits in (-zlib.MAX_WBITS, 16 + zlib.MAX_WBITS):  # raw deflate, gzip
+            try:
+                payload = zlib.decompress(payload, wbits)
+                count('bytes_decompressed', len(payload))
+                return payload
+            except zlib.error:
+                continue
+    return payload
+
 def autonomous_hex_analysis(file_path: str, pattern: str = 'all'):
     """
     Autonomous hex analysis entry point
@@ -351,12 +488,16 @@ def autonomous_hex_analysis(file_path: str, pattern: str = 'all'):
 
 if __name__ == "__main__":
     import sys
+    from profiling import profiling
     
-    if len(sys.argv) < 2:
-        print("Usage: python witcher_hex_analyzer.py <save_file_path> [pattern_type]")
+    args = [arg for arg in sys.argv[1:] if arg != '--profile']
+    if not args:
+        print("Usage: python witcher_hex_analyzer.py <save_file_path> [pattern_type] [--profile]")
         sys.exit(1)
     
-    file_path = sys.argv[1]
-    pattern_type = sys.argv[2] if len(sys.argv) > 2 else 'all'
+    file_path = args[0]
+    pattern_type = args[1] if len(args) > 1 else 'all'
     
-    autonomous_hex_analysis(file_path, pattern_type)
+    # --profile writes cProfile stats, collapsed stacks and an allocation report to profiles/
+    with profiling("hex_analysis", '--profile' in sys.argv):
+        autonomous_hex_analysis(file_path, pattern_type)
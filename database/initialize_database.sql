@@ -27,4 +27,28 @@ CREATE TABLE GameDetails (
     DetailValue TEXT NOT NULL,
     FOREIGN KEY (SaveFileId) REFERENCES SaveFiles(Id)
 );
-SELECT 'GameDetails table created successfully' AS Message;
\ No newline at end of file
+SELECT 'GameDetails table created successfully' AS Message;
+-- Create PatternSaveOccurrence table (per-save hex analyzer statistics, one row per pattern and save)
+CREATE TABLE PatternSaveOccurrence (
+    pattern_text TEXT NOT NULL,
+    save_path TEXT NOT NULL,
+    game TEXT NOT NULL,
+    occurrence_count INTEGER NOT NULL,
+    first_offset INTEGER,
+    last_offset INTEGER,
+    file_size INTEGER NOT NULL,
+    analyzed_at REAL NOT NULL,
+    PRIMARY KEY (pattern_text, save_path)
+);
+SELECT 'PatternSaveOccurrence table created successfully' AS Message;
+
+-- Create PatternFeatures table (corpus features read by the ML confidence engine)
+CREATE TABLE PatternFeatures (
+    pattern_text TEXT PRIMARY KEY,
+    total_count INTEGER NOT NULL,
+    save_count INTEGER NOT NULL,
+    game_count INTEGER NOT NULL,
+    positional_spread REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+SELECT 'PatternFeatures table created successfully' AS Message;